@@ -1,14 +1,32 @@
 from e2b import *
-from .code_interpreter_sync import Sandbox
+
 from .code_interpreter_async import AsyncSandbox
+from .code_interpreter_sync import Sandbox
+from .execution_handle_async import AsyncExecutionHandle
+from .execution_handle_sync import ExecutionHandle
 from .models import (
+    BackpressurePolicy,
+    BlobReference,
     Context,
+    DataFrameMode,
+    DataFrameRows,
+    DataFrameSummary,
     Execution,
+    ExecutionCancellation,
     ExecutionError,
-    Result,
-    MIMEType,
+    ExecutionInfo,
+    ExecutionStatus,
+    ImageFormat,
+    ImagePolicy,
+    ImageSavePolicy,
+    ImageSaves,
     Logs,
+    MIMEType,
     OutputHandler,
     OutputMessage,
+    Result,
     RunCodeLanguage,
+    StreamMode,
+    TruncatedOutput,
 )
+from .remote_call import RemoteTraceback
@@ -1,7 +1,18 @@
 import logging
+import time
 import httpx
 
-from typing import Optional, Dict, overload, Union, List
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Optional,
+    Dict,
+    TypeVar,
+    overload,
+    Union,
+    List,
+)
 from httpx import Client
 from e2b import Sandbox as BaseSandbox, InvalidArgumentException
 from e2b.api.client_sync import get_transport
@@ -10,18 +21,49 @@ from e2b_code_interpreter.constants import (
     DEFAULT_TEMPLATE,
     JUPYTER_PORT,
     DEFAULT_TIMEOUT,
+    EXECUTION_TIMEOUT_GRACE,
+    RESUME_DELAY,
+    RESUME_RETRIES,
+    RESULT_CACHE_SIZE,
+)
+from e2b_code_interpreter.remote_call import (
+    Call,
+    call_code,
+    call_path,
+    chunked,
+    dump_calls,
+    load_results,
 )
+from e2b_code_interpreter.result_cache import ResultCache
+from e2b_code_interpreter.execution_handle_sync import ExecutionHandle
 from e2b_code_interpreter.models import (
     ExecutionError,
     Execution,
+    ExecutionCancellation,
+    ExecutionInfo,
     RunCodeLanguage,
+    StreamMode,
+    BackpressurePolicy,
+    BlobReference,
+    DataFrameMode,
+    DataFrameRows,
+    DataFrameSummary,
+    ImagePolicy,
+    ImageSavePolicy,
     Context,
     Result,
     extract_exception,
+    parse_batch_output,
+    parse_fanout_output,
     parse_output,
     OutputHandler,
     OutputMessage,
 )
+from e2b_code_interpreter.stream import (
+    accept_header,
+    iter_records,
+    is_msgpack_stream,
+)
 from e2b_code_interpreter.exceptions import (
     format_execution_timeout_error,
     format_request_timeout_error,
@@ -30,6 +72,8 @@ from e2b_code_interpreter.exceptions import (
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class Sandbox(BaseSandbox):
     """
@@ -65,6 +109,13 @@ class Sandbox(BaseSandbox):
             return sandbox_url
         return f"{'http' if self.connection_config.debug else 'https'}://{self.get_host(JUPYTER_PORT)}"
 
+    @property
+    def _result_cache(self) -> ResultCache:
+        # Created with the first execution with `dedupe`
+        if "_result_cache" not in self.__dict__:
+            self.__dict__["_result_cache"] = ResultCache(RESULT_CACHE_SIZE)
+        return self.__dict__["_result_cache"]
+
     @property
     def _client(self) -> Client:
         # TODO: Remove later
@@ -112,6 +163,20 @@ class Sandbox(BaseSandbox):
         envs: Optional[Dict[str, str]] = None,
         timeout: Optional[float] = None,
         request_timeout: Optional[float] = None,
+        stream_coalesce_ms: Optional[float] = None,
+        stream_coalesce_bytes: Optional[int] = None,
+        stream_mode: Optional[StreamMode] = None,
+        stream_progress_interval_ms: Optional[float] = None,
+        max_output_bytes: Optional[int] = None,
+        max_results: Optional[int] = None,
+        max_result_bytes: Optional[int] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
+        resumable: bool = False,
+        dataframe_mode: Optional[DataFrameMode] = None,
+        formats: Optional[List[str]] = None,
+        blob_threshold_bytes: Optional[int] = None,
+        dedupe: bool = False,
+        image_policy: Optional[ImagePolicy] = None,
     ) -> Execution:
         """
         Runs the code for the specified language.
@@ -128,8 +193,22 @@ class Sandbox(BaseSandbox):
         :param on_result: Callback for the `Result` object
         :param on_error: Callback for the `ExecutionError` object
         :param envs: Custom environment variables
-        :param timeout: Timeout for the code execution in **seconds**
+        :param timeout: Timeout for the code execution in **seconds**. The sandbox interrupts the code when it's over, the output produced until then is still passed to the callbacks and is in the `execution` of the raised `TimeoutException`
         :param request_timeout: Timeout for the request in **seconds**
+        :param stream_coalesce_ms: Merge consecutive stdout/stderr chunks on the server for up to this many **milliseconds** before sending them, trading latency for fewer messages
+        :param stream_coalesce_bytes: Maximum size of the merged stdout/stderr chunks. Without `stream_coalesce_ms`, only chunks that are already waiting are merged
+        :param stream_mode: `compact` sends only the latest state of lines redrawn by progress bars (`\\r`, ANSI erase in line) at a bounded rate, and replaces earlier display outputs on display updates and `clear_output` instead of adding to them. Defaults to `raw`
+        :param stream_progress_interval_ms: Minimum time between sending redraws of a line in the `compact` stream mode in **milliseconds**
+        :param max_output_bytes: Maximum bytes of stdout and stderr to send back, the rest is written to a file in the sandbox, see `Execution.truncated`
+        :param max_results: Maximum number of results to send back, the rest is written to files in the sandbox
+        :param max_result_bytes: Maximum total size of the results to send back in bytes, the rest is written to files in the sandbox
+        :param backpressure: What the server does when the output is produced faster than it is read: `pause` the code's output, `drop` stdout/stderr chunks or `spill` the output to disk. Defaults to the server's policy
+        :param resumable: Keep the execution running if the connection drops and reconnect to it automatically, continuing after the last output received
+        :param dataframe_mode: `summary` sends only the schema, a head and tail preview and statistics of displayed DataFrames in `Result.dataframe` instead of all of their rows, fetch the rows with `get_dataframe_rows`. Defaults to `full`
+        :param formats: Result formats to compute and send back, by name as in `Result.formats()` (e.g. `text`, `png`, `data`) or MIME type. The sandbox skips computing the others for Python. All of them if not specified
+        :param blob_threshold_bytes: Result formats larger than this many bytes are stored in the sandbox instead of being sent, see `Result.blobs`, `Sandbox` fetches them the first time they're read
+        :param dedupe: Result formats this sandbox object already received are sent again only as references, see `Result.hashes`, and filled in from its cache of the latest of them, `Sandbox` fetches the others from the sandbox the first time they're read
+        :param image_policy: Maximum size and DPI of displayed images, the format to encode them in, and thumbnails to send before them, see `ImagePolicy`. Only for Python
 
         :return: `Execution` result object
         """
@@ -147,6 +226,20 @@ class Sandbox(BaseSandbox):
         envs: Optional[Dict[str, str]] = None,
         timeout: Optional[float] = None,
         request_timeout: Optional[float] = None,
+        stream_coalesce_ms: Optional[float] = None,
+        stream_coalesce_bytes: Optional[int] = None,
+        stream_mode: Optional[StreamMode] = None,
+        stream_progress_interval_ms: Optional[float] = None,
+        max_output_bytes: Optional[int] = None,
+        max_results: Optional[int] = None,
+        max_result_bytes: Optional[int] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
+        resumable: bool = False,
+        dataframe_mode: Optional[DataFrameMode] = None,
+        formats: Optional[List[str]] = None,
+        blob_threshold_bytes: Optional[int] = None,
+        dedupe: bool = False,
+        image_policy: Optional[ImagePolicy] = None,
     ) -> Execution:
         """
         Runs the code in the specified context, if not specified, the default context is used.
@@ -162,8 +255,22 @@ class Sandbox(BaseSandbox):
         :param on_result: Callback for the `Result` object
         :param on_error: Callback for the `ExecutionError` object
         :param envs: Custom environment variables
-        :param timeout: Timeout for the code execution in **seconds**
+        :param timeout: Timeout for the code execution in **seconds**. The sandbox interrupts the code when it's over, the output produced until then is still passed to the callbacks and is in the `execution` of the raised `TimeoutException`
         :param request_timeout: Timeout for the request in **seconds**
+        :param stream_coalesce_ms: Merge consecutive stdout/stderr chunks on the server for up to this many **milliseconds** before sending them, trading latency for fewer messages
+        :param stream_coalesce_bytes: Maximum size of the merged stdout/stderr chunks. Without `stream_coalesce_ms`, only chunks that are already waiting are merged
+        :param stream_mode: `compact` sends only the latest state of lines redrawn by progress bars (`\\r`, ANSI erase in line) at a bounded rate, and replaces earlier display outputs on display updates and `clear_output` instead of adding to them. Defaults to `raw`
+        :param stream_progress_interval_ms: Minimum time between sending redraws of a line in the `compact` stream mode in **milliseconds**
+        :param max_output_bytes: Maximum bytes of stdout and stderr to send back, the rest is written to a file in the sandbox, see `Execution.truncated`
+        :param max_results: Maximum number of results to send back, the rest is written to files in the sandbox
+        :param max_result_bytes: Maximum total size of the results to send back in bytes, the rest is written to files in the sandbox
+        :param backpressure: What the server does when the output is produced faster than it is read: `pause` the code's output, `drop` stdout/stderr chunks or `spill` the output to disk. Defaults to the server's policy
+        :param resumable: Keep the execution running if the connection drops and reconnect to it automatically, continuing after the last output received
+        :param dataframe_mode: `summary` sends only the schema, a head and tail preview and statistics of displayed DataFrames in `Result.dataframe` instead of all of their rows, fetch the rows with `get_dataframe_rows`. Defaults to `full`
+        :param formats: Result formats to compute and send back, by name as in `Result.formats()` (e.g. `text`, `png`, `data`) or MIME type. The sandbox skips computing the others for Python. All of them if not specified
+        :param blob_threshold_bytes: Result formats larger than this many bytes are stored in the sandbox instead of being sent, see `Result.blobs`, `Sandbox` fetches them the first time they're read
+        :param dedupe: Result formats this sandbox object already received are sent again only as references, see `Result.hashes`, and filled in from its cache of the latest of them, `Sandbox` fetches the others from the sandbox the first time they're read
+        :param image_policy: Maximum size and DPI of displayed images, the format to encode them in, and thumbnails to send before them, see `ImagePolicy`. Only for Python
 
         :return: `Execution` result object
         """
@@ -181,6 +288,20 @@ class Sandbox(BaseSandbox):
         envs: Optional[Dict[str, str]] = None,
         timeout: Optional[float] = None,
         request_timeout: Optional[float] = None,
+        stream_coalesce_ms: Optional[float] = None,
+        stream_coalesce_bytes: Optional[int] = None,
+        stream_mode: Optional[StreamMode] = None,
+        stream_progress_interval_ms: Optional[float] = None,
+        max_output_bytes: Optional[int] = None,
+        max_results: Optional[int] = None,
+        max_result_bytes: Optional[int] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
+        resumable: bool = False,
+        dataframe_mode: Optional[DataFrameMode] = None,
+        formats: Optional[List[str]] = None,
+        blob_threshold_bytes: Optional[int] = None,
+        dedupe: bool = False,
+        image_policy: Optional[ImagePolicy] = None,
     ) -> Execution:
         logger.debug(f"Executing code {code}")
 
@@ -193,9 +314,91 @@ class Sandbox(BaseSandbox):
         request_timeout = request_timeout or self.connection_config.request_timeout
         context_id = context.id if context else None
 
+        body = {
+            "code": code,
+            "context_id": context_id,
+            "language": language,
+            "env_vars": envs,
+            "stream_coalesce_ms": stream_coalesce_ms,
+            "stream_coalesce_bytes": stream_coalesce_bytes,
+            "stream_mode": stream_mode,
+            "stream_progress_interval_ms": stream_progress_interval_ms,
+            "max_output_bytes": max_output_bytes,
+            "max_results": max_results,
+            "max_result_bytes": max_result_bytes,
+            "backpressure": backpressure,
+            "resumable": resumable,
+            "timeout": timeout,
+            "dataframe_mode": dataframe_mode,
+            "formats": formats,
+            "blob_threshold_bytes": blob_threshold_bytes,
+            "dedupe_session": self._result_cache.session_id if dedupe else None,
+            "image_policy": image_policy.to_dict() if image_policy else None,
+        }
+
+        execution = self._stream_execution(
+            {
+                "method": "POST",
+                "url": f"{self._jupyter_url}/execute",
+                "json": body,
+            },
+            resumable=resumable,
+            dedupe=dedupe,
+            compact=stream_mode == "compact",
+            # The sandbox ends the execution at `timeout`, give it time to send the rest
+            timeout=timeout + EXECUTION_TIMEOUT_GRACE if timeout is not None else None,
+            request_timeout=request_timeout,
+            on_stdout=on_stdout,
+            on_stderr=on_stderr,
+            on_result=on_result,
+            on_error=on_error,
+        )
+
+        # The sandbox stopped the code at `timeout`, same as when the client gives up
+        if execution.error and execution.error.name == "ExecutionTimeout":
+            raise format_execution_timeout_error(execution)
+
+        return execution
+
+    def run_code_batch(
+        self,
+        cells: List[str],
+        language: Optional[str] = None,
+        context: Optional[Context] = None,
+        envs: Optional[Dict[str, str]] = None,
+        stop_on_error: bool = True,
+        timeout: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+    ) -> List[Execution]:
+        """
+        Runs the cells one after another in a single request, instead of a `run_code` call and round trip for each of them.
+        The kernel gets all of the cells at once and starts each one right after the previous one finishes.
+
+        :param cells: Code of the cells to execute, in order
+        :param language: Language to use for code execution. If not defined, the default Python context is used.
+        :param context: Concrete context to run the code in. If not specified, the default context for the language is used. It's mutually exclusive with the language.
+        :param envs: Custom environment variables, set for the whole batch
+        :param stop_on_error: Skip the cells after the first one that raises an error, their `Execution` gets an `ExecutionAborted` error. Set to `False` to run all of the cells regardless
+        :param timeout: Timeout for the whole batch in **seconds**
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: `Execution` result object of each cell, in the order of `cells`
+        """
+        logger.debug(f"Executing a batch of {len(cells)} cells")
+
+        if language and context:
+            raise InvalidArgumentException(
+                "You can provide context or language, but not both at the same time."
+            )
+
+        timeout = None if timeout == 0 else (timeout or DEFAULT_TIMEOUT)
+        request_timeout = request_timeout or self.connection_config.request_timeout
+        executions = [Execution() for _ in cells]
+
         try:
             headers: Dict[str, str] = {
                 "Content-Type": "application/json",
+                "Accept": accept_header(),
                 "E2b-Sandbox-Id": self.sandbox_id,
                 "E2b-Sandbox-Port": str(JUPYTER_PORT),
             }
@@ -206,25 +409,16 @@ class Sandbox(BaseSandbox):
 
             with self._client.stream(
                 "POST",
-                f"{self._jupyter_url}/execute",
+                f"{self._jupyter_url}/execute/batch",
                 json={
-                    "code": code,
-                    "context_id": context_id,
+                    "cells": cells,
+                    "context_id": context.id if context else None,
                     "language": language,
                     "env_vars": envs,
+                    "stop_on_error": stop_on_error,
                 },
                 headers=headers,
-                # `timeout` bounds the execution, `request_timeout` only the
-                # connect. Every non-connect phase must carry `timeout`: the
-                # SDK's pyqwest-backed transport collapses the per-phase
-                # timeouts into a single whole-request deadline and takes the
-                # longest of them, so leaving `request_timeout` on the write
-                # and pool phases would raise the floor to
-                # `max(timeout, request_timeout)` and silently ignore any
-                # `timeout` shorter than it. This matches the JS SDK, which
-                # aborts the execution on a `timeout`-long timer.
-                # `timeout=0` disables the deadline entirely; the transport
-                # still bounds connect on its own.
+                # See `_stream_execution` for why every phase but connect is `timeout`
                 timeout=(
                     httpx.Timeout(timeout, connect=request_timeout)
                     if timeout is not None
@@ -235,19 +429,296 @@ class Sandbox(BaseSandbox):
                 if err:
                     raise err
 
-                execution = Execution()
+                records = (
+                    iter_records(response)
+                    if is_msgpack_stream(response)
+                    else response.iter_lines()
+                )
+                for record in records:
+                    parse_batch_output(executions, record)
+
+            return executions
+        except httpx.ReadTimeout:
+            raise format_execution_timeout_error()
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def run_code_fanout(
+        self,
+        code: str,
+        contexts: List[Union[Context, str]],
+        envs: Optional[Dict[str, str]] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+    ) -> Dict[str, Execution]:
+        """
+        Runs the same code in each of the contexts at the same time, e.g. for a parameter sweep where every context holds different data.
+        The contexts are independent, an error or a missing context only shows up in the `Execution` of that context.
+
+        :param code: Code to execute
+        :param contexts: Contexts, or their IDs, to run the code in
+        :param envs: Custom environment variables
+        :param max_concurrency: How many contexts run the code at the same time, the sandbox limits it to `E2B_FANOUT_MAX_CONCURRENCY` (16 by default)
+        :param timeout: Timeout for the code execution in each context in **seconds**, the sandbox interrupts the code when it's over. As the contexts might wait for each other, the whole request is limited to the timeouts of all of them one after another
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: `Execution` result object of each context by its ID, in the order of `contexts`
+        """
+        context_ids = [
+            context.id if isinstance(context, Context) else context
+            for context in contexts
+        ]
+        logger.debug(f"Executing code in {len(context_ids)} contexts {code}")
+
+        timeout = None if timeout == 0 else (timeout or DEFAULT_TIMEOUT)
+        request_timeout = request_timeout or self.connection_config.request_timeout
+        # The sandbox ends each context's execution at `timeout`, in the worst case
+        # they run one after another
+        deadline = (
+            timeout * len(context_ids) + EXECUTION_TIMEOUT_GRACE
+            if timeout is not None
+            else None
+        )
+        executions = {context_id: Execution() for context_id in context_ids}
+
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "Accept": accept_header(),
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self._envd_access_token:
+                headers["X-Access-Token"] = self._envd_access_token
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            with self._client.stream(
+                "POST",
+                f"{self._jupyter_url}/execute/fanout",
+                json={
+                    "code": code,
+                    "context_ids": context_ids,
+                    "env_vars": envs,
+                    "max_concurrency": max_concurrency,
+                    "timeout": timeout,
+                },
+                headers=headers,
+                # See `_stream_execution` for why every phase but connect is the deadline
+                timeout=(
+                    httpx.Timeout(deadline, connect=request_timeout)
+                    if deadline is not None
+                    else httpx.Timeout(None)
+                ),
+            ) as response:
+                err = extract_exception(response)
+                if err:
+                    raise err
+
+                records = (
+                    iter_records(response)
+                    if is_msgpack_stream(response)
+                    else response.iter_lines()
+                )
+                for record in records:
+                    parse_fanout_output(executions, record)
+
+            return executions
+        except httpx.ReadTimeout:
+            raise format_execution_timeout_error()
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def call(
+        self,
+        fn: Callable[..., T],
+        /,
+        *args: Any,
+        context: Optional[Context] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Calls the function with the arguments in the sandbox's Python context and returns what it returns, instead of building code for `run_code` and parsing its text result.
+        The function and the arguments are serialized with `cloudpickle` (install `e2b-code-interpreter[cloudpickle]`) and passed as files, so they keep their types and can be large.
+        The sandbox needs the same Python version to run functions defined in `__main__` or lambdas.
+
+        If the function raises, the same exception is raised here, caused by a `RemoteTraceback` with the traceback from the sandbox.
+
+        :param fn: Function to call
+        :param args: Positional arguments for the function
+        :param context: Context to call the function in. If not specified, the default Python context is used.
+        :param timeout: Timeout for the call in **seconds**, the sandbox interrupts the function when it's over
+        :param kwargs: Keyword arguments for the function. Pass `context` or `timeout` for the function itself with `functools.partial`
+
+        :return: Return value of the function
+        """
+        return self._call_remote(fn, [(args, kwargs)], context, timeout)[0]
+
+    def map(
+        self,
+        fn: Callable[[Any], T],
+        iterable: Iterable[Any],
+        chunksize: int = 100,
+        context: Optional[Context] = None,
+        timeout: Optional[float] = None,
+    ) -> List[T]:
+        """
+        Calls the function in the sandbox for each item like the built-in `map`, see `call`.
+        The items are sent in chunks of `chunksize`, each chunk takes a single execution to amortize the overhead of a call.
+        The first exception stops the remaining items and is raised here.
+
+        :param fn: Function to call with each item
+        :param iterable: Items to call the function with
+        :param chunksize: Number of items sent to the sandbox at once
+        :param context: Context to call the function in. If not specified, the default Python context is used.
+        :param timeout: Timeout for each chunk in **seconds**, the sandbox interrupts the function when it's over
+
+        :return: Return values of the function, in the order of the items
+        """
+        results: List[T] = []
+        for chunk in chunked(iterable, chunksize):
+            results.extend(
+                self._call_remote(
+                    fn, [((item,), {}) for item in chunk], context, timeout
+                )
+            )
+        return results
+
+    def _call_remote(
+        self,
+        fn: Callable,
+        calls: List[Call],
+        context: Optional[Context] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Any]:
+        path = call_path()
+        self.files.write(f"{path}.in", dump_calls(fn, calls))
+
+        execution = self.run_code(call_code(path), context=context, timeout=timeout)
+        if execution.error:
+            return load_results(execution, None)
+
+        try:
+            data = self.files.read(f"{path}.out", format="bytes")
+        finally:
+            self.files.remove(f"{path}.out")
+
+        return load_results(execution, bytes(data))
+
+    def _stream_execution(
+        self,
+        request: Dict[str, Any],
+        resumable: bool,
+        timeout: Optional[float],
+        request_timeout: Optional[float],
+        dedupe: bool = False,
+        compact: bool = False,
+        on_stdout: Optional[OutputHandler[OutputMessage]] = None,
+        on_stderr: Optional[OutputHandler[OutputMessage]] = None,
+        on_result: Optional[OutputHandler[Result]] = None,
+        on_error: Optional[OutputHandler[ExecutionError]] = None,
+    ) -> Execution:
+        """
+        Streams the outputs of an execution into an `Execution`. With `resumable`, a
+        stream that is cut before the execution finished is continued with
+        `GET /executions/{id}/stream`. With `dedupe`, the formats sent as references
+        are filled in from the result cache. With `compact`, results replace the
+        earlier ones with their `display_id`.
+        """
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "Accept": accept_header(),
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self._envd_access_token:
+                headers["X-Access-Token"] = self._envd_access_token
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            execution = Execution()
+            execution._compact = compact
+            if dedupe:
+                execution._result_cache = self._result_cache
+            execution._load_blob = self.get_blob
+            reconnects = 0
+
+            while True:
+                try:
+                    with self._client.stream(
+                        **request,
+                        headers=headers,
+                        # `timeout` bounds the execution, `request_timeout` only the
+                        # connect. Every non-connect phase must carry `timeout`: the
+                        # SDK's pyqwest-backed transport collapses the per-phase
+                        # timeouts into a single whole-request deadline and takes the
+                        # longest of them, so leaving `request_timeout` on the write
+                        # and pool phases would raise the floor to
+                        # `max(timeout, request_timeout)` and silently ignore any
+                        # `timeout` shorter than it. This matches the JS SDK, which
+                        # aborts the execution on a `timeout`-long timer.
+                        # `timeout=0` disables the deadline entirely; the transport
+                        # still bounds connect on its own.
+                        timeout=(
+                            httpx.Timeout(timeout, connect=request_timeout)
+                            if timeout is not None
+                            else httpx.Timeout(None)
+                        ),
+                    ) as response:
+                        err = extract_exception(response)
+                        if err:
+                            raise err
+
+                        records = (
+                            iter_records(response)
+                            if is_msgpack_stream(response)
+                            else response.iter_lines()
+                        )
+                        for record in records:
+                            parse_output(
+                                execution,
+                                record,
+                                on_stdout=on_stdout,
+                                on_stderr=on_stderr,
+                                on_result=on_result,
+                                on_error=on_error,
+                            )
 
-                for line in response.iter_lines():
-                    parse_output(
-                        execution,
-                        line,
-                        on_stdout=on_stdout,
-                        on_stderr=on_stderr,
-                        on_result=on_result,
-                        on_error=on_error,
-                    )
+                    if (
+                        not resumable
+                        or execution._finished
+                        or execution._execution_id is None
+                    ):
+                        return execution
+                except (httpx.ReadError, httpx.RemoteProtocolError):
+                    if (
+                        not resumable
+                        or execution._execution_id is None
+                        or reconnects >= RESUME_RETRIES
+                    ):
+                        raise
 
-                return execution
+                # The stream was cut before the execution finished, the server
+                # kept it running so continue after the last output received
+                reconnects += 1
+                logger.warning(
+                    f"Execution stream {execution._execution_id} was interrupted, reconnecting ({reconnects}/{RESUME_RETRIES})"
+                )
+                time.sleep(RESUME_DELAY)
+                request = {
+                    "method": "GET",
+                    "url": f"{self._jupyter_url}/executions/{execution._execution_id}/stream",
+                    "params": {"last_seq": execution._last_seq},
+                }
         except httpx.ReadTimeout:
             raise format_execution_timeout_error()
         except httpx.TimeoutException:
@@ -413,3 +884,327 @@ class Sandbox(BaseSandbox):
         except (httpx.ReadError, httpx.RemoteProtocolError) as err:
             self._handle_connection_error(err)
             raise
+
+    def set_image_save_policy(
+        self,
+        policy: ImageSavePolicy,
+        context: Optional[Union[Context, str]] = None,
+        request_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Set how PIL images saved to a path with `Image.save` are displayed in a context.
+        By default, the first 10 of them in each execution are displayed and the rest are summarized in a single result after it, see `Result.image_saves`.
+
+        :param policy: The policy, `ImageSavePolicy(enabled=False)` turns the displaying off
+        :param context: Context to set the policy for. Can be a Context object or a context ID string. If not specified, the default Python context is used.
+        :param request_timeout: Timeout for the request in **seconds**
+        """
+        context_id = (
+            context.id if isinstance(context, Context) else context or "default"
+        )
+
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            response = self._client.put(
+                f"{self._jupyter_url}/contexts/{context_id}/image-saves",
+                json=policy.to_dict(),
+                headers=headers,
+                timeout=request_timeout or self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def get_blob(
+        self,
+        blob: Union[BlobReference, str],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+    ) -> bytes:
+        """
+        Fetch the content of a result format stored as a blob, see `Result.blobs`.
+
+        :param blob: Reference of the blob from `Result.blobs`, or its hash
+        :param start: Position of the first byte to fetch, to fetch only a part of the blob
+        :param end: Position after the last byte to fetch. If not specified, until the end of the blob
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: Content of the blob, the decoded bytes of base64 formats like `png`
+        """
+        blob_hash = blob.hash if isinstance(blob, BlobReference) else blob
+
+        try:
+            headers: Dict[str, str] = {
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self._envd_access_token:
+                headers["X-Access-Token"] = self._envd_access_token
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+            if start is not None or end is not None:
+                last = end - 1 if end is not None else ""
+                headers["Range"] = f"bytes={start or 0}-{last}"
+
+            response = self._client.get(
+                f"{self._jupyter_url}/blobs/{blob_hash}",
+                headers=headers,
+                timeout=request_timeout or self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+
+            return response.content
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def get_dataframe_rows(
+        self,
+        dataframe: Union[DataFrameSummary, str],
+        start: int = 0,
+        stop: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        context: Optional[Context] = None,
+        request_timeout: Optional[float] = None,
+    ) -> DataFrameRows:
+        """
+        Fetch rows of a DataFrame kept in the context, without sending the whole DataFrame.
+        The sandbox sends a limited number of rows at once, check `stop` of the returned rows.
+
+        :param dataframe: Summary of the DataFrame from `Result.dataframe`, its ID, or the name of a DataFrame variable in the context
+        :param start: Position of the first row
+        :param stop: Position after the last row. If not specified, as many rows as the sandbox sends at once
+        :param columns: Columns to fetch. If not specified, all of them
+        :param context: Context the DataFrame is in. If not specified, the default Python context is used.
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: The rows
+        """
+        dataframe_id = (
+            dataframe.id if isinstance(dataframe, DataFrameSummary) else dataframe
+        )
+        context_id = context.id if context else "default"
+
+        params: Dict[str, Any] = {"start": start}
+        if stop is not None:
+            params["stop"] = stop
+        if columns:
+            params["columns"] = columns
+
+        try:
+            headers: Dict[str, str] = {
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self._envd_access_token:
+                headers["X-Access-Token"] = self._envd_access_token
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            response = self._client.get(
+                f"{self._jupyter_url}/contexts/{context_id}/dataframes/{dataframe_id}/rows",
+                params=params,
+                headers=headers,
+                timeout=request_timeout or self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+
+            return DataFrameRows.from_json(response.json())
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def submit_code(
+        self,
+        code: str,
+        language: Optional[str] = None,
+        context: Optional[Context] = None,
+        envs: Optional[Dict[str, str]] = None,
+        stream_mode: Optional[StreamMode] = None,
+        max_output_bytes: Optional[int] = None,
+        max_results: Optional[int] = None,
+        max_result_bytes: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+    ) -> ExecutionHandle:
+        """
+        Starts running the code in the background and returns right away, without waiting for the execution.
+
+        Use the returned handle to check on the execution, attach to its output or get its result once it's done.
+        Executions in the same context run one after another.
+
+        :param code: Code to execute
+        :param language: Language to use for code execution. If not defined, the default Python context is used.
+        :param context: Concrete context to run the code in. If not specified, the default context for the language is used. It's mutually exclusive with the language.
+        :param envs: Custom environment variables
+        :param stream_mode: `compact` keeps only the latest state of lines redrawn by progress bars and of updated displays, see `run_code`
+        :param max_output_bytes: Maximum bytes of stdout and stderr to keep in the result, the rest is written to a file in the sandbox
+        :param max_results: Maximum number of results to keep in the result, the rest is written to files in the sandbox
+        :param max_result_bytes: Maximum total size of the results to keep in the result in bytes, the rest is written to files in the sandbox
+        :param request_timeout: Timeout for the request in **seconds**
+
+        :return: Handle of the execution
+        """
+        logger.debug(f"Submitting code {code}")
+
+        if language and context:
+            raise InvalidArgumentException(
+                "You can provide context or language, but not both at the same time."
+            )
+
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self._envd_access_token:
+                headers["X-Access-Token"] = self._envd_access_token
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            response = self._client.post(
+                f"{self._jupyter_url}/executions",
+                json={
+                    "code": code,
+                    "context_id": context.id if context else None,
+                    "language": language,
+                    "env_vars": envs,
+                    "stream_mode": stream_mode,
+                    "max_output_bytes": max_output_bytes,
+                    "max_results": max_results,
+                    "max_result_bytes": max_result_bytes,
+                },
+                headers=headers,
+                timeout=request_timeout or self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+
+            return ExecutionHandle(self, ExecutionInfo.from_json(response.json()))
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def get_execution(self, execution_id: str) -> ExecutionHandle:
+        """
+        Get the handle of an execution submitted with `submit_code`, e.g. by another client.
+
+        :param execution_id: ID of the execution
+
+        :return: Handle of the execution
+        """
+        return ExecutionHandle(self, self._get_execution_info(execution_id))
+
+    def list_executions(self) -> List[ExecutionInfo]:
+        """
+        List the executions submitted with `submit_code`, both the ones still running and the finished ones whose results are kept.
+
+        :return: List of executions.
+        """
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            response = self._client.get(
+                f"{self._jupyter_url}/executions",
+                headers=headers,
+                timeout=self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+
+            return [ExecutionInfo.from_json(data) for data in response.json()]
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def _get_execution_info(self, execution_id: str) -> ExecutionInfo:
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            response = self._client.get(
+                f"{self._jupyter_url}/executions/{execution_id}",
+                headers=headers,
+                timeout=self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+
+            return ExecutionInfo.from_json(response.json())
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
+
+    def _cancel_execution(self, execution_id: str) -> ExecutionCancellation:
+        try:
+            headers: Dict[str, str] = {
+                "Content-Type": "application/json",
+                "E2b-Sandbox-Id": self.sandbox_id,
+                "E2b-Sandbox-Port": str(JUPYTER_PORT),
+            }
+            if self.traffic_access_token:
+                headers["E2B-Traffic-Access-Token"] = self.traffic_access_token
+
+            response = self._client.delete(
+                f"{self._jupyter_url}/executions/{execution_id}",
+                headers=headers,
+                timeout=self.connection_config.request_timeout,
+            )
+
+            err = extract_exception(response)
+            if err:
+                raise err
+
+            return ExecutionCancellation.from_json(response.json())
+        except httpx.TimeoutException:
+            raise format_request_timeout_error()
+        except (httpx.ReadError, httpx.RemoteProtocolError) as err:
+            self._handle_connection_error(err)
+            raise
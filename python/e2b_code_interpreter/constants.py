@@ -1,3 +1,10 @@
 DEFAULT_TEMPLATE = "code-interpreter-v1"
 JUPYTER_PORT = 49999
 DEFAULT_TIMEOUT = 300
+# Extra seconds the client waits for an execution the sandbox ends on its timeout
+EXECUTION_TIMEOUT_GRACE = 5
+# Reconnects to a resumable execution's stream before giving up, and the delay between them
+RESUME_RETRIES = 5
+RESUME_DELAY = 1
+# Result formats kept to fill in the ones the sandbox sends again only as references with `dedupe`
+RESULT_CACHE_SIZE = 256
@@ -7,10 +7,13 @@ def format_request_timeout_error() -> Exception:
     )
 
 
-def format_execution_timeout_error() -> Exception:
-    return TimeoutException(
+def format_execution_timeout_error(execution=None) -> Exception:
+    error = TimeoutException(
         "Execution timed out — the 'timeout' option can be used to increase this timeout",
     )
+    # The output produced before the sandbox stopped the code, if it did
+    error.execution = execution
+    return error
 
 
 def format_sandbox_killed_error() -> Exception:
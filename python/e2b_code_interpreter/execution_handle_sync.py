@@ -0,0 +1,139 @@
+import time
+from typing import TYPE_CHECKING
+
+from e2b import TimeoutException
+
+from e2b_code_interpreter.constants import DEFAULT_TIMEOUT
+from e2b_code_interpreter.models import (
+    Execution,
+    ExecutionCancellation,
+    ExecutionError,
+    ExecutionInfo,
+    OutputHandler,
+    OutputMessage,
+    Result,
+)
+
+if TYPE_CHECKING:
+    from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+
+class ExecutionHandle:
+    """
+    Handle of an execution submitted with `Sandbox.submit_code`, running in the sandbox in the background.
+    """
+
+    def __init__(self, sandbox: "Sandbox", info: ExecutionInfo):
+        self._sandbox = sandbox
+        self._info = info
+
+    @property
+    def id(self) -> str:
+        """
+        The ID of the execution.
+        """
+        return self._info.id
+
+    @property
+    def context_id(self) -> str:
+        """
+        The ID of the context the code runs in.
+        """
+        return self._info.context_id
+
+    def status(self) -> ExecutionInfo:
+        """
+        Get the current status of the execution.
+
+        :return: Execution info
+        """
+        self._info = self._sandbox._get_execution_info(self.id)
+        return self._info
+
+    def attach(
+        self,
+        on_stdout: OutputHandler[OutputMessage] | None = None,
+        on_stderr: OutputHandler[OutputMessage] | None = None,
+        on_result: OutputHandler[Result] | None = None,
+        on_error: OutputHandler[ExecutionError] | None = None,
+        timeout: float | None = None,
+    ) -> Execution:
+        """
+        Stream the output of the execution from its start and wait for it to finish, reconnecting if the connection drops.
+
+        :param on_stdout: Callback for stdout messages
+        :param on_stderr: Callback for stderr messages
+        :param on_result: Callback for the `Result` object
+        :param on_error: Callback for the `ExecutionError` object
+        :param timeout: Timeout for the code execution in **seconds**
+
+        :return: `Execution` result object
+        """
+        return self._sandbox._stream_execution(
+            {
+                "method": "GET",
+                "url": f"{self._sandbox._jupyter_url}/executions/{self.id}/stream",
+                "params": {"last_seq": 0},
+            },
+            resumable=True,
+            compact=self._info.stream_mode == "compact",
+            timeout=None if timeout == 0 else (timeout or DEFAULT_TIMEOUT),
+            request_timeout=self._sandbox.connection_config.request_timeout,
+            on_stdout=on_stdout,
+            on_stderr=on_stderr,
+            on_result=on_result,
+            on_error=on_error,
+        )
+
+    def result(self) -> Execution:
+        """
+        Get the result of the finished execution. Fails if it's still running, see `wait`.
+
+        :return: `Execution` result object
+        """
+        request_timeout = self._sandbox.connection_config.request_timeout
+        return self._sandbox._stream_execution(
+            {
+                "method": "GET",
+                "url": f"{self._sandbox._jupyter_url}/executions/{self.id}/result",
+            },
+            resumable=False,
+            compact=self._info.stream_mode == "compact",
+            timeout=request_timeout,
+            request_timeout=request_timeout,
+        )
+
+    def wait(
+        self,
+        timeout: float | None = None,
+        poll_interval: float = 1,
+    ) -> Execution:
+        """
+        Wait for the execution to finish, checking its status every `poll_interval` seconds, and get its result.
+        Unlike `attach`, it doesn't keep a connection open while waiting.
+
+        :param timeout: How long to wait in **seconds**, `None` to wait until it's done
+        :param poll_interval: Time between status checks in **seconds**
+
+        :return: `Execution` result object
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self.status().status != "finished":
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutException(
+                    f"Execution {self.id} didn't finish in {timeout} seconds"
+                )
+            time.sleep(poll_interval)
+
+        return self.result()
+
+    def cancel(self) -> ExecutionCancellation:
+        """
+        Cancel the execution. A queued one doesn't start, a running one is interrupted until it stops.
+        If it ignores the interrupts, e.g. by catching `KeyboardInterrupt`, it's abandoned after the server's cancel timeout
+        and its result ends with an `ExecutionCancelled` error.
+
+        :return: Outcome of the cancellation, `cancelled` is `False` if the execution had already finished
+        """
+        return self._sandbox._cancel_execution(self.id)
@@ -1,9 +1,16 @@
+import base64
 import inspect
 import json
 import logging
+from datetime import datetime
 
-from e2b import NotFoundException, TimeoutException, SandboxException
-from dataclasses import dataclass, field
+from e2b import (
+    NotFoundException,
+    RateLimitException,
+    TimeoutException,
+    SandboxException,
+)
+from dataclasses import asdict, dataclass, field
 from typing import (
     List,
     Literal,
@@ -15,17 +22,126 @@ from typing import (
     Awaitable,
     Any,
     Union,
+    TYPE_CHECKING,
 )
 
 from httpx import Response
 
 from .charts import Chart, _deserialize_chart
 
+if TYPE_CHECKING:
+    import pandas
+    import pyarrow
+
+    from .result_cache import ResultCache
+
 RunCodeLanguage = Union[
     Literal["python", "javascript", "typescript", "r", "java", "bash"],
     str,
 ]
 
+StreamMode = Literal["raw", "compact"]
+"""
+How stdout/stderr and display updates are streamed from the execution.
+"""
+
+BackpressurePolicy = Literal["pause", "drop", "spill"]
+"""
+What the server does when the execution's output is produced faster than the client reads it.
+"""
+
+# Formats of a result, in the order `Result.formats()` lists them
+RESULT_FORMATS = (
+    "text",
+    "html",
+    "markdown",
+    "svg",
+    "png",
+    "jpeg",
+    "webp",
+    "pdf",
+    "latex",
+    "json",
+    "javascript",
+    "data",
+    "arrow",
+    "dataframe",
+    "chart",
+    "image_saves",
+)
+
+# Formats the sandbox can store as blobs, by how they're stored: the decoded bytes
+# of the base64 ones, the UTF-8 of the text ones and the JSON of the others
+BASE64_BLOB_FORMATS = ("png", "jpeg", "webp", "pdf", "arrow")
+TEXT_BLOB_FORMATS = ("text", "html", "markdown", "svg", "latex", "javascript")
+JSON_BLOB_FORMATS = ("json", "data", "dataframe", "image_saves")
+
+DataFrameMode = Literal["full", "summary"]
+"""
+Whether displayed DataFrames are sent whole or only their summary.
+"""
+
+ImageFormat = Literal["png", "jpeg", "webp"]
+"""
+Format images are encoded in with `ImagePolicy.format`.
+"""
+
+
+@dataclass
+class ImagePolicy:
+    """
+    How the sandbox sends the images of matplotlib figures, PIL images and other objects displayed as PNG or JPEG.
+    Unset options leave the images as they are.
+    """
+
+    max_size: Optional[int] = None
+    """
+    Largest width or height in pixels, larger images are scaled down keeping their aspect ratio.
+    """
+    dpi: Optional[int] = None
+    """
+    Highest DPI matplotlib figures are rendered with.
+    """
+    format: Optional[ImageFormat] = None
+    """
+    Format to encode the images in, `Result.png`, `Result.jpeg` or `Result.webp`.
+    """
+    quality: Optional[int] = None
+    """
+    Quality of JPEG and WebP images, from 1 to 100.
+    """
+    thumbnail_size: Optional[int] = None
+    """
+    Largest width or height of a thumbnail sent before each image, in a result with `Result.is_thumbnail`.
+    """
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+@dataclass
+class ImageSavePolicy:
+    """
+    How PIL images saved to a path are displayed in a context, see `Sandbox.set_image_save_policy`.
+    """
+
+    enabled: bool = True
+    """
+    Whether saved images are displayed at all.
+    """
+    max_displays: Optional[int] = None
+    """
+    Saved images displayed in each execution, the rest are summarized in a single result with `Result.image_saves` after it. Defaults to 10.
+    """
+    contact_sheet: bool = False
+    """
+    Add a contact sheet of thumbnails of the images that weren't displayed to the summary, as `Result.png`.
+    """
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
 T = TypeVar("T")
 OutputHandler = Union[Callable[[T], Any],]
 
@@ -93,6 +209,180 @@ class ExecutionError:
         return json.dumps(data)
 
 
+@dataclass
+class TruncatedOutput:
+    """
+    Output of the execution over its budget (`max_output_bytes`, `max_results` or `max_result_bytes`).
+    It wasn't sent to the client, but written to files in the sandbox.
+
+    With the `drop` backpressure policy, also the stdout/stderr dropped because the client didn't keep up.
+    """
+
+    output: str
+    """
+    Which output was truncated, `stdout`, `stderr` or `results`.
+    """
+    path: Optional[str]
+    """
+    Path of the file in the sandbox with the rest of the output. For results, the directory with a `result-<n>.json` file per result.
+    `None` if the output was dropped.
+    """
+    total_bytes: int
+    """
+    Size of all of the output, sent and truncated.
+    """
+    truncated_bytes: int
+    """
+    Size of the output that wasn't sent.
+    """
+
+    def __init__(
+        self,
+        output: str,
+        total_bytes: int,
+        truncated_bytes: int,
+        path: Optional[str] = None,
+        **kwargs,
+    ):
+        self.output = output
+        self.path = path
+        self.total_bytes = total_bytes
+        self.truncated_bytes = truncated_bytes
+
+
+@dataclass
+class DataFrameSummary:
+    """
+    Summary of a DataFrame displayed with the `summary` DataFrame mode, sent instead of all of its rows.
+    Fetch the rows with `Sandbox.get_dataframe_rows`.
+    """
+
+    id: str
+    """
+    ID of the DataFrame in the context, the sandbox keeps the latest summarized DataFrames.
+    """
+    shape: List[int]
+    """
+    Number of rows and columns.
+    """
+    columns: List[Dict[str, str]]
+    """
+    Name and dtype of each column.
+    """
+    head: Dict[str, Any]
+    """
+    First rows, with the `columns`, `index` and `data` of the rows. All of them for small DataFrames.
+    """
+    tail: Optional[Dict[str, Any]] = None
+    """
+    Last rows, in the same form as `head`. `None` if all of the rows are in `head`.
+    """
+    stats: Optional[Dict[str, Any]] = None
+    """
+    Summary statistics of the columns, as computed by `DataFrame.describe()`, in the same form as `head`.
+    """
+
+    def __init__(
+        self,
+        id: str,
+        shape: List[int],
+        columns: List[Dict[str, str]],
+        head: Dict[str, Any],
+        tail: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ):
+        self.id = id
+        self.shape = shape
+        self.columns = columns
+        self.head = head
+        self.tail = tail
+        self.stats = stats
+
+
+@dataclass
+class DataFrameRows:
+    """
+    Rows of a DataFrame fetched with `Sandbox.get_dataframe_rows`.
+    """
+
+    columns: List[Any]
+    """
+    Names of the columns.
+    """
+    index: List[Any]
+    """
+    Index labels of the rows.
+    """
+    data: List[List[Any]]
+    """
+    Values of the rows, one list per row.
+    """
+    start: int
+    """
+    Position of the first row.
+    """
+    stop: int
+    """
+    Position after the last row, the sandbox sends a limited number of rows at once.
+    """
+    total_rows: int
+    """
+    Number of rows of the whole DataFrame.
+    """
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]):
+        return cls(
+            columns=data["columns"],
+            index=data["index"],
+            data=data["data"],
+            start=data["start"],
+            stop=data["stop"],
+            total_rows=data["total_rows"],
+        )
+
+
+@dataclass
+class ImageSaves:
+    """
+    Images saved in an execution that weren't displayed, see `ImageSavePolicy`.
+    """
+
+    count: int
+    """
+    Number of images saved in the execution.
+    """
+    displayed: int
+    """
+    Number of them that were displayed.
+    """
+    paths: List[str]
+    """
+    Paths of the images that weren't displayed, at most the first 1000 of them.
+    """
+
+
+@dataclass
+class BlobReference:
+    """
+    A result format the sandbox stored as a blob instead of sending it, see `blob_threshold_bytes` of `run_code`.
+    """
+
+    hash: str
+    """
+    SHA-256 of the stored content, the blob's ID.
+    """
+    size: int
+    """
+    Size of the stored content in bytes.
+    """
+    mime_type: str
+    """
+    MIME type of the format.
+    """
+
+
 class MIMEType(str):
     """
     Represents a MIME type.
@@ -119,16 +409,31 @@ class Result:
     svg: Optional[str] = None
     png: Optional[str] = None
     jpeg: Optional[str] = None
+    webp: Optional[str] = None
     pdf: Optional[str] = None
     latex: Optional[str] = None
     json: Optional[dict] = None
     javascript: Optional[str] = None
     data: Optional[dict] = None
+    arrow: Optional[str] = None
+    """DataFrame as a base64 Arrow IPC stream, see `to_arrow` and `to_pandas`."""
+    dataframe: Optional[DataFrameSummary] = None
+    """Summary of a DataFrame with the `summary` DataFrame mode, instead of `data`, `arrow` and `html`."""
     chart: Optional[Chart] = None
+    image_saves: Optional[ImageSaves] = None
+    """Summary of the images saved in the execution that weren't displayed, with their contact sheet in `png` if enabled."""
     is_main_result: bool = False
     """Whether this data is the result of the cell. Data can be produced by display calls of which can be multiple in a cell."""
+    is_thumbnail: bool = False
+    """Whether this is a thumbnail of the image in the next result, sent first with `ImagePolicy.thumbnail_size`."""
     extra: Optional[dict] = None
     """Extra data that can be included. Not part of the standard types."""
+    display_id: Optional[str] = None
+    """ID of the display the data belongs to. With the `compact` stream mode, updates of the display replace the earlier result with the same ID."""
+    blobs: Optional[Dict[str, BlobReference]] = None
+    """Formats the sandbox stored as blobs instead of sending them, by format name. `Sandbox` fetches them the first time they're read, with `AsyncSandbox` call `load_blobs` first."""
+    hashes: Optional[Dict[str, str]] = None
+    """SHA-256 of the formats, by format name, with `dedupe`. Results later sending the same content reference it in `blobs`."""
 
     def __init__(
         self,
@@ -138,14 +443,22 @@ class Result:
         svg: Optional[str] = None,
         png: Optional[str] = None,
         jpeg: Optional[str] = None,
+        webp: Optional[str] = None,
         pdf: Optional[str] = None,
         latex: Optional[str] = None,
         json: Optional[dict] = None,
         javascript: Optional[str] = None,
         data: Optional[dict] = None,
+        arrow: Optional[str] = None,
+        dataframe: Optional[dict] = None,
         chart: Optional[dict] = None,
+        image_saves: Optional[dict] = None,
         is_main_result: bool = False,
+        is_thumbnail: bool = False,
         extra: Optional[dict] = None,
+        display_id: Optional[str] = None,
+        blobs: Optional[Dict[str, dict]] = None,
+        hashes: Optional[Dict[str, str]] = None,
         **kwargs,  # Allows for future expansion
     ):
         self.text = text
@@ -154,11 +467,15 @@ class Result:
         self.svg = svg
         self.png = png
         self.jpeg = jpeg
+        self.webp = webp
         self.pdf = pdf
         self.latex = latex
         self.json = json
         self.javascript = javascript
         self.data = data
+        self.arrow = arrow
+        self.dataframe = DataFrameSummary(**dataframe) if dataframe else None
+        self.image_saves = ImageSaves(**image_saves) if image_saves else None
         if chart:
             try:
                 self.chart = _deserialize_chart(chart)
@@ -167,7 +484,17 @@ class Result:
                     f"Error deserializing chart, check if you are using the latest version of the library: {e}"
                 )
         self.is_main_result = is_main_result
+        self.is_thumbnail = is_thumbnail or False
         self.extra = extra
+        self.display_id = display_id
+        self.blobs = (
+            {key: BlobReference(**blob) for key, blob in blobs.items()}
+            if blobs
+            else None
+        )
+        self.hashes = hashes
+        # Fetches a blob's content, set by `Sandbox` for the lazy formats
+        self._load_blob: Optional[Callable[[BlobReference], bytes]] = None
 
     def formats(self) -> Iterable[str]:
         """
@@ -176,30 +503,10 @@ class Result:
         :return: All available formats of the result in MIME types.
         """
         formats = []
-        if self.text:
-            formats.append("text")
-        if self.html:
-            formats.append("html")
-        if self.markdown:
-            formats.append("markdown")
-        if self.svg:
-            formats.append("svg")
-        if self.png:
-            formats.append("png")
-        if self.jpeg:
-            formats.append("jpeg")
-        if self.pdf:
-            formats.append("pdf")
-        if self.latex:
-            formats.append("latex")
-        if self.json:
-            formats.append("json")
-        if self.javascript:
-            formats.append("javascript")
-        if self.data:
-            formats.append("data")
-        if self.chart:
-            formats.append("chart")
+        for key in RESULT_FORMATS:
+            # Without fetching the formats stored as blobs
+            if self.__dict__.get(key) or (self.blobs and key in self.blobs):
+                formats.append(key)
 
         if self.extra:
             for key in self.extra:
@@ -221,6 +528,58 @@ class Result:
         else:
             return "Result(Formats: " + ", ".join(self.formats()) + ")"
 
+    def _set_blob(self, key: str, data: bytes):
+        """Set the format stored as a blob from its content."""
+        if key in BASE64_BLOB_FORMATS:
+            value = base64.b64encode(data).decode("ascii")
+        elif key in TEXT_BLOB_FORMATS:
+            value = data.decode()
+        else:
+            value = json.loads(data)
+            if key == "dataframe":
+                value = DataFrameSummary(**value)
+            elif key == "image_saves":
+                value = ImageSaves(**value)
+
+        setattr(self, key, value)
+
+    def to_arrow(self) -> Optional["pyarrow.Table"]:
+        """
+        Returns the DataFrame of the result as an Arrow table, without parsing it from JSON like `data`.
+        The table's columns point into the decoded result instead of being copied.
+
+        Requires the optional `pyarrow` package, install it with `pip install e2b-code-interpreter[arrow]`.
+
+        :return: Arrow table of the DataFrame, `None` if the result isn't a DataFrame.
+        """
+        if not self.arrow:
+            return None
+
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(
+                "Reading Arrow results needs the optional `pyarrow` package, "
+                "install it with `pip install e2b-code-interpreter[arrow]`"
+            )
+
+        buffer = pyarrow.py_buffer(base64.b64decode(self.arrow))
+        with pyarrow.ipc.open_stream(buffer) as reader:
+            return reader.read_all()
+
+    def to_pandas(self) -> Optional["pandas.DataFrame"]:
+        """
+        Returns the DataFrame of the result with its column types and index, see `to_arrow`.
+        Requires `pandas` in addition to `pyarrow`.
+
+        :return: The DataFrame, `None` if the result isn't a DataFrame.
+        """
+        table = self.to_arrow()
+        if table is None:
+            return None
+
+        return table.to_pandas()
+
     def _repr_html_(self) -> Optional[str]:
         """
         Returns the HTML representation of the data.
@@ -294,6 +653,33 @@ class Result:
         return self.javascript
 
 
+class _BlobFormat:
+    """
+    A format of `Result` that the sandbox might have stored as a blob, fetched the first time it's read.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __get__(self, result: Optional[Result], owner=None):
+        if result is None:
+            return None
+
+        value = result.__dict__.get(self.key)
+        blob = result.blobs.get(self.key) if result.blobs else None
+        if value is None and blob is not None and result._load_blob is not None:
+            result._set_blob(self.key, result._load_blob(blob))
+            value = result.__dict__[self.key]
+        return value
+
+    def __set__(self, result: Result, value):
+        result.__dict__[self.key] = value
+
+
+for _key in (*BASE64_BLOB_FORMATS, *TEXT_BLOB_FORMATS, *JSON_BLOB_FORMATS):
+    setattr(Result, _key, _BlobFormat(_key))
+
+
 @dataclass(repr=False)
 class Logs:
     """
@@ -330,6 +716,8 @@ def serialize_results(results: List[Result]) -> List[Dict[str, str]]:
         for key in result.formats():
             if key == "chart":
                 serialized_dict[key] = result.chart.to_dict()
+            elif key == "dataframe":
+                serialized_dict[key] = asdict(result.dataframe)
             else:
                 serialized_dict[key] = result[key]
 
@@ -353,6 +741,8 @@ class Execution:
     """Error object if an error occurred, None otherwise."""
     execution_count: Optional[int] = None
     """Execution count of the cell."""
+    truncated: List[TruncatedOutput] = field(default_factory=list)
+    """Output over the execution's budget, which is only in files in the sandbox."""
 
     def __init__(
         self,
@@ -360,16 +750,49 @@ class Execution:
         logs: Logs = None,
         error: Optional[ExecutionError] = None,
         execution_count: Optional[int] = None,
+        truncated: Optional[List[TruncatedOutput]] = None,
         **kwargs,
     ):
         self.results = results or []
         self.logs = logs or Logs()
         self.error = error
         self.execution_count = execution_count
+        self.truncated = truncated or []
+        # Where a resumable execution's stream is at, to attach to it again
+        self._execution_id: Optional[str] = None
+        self._last_seq = 0
+        self._finished = False
+        # Fetches the formats of the results stored as blobs
+        self._load_blob: Optional[Callable[[BlobReference], bytes]] = None
+        # Fills in the formats sent only as references with `dedupe`
+        self._result_cache: Optional[ResultCache] = None
+        # Run in the `compact` stream mode, where display updates replace the display
+        self._compact = False
 
     def __repr__(self):
         return f"Execution(Results: {self.results}, Logs: {self.logs}, Error: {self.error})"
 
+    def _add_result(self, result: Result):
+        result._load_blob = self._load_blob
+        if self._result_cache is not None:
+            self._result_cache.resolve(result)
+        if self._compact and result.display_id is not None:
+            replaced = False
+            for i, existing in enumerate(self.results):
+                if existing.display_id == result.display_id:
+                    self.results[i] = result
+                    replaced = True
+            if replaced:
+                return
+
+        self.results.append(result)
+
+    def _clear_output(self):
+        # Same as in a notebook, the cell's earlier outputs are gone
+        self.results.clear()
+        self.logs.stdout.clear()
+        self.logs.stderr.clear()
+
     @property
     def text(self) -> Optional[str]:
         """
@@ -415,6 +838,9 @@ def format_exception(res: Response):
 
     if res.status_code == 404:
         return NotFoundException(res.text)
+    elif res.status_code == 429:
+        # Too many executions are already waiting for the context
+        return RateLimitException(res.text)
     elif res.status_code == 502:
         return TimeoutException(
             f"{res.text}: This error is likely due to sandbox timeout. You can modify the sandbox timeout by passing 'timeout' when starting the sandbox or calling '.set_timeout' on the sandbox with the desired timeout."
@@ -425,7 +851,7 @@ def format_exception(res: Response):
 
 def parse_output(
     execution: Execution,
-    output: str,
+    output: Union[str, Dict[str, Any]],
     on_stdout: Optional[OutputHandler[OutputMessage]] = None,
     on_stderr: Optional[OutputHandler[OutputMessage]] = None,
     on_result: Optional[OutputHandler[Result]] = None,
@@ -434,9 +860,38 @@ def parse_output(
     _parse_output(execution, output, on_stdout, on_stderr, on_result, on_error)
 
 
+def parse_batch_output(executions: List[Execution], output: Union[str, Dict[str, Any]]):
+    """
+    Parses an output of `run_code_batch` into the `Execution` of the cell it belongs to.
+    """
+    _parse_tagged_output(executions, "cell", output)
+
+
+def parse_fanout_output(
+    executions: Dict[str, Execution], output: Union[str, Dict[str, Any]]
+):
+    """
+    Parses an output of `run_code_fanout` into the `Execution` of the context it belongs to.
+    """
+    _parse_tagged_output(executions, "context_id", output)
+
+
+def _parse_tagged_output(
+    executions: Union[List[Execution], Dict[str, Execution]],
+    tag: str,
+    output: Union[str, Dict[str, Any]],
+):
+    data = json.loads(output) if isinstance(output, str) else output
+    key = data.pop(tag, None)
+    # The queue position, keepalives and the end of the whole stream
+    if key is None:
+        return
+    parse_output(executions[key], data)
+
+
 async def async_parse_output(
     execution: Execution,
-    output: str,
+    output: Union[str, Dict[str, Any]],
     on_stdout: Optional[OutputHandlerWithAsync[OutputMessage]] = None,
     on_stderr: Optional[OutputHandlerWithAsync[OutputMessage]] = None,
     on_result: Optional[OutputHandlerWithAsync[Result]] = None,
@@ -451,18 +906,26 @@ async def async_parse_output(
 
 def _parse_output(
     execution: Execution,
-    output: str,
+    output: Union[str, Dict[str, Any]],
     on_stdout: Optional[OutputHandler[OutputMessage]] = None,
     on_stderr: Optional[OutputHandler[OutputMessage]] = None,
     on_result: Optional[OutputHandler[Result]] = None,
     on_error: Optional[OutputHandler[ExecutionError]] = None,
 ) -> Union[None, Awaitable[Any]]:
-    data = json.loads(output)
+    # NDJSON lines, or records already decoded from the binary stream format
+    data = json.loads(output) if isinstance(output, str) else output
     data_type = data.pop("type")
 
+    seq = data.pop("seq", None)
+    if seq is not None:
+        # Already received before the stream was resumed
+        if seq <= execution._last_seq:
+            return None
+        execution._last_seq = seq
+
     if data_type == "result":
         result = Result(**data)
-        execution.results.append(result)
+        execution._add_result(result)
         if on_result:
             return on_result(result)
     elif data_type == "stdout":
@@ -479,6 +942,14 @@ def _parse_output(
             return on_error(execution.error)
     elif data_type == "number_of_executions":
         execution.execution_count = data["execution_count"]
+    elif data_type == "clear_output":
+        execution._clear_output()
+    elif data_type == "output_truncated":
+        execution.truncated.append(TruncatedOutput(**data))
+    elif data_type == "execution_started":
+        execution._execution_id = data["execution_id"]
+    elif data_type == "end_of_execution":
+        execution._finished = True
 
     return None
 
@@ -514,3 +985,99 @@ class Context:
             language=data.get("language"),
             cwd=data.get("cwd"),
         )
+
+
+ExecutionStatus = Literal["queued", "running", "finished"]
+"""
+Status of an execution submitted with `submit_code`. It's `queued` until its context starts running the code.
+"""
+
+
+@dataclass
+class ExecutionInfo:
+    """
+    Represents an execution submitted with `submit_code`, running in the sandbox in the background.
+    """
+
+    id: str
+    """
+    The ID of the execution.
+    """
+    context_id: str
+    """
+    The ID of the context the code runs in.
+    """
+    status: ExecutionStatus
+    """
+    Whether the execution is queued, running or finished.
+    """
+    started_at: datetime
+    """
+    When the execution was submitted.
+    """
+    finished_at: Optional[datetime] = None
+    """
+    When the execution finished.
+    """
+    stream_mode: StreamMode = "raw"
+    """
+    The stream mode the execution was submitted with.
+    """
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]):
+        return cls(
+            id=data["id"],
+            context_id=data["context_id"],
+            status=data["status"],
+            started_at=_parse_datetime(data["started_at"]),
+            finished_at=(
+                _parse_datetime(data["finished_at"])
+                if data.get("finished_at")
+                else None
+            ),
+            stream_mode=data.get("stream_mode", "raw"),
+        )
+
+
+@dataclass
+class ExecutionCancellation:
+    """
+    Outcome of cancelling an execution submitted with `submit_code`.
+    """
+
+    id: str
+    """
+    The ID of the execution.
+    """
+    cancelled: bool
+    """
+    Whether the execution was still queued or running, `False` if it had already finished.
+    """
+    interrupts: int
+    """
+    How many times the kernel was interrupted before the execution stopped.
+    """
+    forced: bool
+    """
+    Whether the execution ignored the interrupts and was abandoned, the kernel might still be busy with it.
+    """
+    latency_ms: float
+    """
+    How long the cancellation took in milliseconds.
+    """
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]):
+        return cls(
+            id=data["id"],
+            cancelled=data["cancelled"],
+            interrupts=data["interrupts"],
+            forced=data["forced"],
+            latency_ms=data["latency_ms"],
+        )
+
+
+def _parse_datetime(value: str) -> datetime:
+    # `fromisoformat` only understands the `Z` suffix since Python 3.11
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
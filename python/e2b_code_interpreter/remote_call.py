@@ -0,0 +1,115 @@
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from typing import Any
+
+from e2b import InvalidArgumentException, SandboxException
+
+from e2b_code_interpreter.models import Execution
+
+try:
+    import cloudpickle
+except ImportError:  # pragma: no cover - optional dependency
+    cloudpickle = None
+
+# Arguments of a single call of the function, positional and keyword
+Call = tuple[tuple, dict]
+
+# Runs the calls in the sandbox: loads the function and its calls from `<path>.in`,
+# and writes the results, or the exception that stopped them, to `<path>.out`.
+# Everything is kept local to the function so the context's namespace stays clean.
+CALL_CODE = """
+def _e2b_call(path):
+    import os
+    import traceback
+
+    import cloudpickle
+
+    try:
+        with open(path + ".in", "rb") as f:
+            fn, calls = cloudpickle.load(f)
+    finally:
+        os.remove(path + ".in")
+
+    try:
+        outcome = ([fn(*args, **kwargs) for args, kwargs in calls], None, None)
+    except Exception as e:
+        outcome = (None, e, traceback.format_exc())
+
+    try:
+        data = cloudpickle.dumps(outcome)
+    except Exception:
+        # The exception can't be pickled, send just its traceback
+        data = cloudpickle.dumps((None, None, outcome[2] or traceback.format_exc()))
+
+    with open(path + ".out", "wb") as f:
+        f.write(data)
+
+
+try:
+    _e2b_call({path!r})
+finally:
+    del _e2b_call
+"""
+
+
+class RemoteTraceback(Exception):
+    """
+    Traceback of an exception raised in the sandbox, set as the `__cause__` of the
+    exception `call` and `map` re-raise.
+    """
+
+    def __init__(self, traceback: str):
+        self.traceback = traceback
+
+    def __str__(self):
+        return self.traceback
+
+
+def call_path() -> str:
+    """Path prefix of the files a remote call exchanges in the sandbox."""
+    return f"/tmp/e2b-call-{uuid.uuid4()}"
+
+
+def dump_calls(fn: Callable, calls: list[Call]) -> bytes:
+    if cloudpickle is None:
+        raise ImportError(
+            "Calling functions in the sandbox needs the optional `cloudpickle` package, "
+            "install it with `pip install e2b-code-interpreter[cloudpickle]`"
+        )
+
+    return cloudpickle.dumps((fn, calls))
+
+
+def call_code(path: str) -> str:
+    return CALL_CODE.format(path=path)
+
+
+def load_results(execution: Execution, data: bytes | None) -> list[Any]:
+    """
+    Results of the calls, raises the exception of the first failed one with the
+    traceback from the sandbox as its cause.
+    """
+    if execution.error:
+        raise SandboxException(
+            f"Failed to call the function in the sandbox: {execution.error.name}: {execution.error.value}"
+        )
+
+    results, error, traceback = cloudpickle.loads(data)
+    if error is not None:
+        raise error from RemoteTraceback(traceback)
+    if traceback is not None:
+        raise SandboxException(
+            f"The function raised an exception that can't be sent back:\n{traceback}"
+        )
+
+    return results
+
+
+def chunked(iterable: Iterable, chunksize: int) -> Iterator[list]:
+    if chunksize < 1:
+        raise InvalidArgumentException("chunksize must be at least 1")
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunksize)):
+        yield chunk
@@ -0,0 +1,37 @@
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from e2b_code_interpreter.models import Result
+
+
+class ResultCache:
+    """
+    Result formats received with `dedupe`, by the SHA-256 the sandbox sent in `Result.hashes`,
+    so formats it sends again only as references in `Result.blobs` are filled in without fetching them.
+    Keeps the latest `max_entries` formats, the sandbox still has the others as blobs.
+    """
+
+    def __init__(self, max_entries: int):
+        # Identifies the cache to the sandbox, which sends it each format once
+        self.session_id = str(uuid.uuid4())
+        self._max_entries = max_entries
+        self._values: OrderedDict[str, Any] = OrderedDict()
+
+    def resolve(self, result: Result):
+        """Cache the result's new formats and fill in the ones it references from the cache."""
+        for key, blob_hash in (result.hashes or {}).items():
+            value = result.__dict__.get(key)
+            if value is not None:
+                self._put(blob_hash, value)
+
+        for key, blob in (result.blobs or {}).items():
+            if result.__dict__.get(key) is None and blob.hash in self._values:
+                self._values.move_to_end(blob.hash)
+                setattr(result, key, self._values[blob.hash])
+
+    def _put(self, blob_hash: str, value: Any):
+        self._values[blob_hash] = value
+        self._values.move_to_end(blob_hash)
+        while len(self._values) > self._max_entries:
+            self._values.popitem(last=False)
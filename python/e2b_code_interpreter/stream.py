@@ -0,0 +1,85 @@
+import base64
+from collections.abc import AsyncIterator, Iterator
+
+from httpx import Response
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MSGPACK_MEDIA_TYPE = "application/vnd.e2b.execution+msgpack"
+
+# Result formats the binary stream format sends as raw bytes
+BINARY_RESULT_FORMATS = ("png", "jpeg", "webp", "pdf", "arrow")
+
+RECORD_LENGTH_SIZE = 4
+
+
+def accept_header() -> str:
+    """
+    Stream formats to ask the server for. The binary format is only requested when
+    the optional `msgpack` package is installed.
+    """
+    if msgpack is None:
+        return NDJSON_MEDIA_TYPE
+
+    return f"{MSGPACK_MEDIA_TYPE}, {NDJSON_MEDIA_TYPE}"
+
+
+def is_msgpack_stream(response: Response) -> bool:
+    return response.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE)
+
+
+class RecordDecoder:
+    """
+    Incrementally decodes length-prefixed msgpack records from the chunks of a
+    streamed response. Records can be split across chunks arbitrarily.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        self._buffer += chunk
+
+        records = []
+        offset = 0
+        while len(self._buffer) - offset >= RECORD_LENGTH_SIZE:
+            start = offset + RECORD_LENGTH_SIZE
+            end = start + int.from_bytes(self._buffer[offset:start], "big")
+            if len(self._buffer) < end:
+                break
+
+            records.append(_decode_record(self._buffer[start:end]))
+            offset = end
+
+        del self._buffer[:offset]
+        return records
+
+
+def _decode_record(body: bytes) -> dict:
+    data = msgpack.unpackb(body, raw=False)
+
+    # The rest of the SDK works with base64 data, same as in the JSON format
+    if data.get("type") == "result":
+        for key in BINARY_RESULT_FORMATS:
+            value: bytes | None = data.get(key)
+            if isinstance(value, bytes):
+                data[key] = base64.b64encode(value).decode("ascii")
+
+    return data
+
+
+def iter_records(response: Response) -> Iterator[dict]:
+    decoder = RecordDecoder()
+    for chunk in response.iter_bytes():
+        yield from decoder.feed(chunk)
+
+
+async def aiter_records(response: Response) -> AsyncIterator[dict]:
+    decoder = RecordDecoder()
+    async for chunk in response.aiter_bytes():
+        for record in decoder.feed(chunk):
+            yield record
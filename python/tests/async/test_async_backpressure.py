@@ -0,0 +1,38 @@
+import asyncio
+
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+CODE = "for i in range(5000): print(i, flush=True)"
+EXPECTED = "".join(f"{i}\n" for i in range(5000))
+
+
+async def _slow_reader(stdout):
+    await asyncio.sleep(0.001)
+
+
+async def test_spill_keeps_all_output(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        CODE, backpressure="spill", on_stdout=_slow_reader
+    )
+
+    assert "".join(execution.logs.stdout) == EXPECTED
+    assert execution.truncated == []
+
+
+async def test_pause_keeps_all_output(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        CODE, backpressure="pause", on_stdout=_slow_reader
+    )
+
+    assert "".join(execution.logs.stdout) == EXPECTED
+
+
+async def test_drop_reports_dropped_output(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        CODE, backpressure="drop", on_stdout=_slow_reader
+    )
+
+    received = len("".join(execution.logs.stdout))
+    dropped = sum(t.truncated_bytes for t in execution.truncated)
+    assert received + dropped == len(EXPECTED)
+    assert all(t.path is None for t in execution.truncated)
@@ -0,0 +1,38 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+CODE = """
+from IPython.display import HTML, display
+display(HTML("<p>" + "x" * 10000 + "</p>"))
+1 + 1
+"""
+
+
+async def test_blob_threshold(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(CODE, blob_threshold_bytes=1000)
+
+    display, main = execution.results
+    assert display.blobs["html"].size == 10007
+    assert display.blobs["html"].mime_type == "text/html"
+    assert "html" in display.formats()
+    assert display.html is None
+
+    await async_sandbox.load_blobs(execution)
+    assert display.html == "<p>" + "x" * 10000 + "</p>"
+
+    assert main.blobs is None
+    assert main.text == "2"
+
+
+async def test_get_blob_range(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(CODE, blob_threshold_bytes=1000)
+    blob = execution.results[0].blobs["html"]
+
+    assert await async_sandbox.get_blob(blob, start=0, end=4) == b"<p>x"
+    assert await async_sandbox.get_blob(blob.hash, start=10003) == b"</p>"
+
+
+async def test_without_blob_threshold(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(CODE)
+
+    assert execution.results[0].blobs is None
+    assert len(execution.results[0].html) == 10007
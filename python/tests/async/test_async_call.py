@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+from e2b import TimeoutException
+
+from e2b_code_interpreter import RemoteTraceback
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+
+async def test_call(async_sandbox: AsyncSandbox):
+    result = await async_sandbox.call(
+        lambda a, b=0: {"sum": a + b, "args": (a, b)}, 1, b=2.5
+    )
+
+    assert result == {"sum": 3.5, "args": (1, 2.5)}
+
+
+async def test_call_binary_argument(async_sandbox: AsyncSandbox):
+    data = bytes(range(256)) * 4096
+
+    assert await async_sandbox.call(lambda d: d[::-1], data) == data[::-1]
+
+
+async def test_call_raises(async_sandbox: AsyncSandbox):
+    def fail(key):
+        return {}[key]
+
+    with pytest.raises(KeyError) as exc_info:
+        await async_sandbox.call(fail, "missing")
+
+    assert isinstance(exc_info.value.__cause__, RemoteTraceback)
+    assert "fail" in str(exc_info.value.__cause__)
+
+
+async def test_map(async_sandbox: AsyncSandbox):
+    results = await async_sandbox.map(lambda x: x * x, range(10), chunksize=3)
+
+    assert results == [x * x for x in range(10)]
+
+
+async def test_map_in_context(async_sandbox: AsyncSandbox):
+    context = await async_sandbox.create_code_context()
+
+    assert await async_sandbox.map(str, [1, 2], context=context) == ["1", "2"]
+
+
+async def test_call_in_context(async_sandbox: AsyncSandbox):
+    context = await async_sandbox.create_code_context(cwd="/tmp")
+
+    assert await async_sandbox.call(os.getcwd, context=context) == "/tmp"
+
+
+async def test_call_timeout(async_sandbox: AsyncSandbox):
+    with pytest.raises(TimeoutException):
+        await async_sandbox.call(time.sleep, 300, timeout=3)
+
+    # The helper is removed from the namespace even though the call didn't finish
+    execution = await async_sandbox.run_code("'_e2b_call' in globals()")
+    assert execution.text == "False"
@@ -1,3 +1,5 @@
+import pytest
+
 from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
 
 
@@ -15,3 +17,27 @@ async def test_data(async_sandbox: AsyncSandbox):
     assert data.data
     assert "a" in data.data
     assert len(data.data["a"]) == 3
+
+
+async def test_data_arrow(async_sandbox: AsyncSandbox):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pandas")
+
+    result = await async_sandbox.run_code(
+        """
+        import pandas as pd
+        pd.DataFrame(
+            {"a": [1, 2, 3], "t": pd.date_range("2024-01-01", periods=3)},
+            index=["x", "y", "z"],
+        )
+        """
+    )
+
+    data = result.results[0]
+    assert "arrow" in data.formats()
+
+    df = data.to_pandas()
+    assert list(df.index) == ["x", "y", "z"]
+    assert df["a"].tolist() == [1, 2, 3]
+    assert df["t"].dt.day.tolist() == [1, 2, 3]
+    assert data.to_arrow().num_rows == 3
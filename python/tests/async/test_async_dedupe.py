@@ -0,0 +1,37 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+CODE = """
+from IPython.display import HTML, display
+display(HTML("<p>" + "x" * 10000 + "</p>"))
+"""
+
+
+async def test_dedupe(async_sandbox: AsyncSandbox):
+    first = (await async_sandbox.run_code(CODE, dedupe=True)).results[0]
+    assert first.blobs is None
+    assert "html" in first.hashes
+
+    second = (await async_sandbox.run_code(CODE, dedupe=True)).results[0]
+    assert second.blobs["html"].hash == first.hashes["html"]
+    assert second.html is first.html
+
+
+async def test_dedupe_cache_miss(async_sandbox: AsyncSandbox):
+    first = (await async_sandbox.run_code(CODE, dedupe=True)).results[0]
+    async_sandbox._result_cache._values.clear()
+
+    second = (await async_sandbox.run_code(CODE, dedupe=True)).results[0]
+    assert second.blobs["html"].hash == first.hashes["html"]
+    assert second.html is None
+
+    await async_sandbox.load_blobs(second)
+    assert second.html == first.html
+
+
+async def test_without_dedupe(async_sandbox: AsyncSandbox):
+    await async_sandbox.run_code(CODE, dedupe=True)
+
+    execution = await async_sandbox.run_code(CODE)
+    assert execution.results[0].blobs is None
+    assert execution.results[0].hashes is None
+    assert len(execution.results[0].html) == 10007
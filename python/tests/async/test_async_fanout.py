@@ -0,0 +1,26 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+
+async def test_run_code_fanout(async_sandbox: AsyncSandbox):
+    contexts = [await async_sandbox.create_code_context() for _ in range(3)]
+    for i, context in enumerate(contexts):
+        await async_sandbox.run_code(f"n = {i}", context=context)
+
+    executions = await async_sandbox.run_code_fanout("n * 10", contexts)
+
+    assert list(executions) == [context.id for context in contexts]
+    assert [e.text for e in executions.values()] == ["0", "10", "20"]
+
+
+async def test_run_code_fanout_isolates_errors(async_sandbox: AsyncSandbox):
+    contexts = [await async_sandbox.create_code_context() for _ in range(2)]
+    await async_sandbox.run_code("n = 0", context=contexts[0])
+    await async_sandbox.run_code("n = 2", context=contexts[1])
+
+    executions = await async_sandbox.run_code_fanout(
+        "1 / n", [contexts[0], contexts[1].id, "missing"], max_concurrency=1
+    )
+
+    assert executions[contexts[0].id].error.name == "ZeroDivisionError"
+    assert executions[contexts[1].id].text == "0.5"
+    assert executions["missing"].error.name == "ContextNotFound"
@@ -0,0 +1,50 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+CODE = """
+class Displayed:
+    calls = []
+
+    def _repr_html_(self):
+        Displayed.calls.append("html")
+        return "<b>displayed</b>"
+
+    def __repr__(self):
+        return "displayed"
+"""
+
+
+async def test_formats(async_sandbox: AsyncSandbox):
+    await async_sandbox.run_code(CODE)
+
+    execution = await async_sandbox.run_code("Displayed()", formats=["text"])
+
+    assert execution.results[0].formats() == ["text"]
+    # The HTML wasn't even computed
+    assert (await async_sandbox.run_code("Displayed.calls")).text == "[]"
+
+
+async def test_formats_by_mime_type(async_sandbox: AsyncSandbox):
+    await async_sandbox.run_code(CODE)
+
+    execution = await async_sandbox.run_code("Displayed()", formats=["text/html"])
+
+    assert execution.results[0].formats() == ["html"]
+    assert execution.results[0].text is None
+
+
+async def test_formats_reset_after_execution(async_sandbox: AsyncSandbox):
+    await async_sandbox.run_code(CODE)
+    await async_sandbox.run_code("Displayed()", formats=["html"])
+
+    execution = await async_sandbox.run_code("Displayed()")
+
+    assert execution.results[0].formats() == ["text", "html"]
+
+
+async def test_formats_with_cell_magic(async_sandbox: AsyncSandbox):
+    # The formats are set apart from the code, so it can still start with a
+    # cell magic
+    execution = await async_sandbox.run_code("%%time\n1 + 1", formats=["text"])
+
+    assert execution.error is None
+    assert execution.text == "2"
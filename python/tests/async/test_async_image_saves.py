@@ -0,0 +1,45 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+from e2b_code_interpreter.models import ImageSavePolicy
+
+CODE = """
+from PIL import Image
+for i in range(5):
+    Image.new("RGB", (64, 64), "red").save(f"/tmp/image-{i}.png")
+"""
+
+
+async def test_image_saves(async_sandbox: AsyncSandbox):
+    await async_sandbox.set_image_save_policy(ImageSavePolicy(max_displays=2))
+
+    execution = await async_sandbox.run_code(CODE)
+
+    *images, summary = execution.results
+    assert len(images) == 2
+    assert all(image.png for image in images)
+    assert summary.image_saves.count == 5
+    assert summary.image_saves.displayed == 2
+    assert summary.image_saves.paths == [f"/tmp/image-{i}.png" for i in range(2, 5)]
+    assert summary.png is None
+
+
+async def test_image_saves_contact_sheet(async_sandbox: AsyncSandbox):
+    await async_sandbox.set_image_save_policy(
+        ImageSavePolicy(max_displays=0, contact_sheet=True)
+    )
+
+    execution = await async_sandbox.run_code(CODE)
+
+    assert len(execution.results) == 1
+    assert execution.results[0].image_saves.count == 5
+    assert execution.results[0].png
+
+
+async def test_image_saves_disabled(async_sandbox: AsyncSandbox):
+    context = await async_sandbox.create_code_context()
+    await async_sandbox.set_image_save_policy(
+        ImageSavePolicy(enabled=False), context=context
+    )
+
+    assert (await async_sandbox.run_code(CODE, context=context)).results == []
+    # Only in that context
+    assert len((await async_sandbox.run_code(CODE)).results) == 5
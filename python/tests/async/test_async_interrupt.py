@@ -1,25 +1,50 @@
 import asyncio
 
 import pytest
-
 from e2b import TimeoutException
+
 from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
 
 
-async def test_subsequent_execution_works_after_client_timeout(
-    async_sandbox: AsyncSandbox,
-):
-    # Start a long-running execution with a short timeout.
-    # This simulates a client disconnect: the SDK closes the connection,
-    # which should trigger the server to interrupt the kernel (#213).
+async def test_execution_timeout_keeps_partial_output(async_sandbox: AsyncSandbox):
+    # The sandbox interrupts the kernel at the timeout and still sends the
+    # output produced until then, before the timeout is raised.
+    stdout = []
+    with pytest.raises(TimeoutException) as exc_info:
+        await async_sandbox.run_code(
+            "import time; print('started', flush=True); time.sleep(300)",
+            timeout=3,
+            on_stdout=lambda msg: stdout.append(msg.line),
+        )
+
+    assert stdout == ["started\n"]
+    # The partial execution is attached to the exception
+    assert exc_info.value.execution.logs.stdout == ["started\n"]
+
+
+async def test_subsequent_execution_works_after_timeout(async_sandbox: AsyncSandbox):
     with pytest.raises(TimeoutException):
         await async_sandbox.run_code("import time; time.sleep(300)", timeout=3)
 
+    # The kernel was interrupted at the timeout, so this doesn't block behind
+    # the still-running sleep.
+    result = await async_sandbox.run_code("1 + 1", timeout=10)
+    assert result.text == "2"
+
+
+async def test_subsequent_execution_works_after_client_disconnect(
+    async_sandbox: AsyncSandbox,
+):
+    # Start a long-running execution and cancel the request while it runs,
+    # which should trigger the server to interrupt the kernel (#213).
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(
+            async_sandbox.run_code("import time; time.sleep(300)"), timeout=3
+        )
     # Wait for the server to detect the disconnect (via keepalive write
     # failure) and interrupt the kernel.
     await asyncio.sleep(5)
-
     # Run a simple execution. Without the kernel interrupt fix, this would
-    # block behind the still-running sleep(30) and time out.
+    # block behind the still-running sleep(300) and time out.
     result = await async_sandbox.run_code("1 + 1", timeout=10)
     assert result.text == "2"
@@ -0,0 +1,40 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+
+async def test_stdout_over_budget(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        "for i in range(1000): print('x' * 99)", max_output_bytes=1000
+    )
+
+    assert len("".join(execution.logs.stdout)) == 1000
+    assert len(execution.truncated) == 1
+
+    truncated = execution.truncated[0]
+    assert truncated.output == "stdout"
+    assert truncated.total_bytes == 100_000
+    assert truncated.truncated_bytes == 99_000
+
+    content = await async_sandbox.files.read(truncated.path)
+    assert len(content) == 99_000
+
+
+async def test_results_over_budget(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        """
+        from IPython.display import display, HTML
+
+        for i in range(5):
+            display(HTML(f"<b>{i}</b>"))
+        """,
+        max_results=2,
+    )
+
+    assert [result.html for result in execution.results] == ["<b>0</b>", "<b>1</b>"]
+    assert [truncated.output for truncated in execution.truncated] == ["results"]
+
+
+async def test_no_budget(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code("for i in range(1000): print('x' * 99)")
+
+    assert len("".join(execution.logs.stdout)) == 100_000
+    assert execution.truncated == []
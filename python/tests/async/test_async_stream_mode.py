@@ -0,0 +1,70 @@
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+PROGRESS_CODE = """
+import sys
+
+for i in range(10000):
+    sys.stdout.write(f"\\r{i}")
+print()
+"""
+
+DISPLAY_CODE = """
+from IPython.display import display, HTML
+
+handle = display(HTML("<b>first</b>"), display_id=True)
+handle.update(HTML("<b>second</b>"))
+"""
+
+
+async def test_compact_progress(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(PROGRESS_CODE, stream_mode="compact")
+
+    stdout = "".join(execution.logs.stdout)
+    assert stdout.endswith("9999\n")
+    assert stdout.count("\r") < 100
+
+
+async def test_raw_progress(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(PROGRESS_CODE)
+
+    stdout = "".join(execution.logs.stdout)
+    assert stdout.count("\r") == 10000
+
+
+async def test_compact_display_update(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(DISPLAY_CODE, stream_mode="compact")
+
+    assert len(execution.results) == 1
+    assert execution.results[0].html == "<b>second</b>"
+
+
+async def test_raw_displays_with_the_same_id(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        """
+        from IPython.display import display, HTML
+
+        display(HTML("<b>first</b>"), display_id="plot")
+        handle = display(HTML("<b>second</b>"), display_id="plot")
+        """
+    )
+
+    # Only the compact stream mode replaces displays with the same ID
+    assert [result.html for result in execution.results] == [
+        "<b>first</b>",
+        "<b>second</b>",
+    ]
+
+
+async def test_compact_clear_output(async_sandbox: AsyncSandbox):
+    execution = await async_sandbox.run_code(
+        """
+        from IPython.display import clear_output
+
+        for i in range(3):
+            clear_output(wait=True)
+            print(f"frame {i}")
+        """,
+        stream_mode="compact",
+    )
+
+    assert execution.logs.stdout == ["frame 2\n"]
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from e2b import SandboxException
+
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+
+
+async def test_submit_code(async_sandbox: AsyncSandbox):
+    handle = await async_sandbox.submit_code(
+        "import time; time.sleep(2); print('done'); 42"
+    )
+    assert (await handle.status()).status in ("queued", "running")
+
+    execution = await handle.wait(poll_interval=0.5)
+
+    assert execution.text == "42"
+    assert execution.logs.stdout == ["done\n"]
+    assert (await handle.status()).status == "finished"
+
+
+async def test_attach_to_submitted_code(async_sandbox: AsyncSandbox):
+    handle = await async_sandbox.submit_code("for i in range(3): print(i)")
+
+    stdout = []
+    execution = await handle.attach(on_stdout=lambda output: stdout.append(output.line))
+
+    assert "".join(execution.logs.stdout) == "0\n1\n2\n"
+    assert "".join(stdout) == "0\n1\n2\n"
+
+
+async def test_list_executions(async_sandbox: AsyncSandbox):
+    handle = await async_sandbox.submit_code("1 + 1")
+
+    assert handle.id in [
+        execution.id for execution in await async_sandbox.list_executions()
+    ]
+    execution = await (await async_sandbox.get_execution(handle.id)).wait()
+    assert execution.text == "2"
+
+
+async def test_result_of_running_execution(async_sandbox: AsyncSandbox):
+    handle = await async_sandbox.submit_code("import time; time.sleep(5)")
+
+    with pytest.raises(SandboxException, match="is still"):
+        await handle.result()
+
+
+async def test_cancel_running_execution(async_sandbox: AsyncSandbox):
+    handle = await async_sandbox.submit_code(
+        "import time; print('started', flush=True); time.sleep(30)"
+    )
+    while (await handle.status()).status != "running":
+        await asyncio.sleep(0.1)
+
+    cancellation = await handle.cancel()
+
+    assert cancellation.cancelled
+    assert cancellation.interrupts >= 1
+    assert not cancellation.forced
+    assert (await handle.status()).status == "finished"
+    assert (await handle.result()).error.name == "KeyboardInterrupt"
+
+
+async def test_cancel_queued_execution(async_sandbox: AsyncSandbox):
+    running = await async_sandbox.submit_code("import time; time.sleep(3); 1")
+    queued = await async_sandbox.submit_code("print('never')")
+
+    cancellation = await queued.cancel()
+
+    assert cancellation.cancelled
+    assert cancellation.interrupts == 0
+    assert (await queued.result()).error.name == "ExecutionCancelled"
+    # The execution ahead of it isn't interrupted
+    assert (await running.wait(poll_interval=0.5)).text == "1"
+
+
+async def test_cancel_finished_execution(async_sandbox: AsyncSandbox):
+    handle = await async_sandbox.submit_code("1")
+    await handle.wait(poll_interval=0.1)
+
+    assert not (await handle.cancel()).cancelled
+
+
+async def test_submitted_code_waits_for_the_context(async_sandbox: AsyncSandbox):
+    running = await async_sandbox.submit_code("import time; time.sleep(3)")
+    queued = await async_sandbox.submit_code("1")
+
+    assert (await queued.status()).status == "queued"
+    await running.wait(poll_interval=0.5)
+    assert (await queued.wait(poll_interval=0.5)).text == "1"
@@ -3,6 +3,7 @@ import os
 
 import pytest
 
+from e2b.connection_config import ConnectionConfig
 from e2b_code_interpreter import (
     AsyncSandbox,
     Sandbox,
@@ -69,6 +70,43 @@ async def async_sandbox(async_sandbox_factory):
     return await async_sandbox_factory()
 
 
+@pytest.fixture
+def fake_sandbox():
+    """Builds a sandbox that sends its requests through `client` instead of a
+    running sandbox, for tests that serve the responses themselves.
+    """
+
+    def factory(cls, client, **config):
+        class _Fake(cls):
+            @property
+            def connection_config(self):
+                return ConnectionConfig(api_key="x", domain="e2b.app", **config)
+
+            @property
+            def sandbox_id(self):
+                return "sandbox-id"
+
+            @property
+            def _envd_access_token(self):
+                return None
+
+            @property
+            def traffic_access_token(self):
+                return None
+
+            @property
+            def _jupyter_url(self):
+                return "http://127.0.0.1:9"
+
+            @property
+            def _client(self):
+                return client
+
+        return _Fake.__new__(_Fake)
+
+    return factory
+
+
 @pytest.fixture
 def debug():
     return os.getenv("E2B_DEBUG") is not None
@@ -0,0 +1,32 @@
+import time
+
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+CODE = "for i in range(5000): print(i, flush=True)"
+EXPECTED = "".join(f"{i}\n" for i in range(5000))
+
+
+def _slow_reader(stdout):
+    time.sleep(0.001)
+
+
+def test_spill_keeps_all_output(sandbox: Sandbox):
+    execution = sandbox.run_code(CODE, backpressure="spill", on_stdout=_slow_reader)
+
+    assert "".join(execution.logs.stdout) == EXPECTED
+    assert execution.truncated == []
+
+
+def test_pause_keeps_all_output(sandbox: Sandbox):
+    execution = sandbox.run_code(CODE, backpressure="pause", on_stdout=_slow_reader)
+
+    assert "".join(execution.logs.stdout) == EXPECTED
+
+
+def test_drop_reports_dropped_output(sandbox: Sandbox):
+    execution = sandbox.run_code(CODE, backpressure="drop", on_stdout=_slow_reader)
+
+    received = len("".join(execution.logs.stdout))
+    dropped = sum(t.truncated_bytes for t in execution.truncated)
+    assert received + dropped == len(EXPECTED)
+    assert all(t.path is None for t in execution.truncated)
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+from e2b import TimeoutException
+
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+
+def test_run_code_batch(sandbox: Sandbox):
+    executions = sandbox.run_code_batch(["x = 1", "print(x)", "x + 1"])
+
+    assert len(executions) == 3
+    assert executions[1].logs.stdout == ["1\n"]
+    assert executions[2].text == "2"
+    assert [e.execution_count for e in executions] == [
+        executions[0].execution_count + i for i in range(3)
+    ]
+
+
+def test_run_code_batch_stops_on_error(sandbox: Sandbox):
+    executions = sandbox.run_code_batch(["1 / 0", "print('after')"])
+
+    assert executions[0].error.name == "ZeroDivisionError"
+    assert executions[1].error.name == "ExecutionAborted"
+    assert executions[1].logs.stdout == []
+
+
+def test_run_code_batch_continues_after_error(sandbox: Sandbox):
+    executions = sandbox.run_code_batch(
+        ["1 / 0", "print('after')"], stop_on_error=False
+    )
+
+    assert executions[0].error.name == "ZeroDivisionError"
+    assert executions[1].error is None
+    assert executions[1].logs.stdout == ["after\n"]
+
+
+def test_run_code_batch_with_env_vars(sandbox: Sandbox):
+    executions = sandbox.run_code_batch(
+        ["import os", "os.getenv('FOO')"], envs={"FOO": "bar"}
+    )
+
+    assert executions[1].text == "bar"
+
+
+def test_run_code_batch_after_client_disconnect(sandbox: Sandbox):
+    # Dropping the connection interrupts only the running cell, the kernel
+    # still runs the cells after it.
+    with pytest.raises(TimeoutException):
+        sandbox.run_code_batch(
+            ["import time; time.sleep(300)", "ran_after_disconnect = True"],
+            stop_on_error=False,
+            timeout=3,
+        )
+    # Wait for the server to detect the disconnect and interrupt the kernel.
+    time.sleep(5)
+
+    result = sandbox.run_code("ran_after_disconnect", timeout=10)
+    assert result.text == "True"
+
+
+def test_run_code_batch_stops_on_error_after_client_disconnect(sandbox: Sandbox):
+    # The interrupted cell fails, so the kernel aborts the cells after it.
+    with pytest.raises(TimeoutException):
+        sandbox.run_code_batch(
+            ["import time; time.sleep(300)", "aborted_after_disconnect = True"],
+            timeout=3,
+        )
+    time.sleep(5)
+
+    result = sandbox.run_code("'aborted_after_disconnect' in globals()", timeout=10)
+    assert result.text == "False"
+
+
+def test_run_code_batch_when_the_context_restarts(sandbox: Sandbox):
+    # Every unfinished cell ends with the error, not just the running one.
+    context = sandbox.create_code_context()
+    executions = sandbox.run_code_batch(
+        ["import os; os.kill(os.getpid(), 9)", "1 + 1"], context=context
+    )
+
+    assert [e.error.name for e in executions] == ["ContextRestarting"] * 2
+    assert executions[1].text is None
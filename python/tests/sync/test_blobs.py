@@ -0,0 +1,36 @@
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+CODE = """
+from IPython.display import HTML, display
+display(HTML("<p>" + "x" * 10000 + "</p>"))
+1 + 1
+"""
+
+
+def test_blob_threshold(sandbox: Sandbox):
+    execution = sandbox.run_code(CODE, blob_threshold_bytes=1000)
+
+    display, main = execution.results
+    assert display.blobs["html"].size == 10007
+    assert display.blobs["html"].mime_type == "text/html"
+    assert "html" in display.formats()
+    # Fetched on access
+    assert display.html == "<p>" + "x" * 10000 + "</p>"
+
+    assert main.blobs is None
+    assert main.text == "2"
+
+
+def test_get_blob_range(sandbox: Sandbox):
+    execution = sandbox.run_code(CODE, blob_threshold_bytes=1000)
+    blob = execution.results[0].blobs["html"]
+
+    assert sandbox.get_blob(blob, start=0, end=4) == b"<p>x"
+    assert sandbox.get_blob(blob.hash, start=10003) == b"</p>"
+
+
+def test_without_blob_threshold(sandbox: Sandbox):
+    execution = sandbox.run_code(CODE)
+
+    assert execution.results[0].blobs is None
+    assert len(execution.results[0].html) == 10007
@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+from e2b import TimeoutException
+
+from e2b_code_interpreter import RemoteTraceback
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+
+def test_call(sandbox: Sandbox):
+    result = sandbox.call(lambda a, b=0: {"sum": a + b, "args": (a, b)}, 1, b=2.5)
+
+    assert result == {"sum": 3.5, "args": (1, 2.5)}
+
+
+def test_call_binary_argument(sandbox: Sandbox):
+    data = bytes(range(256)) * 4096
+
+    assert sandbox.call(lambda d: d[::-1], data) == data[::-1]
+
+
+def test_call_raises(sandbox: Sandbox):
+    def fail(key):
+        return {}[key]
+
+    with pytest.raises(KeyError) as exc_info:
+        sandbox.call(fail, "missing")
+
+    assert isinstance(exc_info.value.__cause__, RemoteTraceback)
+    assert "fail" in str(exc_info.value.__cause__)
+
+
+def test_map(sandbox: Sandbox):
+    results = sandbox.map(lambda x: x * x, range(10), chunksize=3)
+
+    assert results == [x * x for x in range(10)]
+
+
+def test_map_in_context(sandbox: Sandbox):
+    context = sandbox.create_code_context()
+
+    assert sandbox.map(str, [1, 2], context=context) == ["1", "2"]
+
+
+def test_call_in_context(sandbox: Sandbox):
+    context = sandbox.create_code_context(cwd="/tmp")
+
+    assert sandbox.call(os.getcwd, context=context) == "/tmp"
+
+
+def test_call_timeout(sandbox: Sandbox):
+    with pytest.raises(TimeoutException):
+        sandbox.call(time.sleep, 300, timeout=3)
+
+    # The helper is removed from the namespace even though the call didn't finish
+    execution = sandbox.run_code("'_e2b_call' in globals()")
+    assert execution.text == "False"
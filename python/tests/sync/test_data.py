@@ -1,3 +1,5 @@
+import pytest
+
 from e2b_code_interpreter.code_interpreter_sync import Sandbox
 
 
@@ -15,3 +17,27 @@ def test_data(sandbox: Sandbox):
     assert data.data
     assert "a" in data.data
     assert len(data.data["a"]) == 3
+
+
+def test_data_arrow(sandbox: Sandbox):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pandas")
+
+    result = sandbox.run_code(
+        """
+        import pandas as pd
+        pd.DataFrame(
+            {"a": [1, 2, 3], "t": pd.date_range("2024-01-01", periods=3)},
+            index=["x", "y", "z"],
+        )
+        """
+    )
+
+    data = result.results[0]
+    assert "arrow" in data.formats()
+
+    df = data.to_pandas()
+    assert list(df.index) == ["x", "y", "z"]
+    assert df["a"].tolist() == [1, 2, 3]
+    assert df["t"].dt.day.tolist() == [1, 2, 3]
+    assert data.to_arrow().num_rows == 3
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+from e2b import NotFoundException, SandboxException
+
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+
+def test_dataframe_summary(sandbox: Sandbox):
+    execution = sandbox.run_code(
+        """
+        import pandas as pd
+        pd.DataFrame({"a": range(1000), "b": ["x"] * 1000})
+        """,
+        dataframe_mode="summary",
+    )
+
+    result = execution.results[0]
+    assert result.data is None
+    assert result.html is None
+
+    summary = result.dataframe
+    assert summary.shape == [1000, 2]
+    assert summary.columns == [
+        {"name": "a", "dtype": "int64"},
+        {"name": "b", "dtype": summary.columns[1]["dtype"]},
+    ]
+    assert summary.head["data"][0] == [0, "x"]
+    assert summary.tail["index"][-1] == 999
+    assert "mean" in summary.stats["index"]
+
+
+def test_dataframe_rows(sandbox: Sandbox):
+    execution = sandbox.run_code(
+        "import pandas as pd\npd.DataFrame({'a': range(100), 'b': range(100, 200)})",
+        dataframe_mode="summary",
+    )
+    summary = execution.results[0].dataframe
+
+    rows = sandbox.get_dataframe_rows(summary, start=10, stop=13, columns=["b"])
+
+    assert rows.columns == ["b"]
+    assert rows.index == [10, 11, 12]
+    assert rows.data == [[110], [111], [112]]
+    assert rows.total_rows == 100
+
+
+def test_dataframe_rows_by_name(sandbox: Sandbox):
+    sandbox.run_code("import pandas as pd\ndf = pd.DataFrame({'a': [1, 2, 3]})")
+
+    rows = sandbox.get_dataframe_rows("df", start=1)
+
+    assert rows.data == [[2], [3]]
+    assert (rows.start, rows.stop) == (1, 3)
+
+
+def test_dataframe_rows_not_found(sandbox: Sandbox):
+    with pytest.raises(NotFoundException):
+        sandbox.get_dataframe_rows("missing")
+
+
+def test_dataframe_rows_missing_column(sandbox: Sandbox):
+    sandbox.run_code("import pandas as pd\ndf = pd.DataFrame({'a': [1]})")
+
+    with pytest.raises(SandboxException) as exc_info:
+        sandbox.get_dataframe_rows("df", columns=["missing"])
+    assert not isinstance(exc_info.value, NotFoundException)
+
+
+def test_dataframe_rows_not_in_history(sandbox: Sandbox):
+    sandbox.run_code("import pandas as pd\ndf = pd.DataFrame({'a': [1]})")
+    count = sandbox.run_code("1").execution_count
+
+    sandbox.get_dataframe_rows("df")
+
+    # Fetching the rows doesn't count as a cell
+    assert sandbox.run_code("1").execution_count == count + 1
+
+
+def test_dataframe_rows_wait_for_the_running_execution(sandbox: Sandbox):
+    running = threading.Thread(
+        target=sandbox.run_code,
+        args=(
+            "import time, pandas as pd\ntime.sleep(2)\ndf = pd.DataFrame({'a': [1]})",
+        ),
+    )
+    running.start()
+    time.sleep(0.5)
+
+    # The rows are fetched in the context's turn after the execution
+    rows = sandbox.get_dataframe_rows("df")
+    running.join()
+
+    assert rows.data == [[1]]
+
+
+def test_dataframe_full_mode(sandbox: Sandbox):
+    execution = sandbox.run_code("import pandas as pd\npd.DataFrame({'a': [1]})")
+
+    result = execution.results[0]
+    assert result.dataframe is None
+    assert result.data == {"a": [1]}
+    assert result.html
@@ -0,0 +1,35 @@
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+CODE = """
+from IPython.display import HTML, display
+display(HTML("<p>" + "x" * 10000 + "</p>"))
+"""
+
+
+def test_dedupe(sandbox: Sandbox):
+    first = sandbox.run_code(CODE, dedupe=True).results[0]
+    assert first.blobs is None
+    assert "html" in first.hashes
+
+    second = sandbox.run_code(CODE, dedupe=True).results[0]
+    assert second.blobs["html"].hash == first.hashes["html"]
+    assert second.html is first.html
+
+
+def test_dedupe_cache_miss(sandbox: Sandbox):
+    first = sandbox.run_code(CODE, dedupe=True).results[0]
+    sandbox._result_cache._values.clear()
+
+    second = sandbox.run_code(CODE, dedupe=True).results[0]
+    assert second.blobs["html"].hash == first.hashes["html"]
+    # Fetched from the sandbox
+    assert second.html == first.html
+
+
+def test_without_dedupe(sandbox: Sandbox):
+    sandbox.run_code(CODE, dedupe=True)
+
+    execution = sandbox.run_code(CODE)
+    assert execution.results[0].blobs is None
+    assert execution.results[0].hashes is None
+    assert len(execution.results[0].html) == 10007
@@ -0,0 +1,50 @@
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+CODE = """
+class Displayed:
+    calls = []
+
+    def _repr_html_(self):
+        Displayed.calls.append("html")
+        return "<b>displayed</b>"
+
+    def __repr__(self):
+        return "displayed"
+"""
+
+
+def test_formats(sandbox: Sandbox):
+    sandbox.run_code(CODE)
+
+    execution = sandbox.run_code("Displayed()", formats=["text"])
+
+    assert execution.results[0].formats() == ["text"]
+    # The HTML wasn't even computed
+    assert sandbox.run_code("Displayed.calls").text == "[]"
+
+
+def test_formats_by_mime_type(sandbox: Sandbox):
+    sandbox.run_code(CODE)
+
+    execution = sandbox.run_code("Displayed()", formats=["text/html"])
+
+    assert execution.results[0].formats() == ["html"]
+    assert execution.results[0].text is None
+
+
+def test_formats_reset_after_execution(sandbox: Sandbox):
+    sandbox.run_code(CODE)
+    sandbox.run_code("Displayed()", formats=["html"])
+
+    execution = sandbox.run_code("Displayed()")
+
+    assert execution.results[0].formats() == ["text", "html"]
+
+
+def test_formats_with_cell_magic(sandbox: Sandbox):
+    # The formats are set apart from the code, so it can still start with a
+    # cell magic
+    execution = sandbox.run_code("%%time\n1 + 1", formats=["text"])
+
+    assert execution.error is None
+    assert execution.text == "2"
@@ -0,0 +1,61 @@
+import base64
+import struct
+
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+from e2b_code_interpreter.models import ImagePolicy
+
+IMAGE = """
+from PIL import Image
+Image.new("RGB", (800, 600), "red")
+"""
+
+FIGURE = """
+import matplotlib.pyplot as plt
+plt.figure(figsize=(4, 3), dpi=200)
+plt.plot([1, 2, 3])
+plt.show()
+"""
+
+
+def png_size(png: str):
+    return struct.unpack(">II", base64.b64decode(png)[16:24])
+
+
+def test_image_max_size(sandbox: Sandbox):
+    execution = sandbox.run_code(IMAGE, image_policy=ImagePolicy(max_size=200))
+
+    assert png_size(execution.results[0].png) == (200, 150)
+
+
+def test_image_dpi(sandbox: Sandbox):
+    execution = sandbox.run_code(FIGURE, image_policy=ImagePolicy(dpi=50))
+
+    width, height = png_size(execution.results[0].png)
+    assert width <= 200
+    assert height <= 150
+
+
+def test_image_format(sandbox: Sandbox):
+    execution = sandbox.run_code(
+        IMAGE, image_policy=ImagePolicy(format="webp", quality=50)
+    )
+
+    result = execution.results[0]
+    assert result.png is None
+    assert base64.b64decode(result.webp)[8:12] == b"WEBP"
+
+
+def test_image_thumbnail(sandbox: Sandbox):
+    execution = sandbox.run_code(IMAGE, image_policy=ImagePolicy(thumbnail_size=64))
+
+    thumbnail, image = execution.results
+    assert thumbnail.is_thumbnail
+    assert png_size(thumbnail.png) == (64, 48)
+    assert not image.is_thumbnail
+    assert png_size(image.png) == (800, 600)
+
+
+def test_without_image_policy(sandbox: Sandbox):
+    execution = sandbox.run_code(IMAGE)
+
+    assert png_size(execution.results[0].png) == (800, 600)
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from e2b import SandboxException
+
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+
+def test_submit_code(sandbox: Sandbox):
+    handle = sandbox.submit_code("import time; time.sleep(2); print('done'); 42")
+    assert handle.status().status in ("queued", "running")
+
+    execution = handle.wait(poll_interval=0.5)
+
+    assert execution.text == "42"
+    assert execution.logs.stdout == ["done\n"]
+    assert handle.status().status == "finished"
+
+
+def test_attach_to_submitted_code(sandbox: Sandbox):
+    handle = sandbox.submit_code("for i in range(3): print(i)")
+
+    stdout = []
+    execution = handle.attach(on_stdout=lambda output: stdout.append(output.line))
+
+    assert "".join(execution.logs.stdout) == "0\n1\n2\n"
+    assert "".join(stdout) == "0\n1\n2\n"
+
+
+def test_list_executions(sandbox: Sandbox):
+    handle = sandbox.submit_code("1 + 1")
+
+    assert handle.id in [execution.id for execution in sandbox.list_executions()]
+    assert sandbox.get_execution(handle.id).wait().text == "2"
+
+
+def test_result_of_running_execution(sandbox: Sandbox):
+    handle = sandbox.submit_code("import time; time.sleep(5)")
+
+    with pytest.raises(SandboxException, match="is still"):
+        handle.result()
+
+
+def test_cancel_running_execution(sandbox: Sandbox):
+    handle = sandbox.submit_code(
+        "import time; print('started', flush=True); time.sleep(30)"
+    )
+    while handle.status().status != "running":
+        time.sleep(0.1)
+
+    cancellation = handle.cancel()
+
+    assert cancellation.cancelled
+    assert cancellation.interrupts >= 1
+    assert not cancellation.forced
+    assert handle.status().status == "finished"
+    assert handle.result().error.name == "KeyboardInterrupt"
+
+
+def test_cancel_queued_execution(sandbox: Sandbox):
+    running = sandbox.submit_code("import time; time.sleep(3); 1")
+    queued = sandbox.submit_code("print('never')")
+
+    cancellation = queued.cancel()
+
+    assert cancellation.cancelled
+    assert cancellation.interrupts == 0
+    assert queued.result().error.name == "ExecutionCancelled"
+    # The execution ahead of it isn't interrupted
+    assert running.wait(poll_interval=0.5).text == "1"
+
+
+def test_cancel_finished_execution(sandbox: Sandbox):
+    handle = sandbox.submit_code("1")
+    handle.wait(poll_interval=0.1)
+
+    assert not handle.cancel().cancelled
+
+
+def test_submitted_code_waits_for_the_context(sandbox: Sandbox):
+    running = sandbox.submit_code("import time; time.sleep(3)")
+    queued = sandbox.submit_code("1")
+
+    assert queued.status().status == "queued"
+    running.wait(poll_interval=0.5)
+    assert queued.wait(poll_interval=0.5).text == "1"
@@ -0,0 +1,36 @@
+"""A context with too many executions waiting turns new ones away with a 429.
+
+`run_code` and `submit_code` raise `RateLimitException` for it, so callers can back
+off or send the work to another context. Served by an `httpx.MockTransport`.
+"""
+
+import httpx
+import pytest
+from e2b import RateLimitException
+
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+
+def _handle(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(429, text="64 executions are already waiting for the context")
+
+
+def test_full_context_queue_is_rate_limited(fake_sandbox):
+    client = httpx.Client(transport=httpx.MockTransport(_handle))
+    sandbox = fake_sandbox(Sandbox, client)
+
+    with pytest.raises(RateLimitException, match="already waiting"):
+        sandbox.run_code("1 + 1")
+    with pytest.raises(RateLimitException):
+        sandbox.submit_code("1 + 1")
+
+
+async def test_async_full_context_queue_is_rate_limited(fake_sandbox):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handle))
+    sandbox = fake_sandbox(AsyncSandbox, client)
+
+    with pytest.raises(RateLimitException, match="already waiting"):
+        await sandbox.run_code("1 + 1")
+    with pytest.raises(RateLimitException):
+        await sandbox.submit_code("1 + 1")
@@ -6,15 +6,23 @@ phase. With the previous `(request_timeout, timeout, request_timeout,
 request_timeout)` tuple that deadline came out as `max(timeout,
 request_timeout)`, so any `timeout` shorter than `request_timeout` was silently
 ignored and an execution ran on until `request_timeout` instead.
+
+The sandbox enforces `timeout` itself and ends the stream with the partial
+output and an `ExecutionTimeout` error, so the client only waits
+`EXECUTION_TIMEOUT_GRACE` seconds longer. It's raised as a `TimeoutException`,
+same as when the client gives up.
 """
 
+import json
+
 import httpx
 import pytest
 
-from e2b.connection_config import ConnectionConfig
+from e2b import TimeoutException
 
 from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
 from e2b_code_interpreter.code_interpreter_sync import Sandbox
+from e2b_code_interpreter.constants import EXECUTION_TIMEOUT_GRACE
 
 REQUEST_TIMEOUT = 60.0
 
@@ -35,37 +43,6 @@ class _CapturingClient:
         raise _Stop
 
 
-def _sandbox(cls, captured: dict):
-    class _Fake(cls):
-        @property
-        def connection_config(self):
-            return ConnectionConfig(
-                api_key="x", domain="e2b.app", request_timeout=REQUEST_TIMEOUT
-            )
-
-        @property
-        def sandbox_id(self):
-            return "sandbox-id"
-
-        @property
-        def _envd_access_token(self):
-            return None
-
-        @property
-        def traffic_access_token(self):
-            return None
-
-        @property
-        def _jupyter_url(self):
-            return "http://127.0.0.1:9"
-
-        @property
-        def _client(self):
-            return _CapturingClient(captured)
-
-    return _Fake.__new__(_Fake)
-
-
 def _captured_timeout(captured: dict) -> httpx.Timeout:
     timeout = captured["timeout"]
     assert isinstance(timeout, httpx.Timeout), (
@@ -76,48 +53,134 @@ def _captured_timeout(captured: dict) -> httpx.Timeout:
 
 
 @pytest.mark.parametrize("timeout", [3, 10, 300])
-def test_execution_timeout_is_the_request_deadline(timeout):
+def test_execution_timeout_is_the_request_deadline(timeout, fake_sandbox):
     captured: dict = {}
     with pytest.raises(_Stop):
-        _sandbox(Sandbox, captured).run_code("1 + 1", timeout=timeout)
+        fake_sandbox(
+            Sandbox, _CapturingClient(captured), request_timeout=REQUEST_TIMEOUT
+        ).run_code("1 + 1", timeout=timeout)
 
+    assert captured["json"]["timeout"] == timeout
     tmo = _captured_timeout(captured)
     # Every non-connect phase carries `timeout`, so the deadline the transport
     # derives is `timeout` and not `max(timeout, request_timeout)`.
-    assert tmo.read == timeout
-    assert tmo.write == timeout
-    assert tmo.pool == timeout
+    assert tmo.read == timeout + EXECUTION_TIMEOUT_GRACE
+    assert tmo.write == timeout + EXECUTION_TIMEOUT_GRACE
+    assert tmo.pool == timeout + EXECUTION_TIMEOUT_GRACE
     assert tmo.connect == REQUEST_TIMEOUT
 
 
 @pytest.mark.parametrize("timeout", [3, 10, 300])
-async def test_async_execution_timeout_is_the_request_deadline(timeout):
+async def test_async_execution_timeout_is_the_request_deadline(timeout, fake_sandbox):
     captured: dict = {}
     with pytest.raises(_Stop):
-        await _sandbox(AsyncSandbox, captured).run_code("1 + 1", timeout=timeout)
+        await fake_sandbox(
+            AsyncSandbox, _CapturingClient(captured), request_timeout=REQUEST_TIMEOUT
+        ).run_code("1 + 1", timeout=timeout)
 
+    assert captured["json"]["timeout"] == timeout
     tmo = _captured_timeout(captured)
-    assert tmo.read == timeout
-    assert tmo.write == timeout
-    assert tmo.pool == timeout
+    assert tmo.read == timeout + EXECUTION_TIMEOUT_GRACE
+    assert tmo.write == timeout + EXECUTION_TIMEOUT_GRACE
+    assert tmo.pool == timeout + EXECUTION_TIMEOUT_GRACE
     assert tmo.connect == REQUEST_TIMEOUT
 
 
-def test_zero_timeout_disables_the_deadline():
+def test_zero_timeout_disables_the_deadline(fake_sandbox):
     captured: dict = {}
     with pytest.raises(_Stop):
-        _sandbox(Sandbox, captured).run_code("1 + 1", timeout=0)
+        fake_sandbox(
+            Sandbox, _CapturingClient(captured), request_timeout=REQUEST_TIMEOUT
+        ).run_code("1 + 1", timeout=0)
 
+    assert captured["json"]["timeout"] is None
     tmo = _captured_timeout(captured)
     # `connect` has to go too: with the other phases unset the transport falls
     # back to it, which would cap a deliberately unbounded execution.
     assert (tmo.read, tmo.write, tmo.pool, tmo.connect) == (None, None, None, None)
 
 
-async def test_async_zero_timeout_disables_the_deadline():
+async def test_async_zero_timeout_disables_the_deadline(fake_sandbox):
     captured: dict = {}
     with pytest.raises(_Stop):
-        await _sandbox(AsyncSandbox, captured).run_code("1 + 1", timeout=0)
+        await fake_sandbox(
+            AsyncSandbox, _CapturingClient(captured), request_timeout=REQUEST_TIMEOUT
+        ).run_code("1 + 1", timeout=0)
 
+    assert captured["json"]["timeout"] is None
     tmo = _captured_timeout(captured)
     assert (tmo.read, tmo.write, tmo.pool, tmo.connect) == (None, None, None, None)
+
+
+def test_fanout_deadline_covers_every_context(fake_sandbox):
+    captured: dict = {}
+    with pytest.raises(_Stop):
+        fake_sandbox(
+            Sandbox, _CapturingClient(captured), request_timeout=REQUEST_TIMEOUT
+        ).run_code_fanout("1 + 1", ["a", "b"], timeout=10)
+
+    assert captured["json"]["timeout"] == 10
+    tmo = _captured_timeout(captured)
+    # The contexts might run one after another
+    assert tmo.read == 2 * 10 + EXECUTION_TIMEOUT_GRACE
+    assert tmo.connect == REQUEST_TIMEOUT
+
+
+async def test_async_fanout_deadline_covers_every_context(fake_sandbox):
+    captured: dict = {}
+    with pytest.raises(_Stop):
+        await fake_sandbox(
+            AsyncSandbox, _CapturingClient(captured), request_timeout=REQUEST_TIMEOUT
+        ).run_code_fanout("1 + 1", ["a", "b"], timeout=10)
+
+    assert captured["json"]["timeout"] == 10
+    tmo = _captured_timeout(captured)
+    assert tmo.read == 2 * 10 + EXECUTION_TIMEOUT_GRACE
+    assert tmo.connect == REQUEST_TIMEOUT
+
+
+TIMED_OUT = [
+    {"type": "stdout", "text": "started\n", "timestamp": "t"},
+    {
+        "type": "error",
+        "name": "ExecutionTimeout",
+        "value": "Execution exceeded the timeout of 3 seconds",
+        "traceback": "",
+    },
+]
+
+
+def _timed_out(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        headers={"content-type": "application/x-ndjson"},
+        content=b"".join(json.dumps(o).encode() + b"\n" for o in TIMED_OUT),
+    )
+
+
+def test_execution_timeout_in_the_sandbox_raises(fake_sandbox):
+    client = httpx.Client(transport=httpx.MockTransport(_timed_out))
+    sandbox = fake_sandbox(Sandbox, client)
+
+    stdout = []
+    with pytest.raises(TimeoutException) as exc_info:
+        sandbox.run_code("work()", timeout=3, on_stdout=stdout.append)
+
+    assert [msg.line for msg in stdout] == ["started\n"]
+    execution = exc_info.value.execution
+    assert execution.logs.stdout == ["started\n"]
+    assert execution.error.name == "ExecutionTimeout"
+
+
+async def test_async_execution_timeout_in_the_sandbox_raises(fake_sandbox):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_timed_out))
+    sandbox = fake_sandbox(AsyncSandbox, client)
+
+    stdout = []
+    with pytest.raises(TimeoutException) as exc_info:
+        await sandbox.run_code("work()", timeout=3, on_stdout=stdout.append)
+
+    assert [msg.line for msg in stdout] == ["started\n"]
+    execution = exc_info.value.execution
+    assert execution.logs.stdout == ["started\n"]
+    assert execution.error.name == "ExecutionTimeout"
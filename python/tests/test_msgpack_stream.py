@@ -0,0 +1,77 @@
+"""`run_code` negotiates the binary stream format and decodes its records.
+
+The server answers with length-prefixed msgpack records, images as raw bytes,
+when the request accepts it. Served here by an `httpx.MockTransport`; the
+decoder is also fed small chunks so records straddle chunk boundaries.
+"""
+
+import base64
+
+import httpx
+import pytest
+
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+from e2b_code_interpreter.stream import MSGPACK_MEDIA_TYPE, RecordDecoder
+
+msgpack = pytest.importorskip("msgpack")
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+OUTPUTS = [
+    {"type": "number_of_executions", "execution_count": 1},
+    {"type": "stdout", "text": "hello\n", "timestamp": "2024-01-01T00:00:00Z"},
+    {"type": "result", "text": "<Figure>", "png": PNG, "is_main_result": False},
+    {"type": "end_of_execution"},
+]
+
+
+def _record(output: dict) -> bytes:
+    body = msgpack.packb(output)
+    return len(body).to_bytes(4, "big") + body
+
+
+def _chunks(body: bytes, size: int = 7):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if MSGPACK_MEDIA_TYPE not in request.headers["accept"]:
+        return httpx.Response(406)
+
+    body = b"".join(_record(output) for output in OUTPUTS)
+    return httpx.Response(
+        200, headers={"content-type": MSGPACK_MEDIA_TYPE}, content=body
+    )
+
+
+def _assert_execution(execution):
+    assert execution.execution_count == 1
+    assert execution.logs.stdout == ["hello\n"]
+    assert len(execution.results) == 1
+    assert execution.results[0].png == base64.b64encode(PNG).decode("ascii")
+    assert execution.results[0].text == "<Figure>"
+
+
+def test_record_decoder_handles_split_records():
+    decoder = RecordDecoder()
+    body = b"".join(_record(output) for output in OUTPUTS)
+
+    records = []
+    for chunk in _chunks(body):
+        records.extend(decoder.feed(chunk))
+
+    assert [record["type"] for record in records] == [
+        output["type"] for output in OUTPUTS
+    ]
+    assert records[2]["png"] == base64.b64encode(PNG).decode("ascii")
+
+
+def test_run_code_decodes_msgpack_stream(fake_sandbox):
+    client = httpx.Client(transport=httpx.MockTransport(_handler))
+    _assert_execution(fake_sandbox(Sandbox, client).run_code("plot()"))
+
+
+async def test_async_run_code_decodes_msgpack_stream(fake_sandbox):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    _assert_execution(await fake_sandbox(AsyncSandbox, client).run_code("plot()"))
@@ -0,0 +1,107 @@
+"""`run_code(resumable=True)` reattaches to the execution when its stream drops.
+
+The first response is cut with a `ReadError` partway through, the client is
+expected to continue with `GET /executions/{id}/stream` after the last output
+it received and skip outputs it already has. Served by an `httpx.MockTransport`.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from e2b_code_interpreter import code_interpreter_async, code_interpreter_sync
+from e2b_code_interpreter.code_interpreter_async import AsyncSandbox
+from e2b_code_interpreter.code_interpreter_sync import Sandbox
+
+EXECUTION_ID = "execution-id"
+
+OUTPUTS = [
+    {"type": "number_of_executions", "execution_count": 1, "seq": 1},
+    {"type": "stdout", "text": "1\n", "timestamp": "t", "seq": 2},
+    {"type": "stdout", "text": "2\n", "timestamp": "t", "seq": 3},
+    {"type": "stdout", "text": "3\n", "timestamp": "t", "seq": 4},
+]
+
+
+def _lines(outputs) -> bytes:
+    return b"".join(json.dumps(output).encode() + b"\n" for output in outputs)
+
+
+class _CutStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def __iter__(self):
+        yield self._body
+        raise httpx.ReadError("connection reset")
+
+    async def __aiter__(self):
+        yield self._body
+        raise httpx.ReadError("connection reset")
+
+
+def _handler(requests):
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        headers = {"content-type": "application/x-ndjson"}
+        started = {"type": "execution_started", "execution_id": EXECUTION_ID}
+
+        if request.url.path == "/execute":
+            return httpx.Response(
+                200, headers=headers, stream=_CutStream(_lines([started] + OUTPUTS[:2]))
+            )
+
+        assert request.url.path == f"/executions/{EXECUTION_ID}/stream"
+        last_seq = int(request.url.params["last_seq"])
+        # Resend the last output the client has, it must be skipped
+        rest = [o for o in OUTPUTS if o["seq"] >= last_seq]
+        return httpx.Response(
+            200,
+            headers=headers,
+            content=_lines([started] + rest + [{"type": "end_of_execution"}]),
+        )
+
+    return handle
+
+
+@pytest.fixture(autouse=True)
+def _no_resume_delay(monkeypatch):
+    monkeypatch.setattr(code_interpreter_sync, "RESUME_DELAY", 0)
+    monkeypatch.setattr(code_interpreter_async, "RESUME_DELAY", 0)
+
+
+def _assert_resumed(execution, requests):
+    assert json.loads(requests[0].content)["resumable"] is True
+    assert execution.execution_count == 1
+    assert execution.logs.stdout == ["1\n", "2\n", "3\n"]
+    assert [r.method for r in requests] == ["POST", "GET"]
+    assert requests[1].url.params["last_seq"] == "2"
+
+
+def test_run_code_resumes_dropped_stream(fake_sandbox):
+    requests = []
+    client = httpx.Client(transport=httpx.MockTransport(_handler(requests)))
+
+    execution = fake_sandbox(Sandbox, client).run_code("work()", resumable=True)
+    _assert_resumed(execution, requests)
+
+
+async def test_async_run_code_resumes_dropped_stream(fake_sandbox):
+    requests = []
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler(requests)))
+
+    execution = await fake_sandbox(AsyncSandbox, client).run_code(
+        "work()", resumable=True
+    )
+    _assert_resumed(execution, requests)
+
+
+def test_dropped_stream_is_not_resumed_by_default(fake_sandbox):
+    requests = []
+    client = httpx.Client(transport=httpx.MockTransport(_handler(requests)))
+    sandbox = fake_sandbox(Sandbox, client)
+    sandbox.is_running = lambda: True
+
+    with pytest.raises(httpx.ReadError):
+        sandbox.run_code("work()", resumable=False)
@@ -0,0 +1,225 @@
+"""
+Fork server ("zygote") for Python kernels.
+
+`serve` runs a long-lived process that imports the common data stack once and forks a
+copy of itself for every new kernel, so neither context creation nor the first cell
+pays the import cost, and the preloaded modules are shared copy-on-write between
+kernels.
+
+`launch` is what the python3 kernelspec runs in place of `ipykernel_launcher`. It asks
+the zygote for a kernel, forwards signals to it and exits when it exits, so to
+jupyter-server it looks like a regular kernel process. When the zygote isn't running
+it falls back to starting `ipykernel_launcher` directly.
+
+A forked kernel starts from the zygote's state, not from a fresh interpreter. The
+preloaded modules read their environment and configuration when the zygote imported
+them, so a kernel's own environment variables only apply to modules it imports
+later (e.g. a different `MATPLOTLIBRC` or `MPLBACKEND` is ignored). Threads don't
+survive a fork, so the zygote keeps the BLAS and OpenMP thread pools at a single
+thread while it imports numpy and co., and every kernel widens them again right
+after the fork, see `_restore_thread_limits`.
+"""
+
+import atexit
+import gc
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+
+SOCKET_PATH = os.getenv("E2B_KERNEL_ZYGOTE_SOCKET", "/run/kernel-zygote.sock")
+PRELOAD_MODULES = os.getenv(
+    "E2B_KERNEL_ZYGOTE_PRELOAD",
+    "numpy,pandas,matplotlib,matplotlib.pyplot,PIL.Image,IPython,ipykernel.kernelapp",
+)
+
+FORWARDED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT)
+
+# Sizes of the thread pools started by numpy's BLAS and by OpenMP when they're
+# imported, fixed to one thread in the zygote
+THREAD_LIMIT_VARIABLES = ("OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def _send(conn: socket.socket, message: dict):
+    conn.sendall(json.dumps(message).encode() + b"\n")
+
+
+def _preload():
+    # matplotlib reads the backend when it's imported, so it has to be the
+    # inline backend already, ipykernel only sets it later in the forked kernel.
+    os.environ.setdefault("MPLBACKEND", "module://matplotlib_inline.backend_inline")
+
+    # A kernel forked while these pools have worker threads only gets the calling
+    # thread, and hangs on its first parallel BLAS call waiting for the others.
+    for name in THREAD_LIMIT_VARIABLES:
+        os.environ[name] = "1"
+
+    for name in PRELOAD_MODULES.split(","):
+        name = name.strip()
+        if not name:
+            continue
+
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"Failed to preload {name}: {e}", file=sys.stderr)
+
+    # Move everything imported so far out of the GC's reach, otherwise the
+    # collector touches these objects in every kernel and un-shares their pages.
+    gc.collect()
+    gc.freeze()
+
+
+def _restore_thread_limits():
+    """
+    Size the BLAS and OpenMP thread pools as a cold start of the kernel would, from
+    its environment or the number of CPUs. Their threads are started in the kernel,
+    after the fork. Without threadpoolctl they stay at a single thread.
+    """
+    if "numpy" not in sys.modules:
+        return
+
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+
+    try:
+        limit = int(
+            os.environ.get("OPENBLAS_NUM_THREADS") or os.environ["OMP_NUM_THREADS"]
+        )
+    except (KeyError, ValueError):
+        limit = os.cpu_count()
+
+    threadpool_limits(limits=limit)
+
+
+def _watch_launcher(conn: socket.socket):
+    # The launcher never sends anything, the read only returns when it exits
+    # (including SIGKILL), and a kernel without its launcher is unreachable.
+    try:
+        conn.recv(1)
+    finally:
+        os._exit(1)
+
+
+def _run_kernel(conn: socket.socket, request: dict):
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+    os.environ.clear()
+    os.environ.update(request["env"])
+    os.chdir(request["cwd"])
+    sys.argv = request["argv"]
+    _restore_thread_limits()
+
+    # Every kernel would otherwise continue the zygote's random sequence.
+    numpy = sys.modules.get("numpy")
+    if numpy is not None:
+        numpy.random.seed()
+
+    _send(conn, {"pid": os.getpid()})
+    threading.Thread(target=_watch_launcher, args=(conn,), daemon=True).start()
+
+    code = 0
+    try:
+        from ipykernel import kernelapp
+
+        kernelapp.launch_new_instance()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException as e:
+        print(f"Kernel failed: {e}", file=sys.stderr)
+        code = 1
+    finally:
+        atexit._run_exitfuncs()
+        try:
+            _send(conn, {"exit": code})
+        except OSError:
+            pass
+        os._exit(code)
+
+
+def serve():
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+
+    # Listen before preloading: launchers that connect in the meantime queue
+    # up in the backlog instead of falling back to a cold start.
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0o600)
+    server.listen(64)
+
+    _preload()
+
+    # Kernels are reaped automatically, the launcher tracks their lifetime.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    while True:
+        conn, _ = server.accept()
+        try:
+            with conn.makefile("rb") as reader:
+                request = json.loads(reader.readline())
+        except Exception as e:
+            print(f"Invalid kernel request: {e}", file=sys.stderr)
+            conn.close()
+            continue
+
+        if os.fork() == 0:
+            server.close()
+            _run_kernel(conn, request)
+
+        conn.close()
+
+
+def launch(argv: list):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(SOCKET_PATH)
+    except OSError:
+        conn.close()
+        os.execv(sys.executable, [sys.executable, "-m", "ipykernel_launcher", *argv])
+
+    _send(
+        conn,
+        {
+            "argv": ["ipykernel_launcher", *argv],
+            "env": dict(os.environ),
+            "cwd": os.getcwd(),
+        },
+    )
+
+    reader = conn.makefile("rb")
+    pid = json.loads(reader.readline())["pid"]
+
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    for signum in FORWARDED_SIGNALS:
+        signal.signal(signum, forward)
+
+    # The kernel reports its exit code right before the socket closes.
+    code = 1
+    for line in reader:
+        code = json.loads(line).get("exit", code)
+
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("serve", "launch"):
+        print(
+            f"Usage: {sys.argv[0]} serve | launch -f CONNECTION_FILE", file=sys.stderr
+        )
+        sys.exit(2)
+
+    if sys.argv[1] == "serve":
+        serve()
+    else:
+        launch(sys.argv[2:])
@@ -0,0 +1,12 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class DataFrameRows(BaseModel):
+    columns: list[Any] = Field(description="Names of the columns")
+    index: list[Any] = Field(description="Index labels of the rows")
+    data: list[list[Any]] = Field(description="Values of the rows, one list per row")
+    start: int = Field(description="Position of the first row")
+    stop: int = Field(description="Position after the last row")
+    total_rows: int = Field(description="Number of rows of the whole DataFrame")
@@ -1,17 +1,14 @@
-from typing import Optional
-from pydantic import BaseModel, StrictStr
-from pydantic import Field
+from typing import ClassVar, Optional
 
-from api.models.output import OutputType
+from api.models.output import Output, OutputType
 
 
-class Error(BaseModel):
-    type: OutputType = OutputType.ERROR
+class Error(Output, tag=OutputType.ERROR.value):
+    type: ClassVar[OutputType] = OutputType.ERROR
 
-    name: Optional[StrictStr] = Field(default=None, description="Name of the exception")
-    value: Optional[StrictStr] = Field(
-        default=None, description="Value of the exception"
-    )
-    traceback: Optional[StrictStr] = Field(
-        default=None, description="Traceback of the exception"
-    )
+    name: Optional[str] = None
+    "Name of the exception"
+    value: Optional[str] = None
+    "Value of the exception"
+    traceback: Optional[str] = None
+    "Traceback of the exception"
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field, StrictStr
+
+from api.models.execution_request import StreamMode
+
+ExecutionStatus = Literal["queued", "running", "finished"]
+
+
+class ExecutionInfo(BaseModel):
+    id: StrictStr = Field(description="Execution ID")
+    context_id: StrictStr = Field(description="ID of the context the code runs in")
+    status: ExecutionStatus = Field(
+        description="`queued` until the context starts running the code, `finished` once it's done"
+    )
+    started_at: datetime = Field(description="When the execution was submitted")
+    finished_at: datetime | None = Field(
+        default=None, description="When the execution finished"
+    )
+    stream_mode: StreamMode = Field(
+        default="raw", description="Stream mode the execution was submitted with"
+    )
+
+
+class ExecutionCancellation(BaseModel):
+    id: StrictStr = Field(description="Execution ID")
+    cancelled: bool = Field(
+        description="Whether the execution was still queued or running, and so cancelled"
+    )
+    interrupts: int = Field(
+        description="Number of kernel interrupts sent, 0 for a queued execution"
+    )
+    forced: bool = Field(
+        description="Whether the execution ignored the interrupts and was abandoned without the kernel confirming"
+    )
+    latency_ms: float = Field(
+        description="Time from the request until the execution ended, in milliseconds"
+    )
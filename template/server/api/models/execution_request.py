@@ -1,9 +1,45 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, StrictStr
 from pydantic import Field
 
 from .env_vars import EnvVars
 
+BackpressurePolicy = Literal["pause", "drop", "spill"]
+
+StreamMode = Literal["raw", "compact"]
+
+DataFrameMode = Literal["full", "summary"]
+
+ImageFormat = Literal["png", "jpeg", "webp"]
+
+
+class ImagePolicy(BaseModel):
+    max_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Largest width or height of images in pixels, larger ones are scaled down keeping their aspect ratio",
+    )
+    dpi: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Highest DPI matplotlib figures are rendered with",
+    )
+    format: Optional[ImageFormat] = Field(
+        default=None,
+        description="Format to encode the images in, as they are if not set",
+    )
+    quality: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100,
+        description="Quality of JPEG and WebP images",
+    )
+    thumbnail_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Largest width or height of a thumbnail sent as a result with `is_thumbnail` before each image",
+    )
+
 
 class ExecutionRequest(BaseModel):
     code: StrictStr = Field(description="Code to be executed")
@@ -14,3 +50,109 @@ class ExecutionRequest(BaseModel):
     env_vars: Optional[EnvVars] = Field(
         description="Environment variables", default=None
     )
+    stream_coalesce_ms: Optional[float] = Field(
+        default=None,
+        ge=0,
+        description="Merge consecutive stdout/stderr chunks for up to this many milliseconds",
+    )
+    stream_coalesce_bytes: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Maximum size of merged stdout/stderr chunks",
+    )
+    stream_mode: Optional[StreamMode] = Field(
+        default="raw",
+        description="How stdout/stderr and display updates are streamed, `compact` sends only the latest state of redrawn lines and display updates",
+    )
+    stream_progress_interval_ms: Optional[float] = Field(
+        default=None,
+        ge=0,
+        description="Minimum time between redraws of a line in the compact stream mode",
+    )
+    max_output_bytes: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Bytes of stdout and stderr to send, the rest is written to a file in the sandbox",
+    )
+    max_results: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Number of results to send, the rest is written to files in the sandbox",
+    )
+    max_result_bytes: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Total size of results to send, the rest is written to files in the sandbox",
+    )
+    backpressure: Optional[BackpressurePolicy] = Field(
+        default=None,
+        description="What to do when the client reads the outputs slower than they're produced: `pause` the kernel's output, `drop` stdout/stderr chunks or `spill` them to disk",
+    )
+    resumable: Optional[bool] = Field(
+        default=False,
+        description="Keep the execution running if the connection drops and buffer its outputs, so the client can attach to it again with `GET /executions/{id}/stream`",
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds the code can run before the kernel is interrupted and the execution ends with an `ExecutionTimeout` error, keeping the outputs produced until then",
+    )
+    formats: Optional[List[StrictStr]] = Field(
+        default=None,
+        min_length=1,
+        description="Result formats to compute and send, by name (e.g. `text`, `png`, `data`) or MIME type, all of them if not set. Python kernels skip computing the others",
+    )
+    blob_threshold_bytes: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Result formats larger than this many bytes are stored in the blob store and sent as references in `blobs`, fetch them with `GET /blobs/{hash}`",
+    )
+    dedupe_session: Optional[StrictStr] = Field(
+        default=None,
+        description="ID of the client's session, result formats already sent to it are sent again only as references in `blobs` to the `hashes` of the earlier results",
+    )
+    dataframe_mode: Optional[DataFrameMode] = Field(
+        default=None,
+        description="`summary` sends only the schema, a head and tail preview and statistics of displayed DataFrames instead of all of their rows, fetch the rows with `GET /contexts/{context_id}/dataframes/{dataframe_id}/rows`",
+    )
+    image_policy: Optional[ImagePolicy] = Field(
+        default=None,
+        description="Size, DPI and format of displayed images, and thumbnails sent before them. Only for Python",
+    )
+
+
+class BatchExecutionRequest(BaseModel):
+    cells: List[StrictStr] = Field(
+        min_length=1, description="Code of the cells to be executed in order"
+    )
+    context_id: Optional[StrictStr] = Field(default=None, description="Context ID")
+    language: Optional[StrictStr] = Field(
+        default=None, description="Language of the code"
+    )
+    env_vars: Optional[EnvVars] = Field(
+        description="Environment variables", default=None
+    )
+    stop_on_error: bool = Field(
+        default=True,
+        description="Skip the cells after the first one that fails, they end with an `ExecutionAborted` error",
+    )
+
+
+class FanoutExecutionRequest(BaseModel):
+    code: StrictStr = Field(description="Code to be executed")
+    context_ids: List[StrictStr] = Field(
+        min_length=1, description="Contexts to execute the code in"
+    )
+    env_vars: Optional[EnvVars] = Field(
+        description="Environment variables", default=None
+    )
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Contexts executing the code at the same time, at most the server's `E2B_FANOUT_MAX_CONCURRENCY`",
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds the code can run in each context before it's interrupted and ends with an `ExecutionTimeout` error",
+    )
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class ImageSavePolicy(BaseModel):
+    enabled: bool = Field(
+        default=True,
+        description="Whether PIL images saved to a path are displayed at all",
+    )
+    max_displays: int | None = Field(
+        default=None,
+        ge=0,
+        description="Saved images displayed in each execution, the rest are summarized in a single `image_saves` result after it",
+    )
+    contact_sheet: bool = Field(
+        default=False,
+        description="Add a contact sheet of thumbnails of the images that weren't displayed to the summary",
+    )
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+
+class KernelPoolSize(BaseModel):
+    size: int = Field(ge=0, description="Number of idle kernels to keep warm")
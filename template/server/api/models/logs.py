@@ -1,19 +1,20 @@
 import datetime
 
 
-from typing import Optional
-from pydantic import BaseModel, StrictStr
+from typing import ClassVar, Optional, Union
 
-from api.models.output import OutputType
+from api.models.output import Output, OutputType
 
 
-class Stdout(BaseModel):
-    type: OutputType = OutputType.STDOUT
-    text: Optional[StrictStr] = None
-    timestamp: Optional[datetime.datetime] = None
+class Stdout(Output, tag=OutputType.STDOUT.value):
+    type: ClassVar[OutputType] = OutputType.STDOUT
+    text: Optional[str] = None
+    # The kernel's message date, as an ISO 8601 string over the websocket
+    # and already parsed when talking to the kernel directly
+    timestamp: Optional[Union[str, datetime.datetime]] = None
 
 
-class Stderr(BaseModel):
-    type: OutputType = OutputType.STDERR
-    text: Optional[StrictStr] = None
-    timestamp: Optional[datetime.datetime] = None
+class Stderr(Output, tag=OutputType.STDERR.value):
+    type: ClassVar[OutputType] = OutputType.STDERR
+    text: Optional[str] = None
+    timestamp: Optional[Union[str, datetime.datetime]] = None
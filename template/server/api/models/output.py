@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from enum import Enum
-from pydantic import BaseModel
+from typing import ClassVar, Optional
+
+import msgspec
 
 
 class OutputType(Enum):
@@ -16,16 +18,82 @@ class OutputType(Enum):
     NUMBER_OF_EXECUTIONS = "number_of_executions"
     END_OF_EXECUTION = "end_of_execution"
     UNEXPECTED_END_OF_EXECUTION = "unexpected_end_of_execution"
+    KEEPALIVE = "keepalive"
+    CLEAR_OUTPUT = "clear_output"
+    OUTPUT_TRUNCATED = "output_truncated"
+    EXECUTION_STARTED = "execution_started"
+    EXECUTION_QUEUED = "execution_queued"
+
+
+class Output(msgspec.Struct, kw_only=True, omit_defaults=True, tag_field="type"):
+    """
+    Base for everything streamed to the client from an execution.
+
+    The output type is encoded as the `type` tag, fields left at their default
+    (`None` for the optional ones) aren't sent at all.
+    """
 
+    type: ClassVar[OutputType]
+    seq: Optional[int] = None
+    "Position of the output in a resumable execution's stream, starting at 1"
+    cell: Optional[int] = None
+    "Index of the cell the output belongs to in a batch execution"
+    context_id: Optional[str] = None
+    "Context the output belongs to in a fan-out execution"
 
-class EndOfExecution(BaseModel):
-    type: OutputType = OutputType.END_OF_EXECUTION
 
+class EndOfExecution(Output, tag=OutputType.END_OF_EXECUTION.value):
+    type: ClassVar[OutputType] = OutputType.END_OF_EXECUTION
 
-class UnexpectedEndOfExecution(BaseModel):
-    type: OutputType = OutputType.UNEXPECTED_END_OF_EXECUTION
 
+class UnexpectedEndOfExecution(
+    Output, tag=OutputType.UNEXPECTED_END_OF_EXECUTION.value
+):
+    type: ClassVar[OutputType] = OutputType.UNEXPECTED_END_OF_EXECUTION
 
-class NumberOfExecutions(BaseModel):
-    type: OutputType = OutputType.NUMBER_OF_EXECUTIONS
+
+class NumberOfExecutions(Output, tag=OutputType.NUMBER_OF_EXECUTIONS.value):
+    type: ClassVar[OutputType] = OutputType.NUMBER_OF_EXECUTIONS
     execution_count: int
+
+
+class Keepalive(Output, tag=OutputType.KEEPALIVE.value):
+    type: ClassVar[OutputType] = OutputType.KEEPALIVE
+
+
+class ExecutionStarted(Output, tag=OutputType.EXECUTION_STARTED.value):
+    """First output of a resumable execution's stream, with the ID to attach to it again."""
+
+    type: ClassVar[OutputType] = OutputType.EXECUTION_STARTED
+    execution_id: str
+
+
+class ExecutionQueued(Output, tag=OutputType.EXECUTION_QUEUED.value):
+    """The execution waits for others in its context, sent again whenever it moves up."""
+
+    type: ClassVar[OutputType] = OutputType.EXECUTION_QUEUED
+    position: int
+    "Executions ahead of this one, including the running one"
+
+
+class ClearOutput(Output, tag=OutputType.CLEAR_OUTPUT.value):
+    """The outputs sent so far were cleared, e.g. by IPython's `clear_output`."""
+
+    type: ClassVar[OutputType] = OutputType.CLEAR_OUTPUT
+
+
+class OutputTruncated(Output, tag=OutputType.OUTPUT_TRUNCATED.value):
+    """
+    Output over the execution's budget was written to a file instead of being sent,
+    or dropped because the client couldn't keep up with it.
+    """
+
+    type: ClassVar[OutputType] = OutputType.OUTPUT_TRUNCATED
+    output: str
+    "Which output was truncated, `stdout`, `stderr` or `results`"
+    total_bytes: int
+    "Size of all of the output, sent and truncated"
+    truncated_bytes: int
+    "Size of the output that wasn't sent"
+    path: Optional[str] = None
+    "File (or for results, directory) in the sandbox the rest of the output is in, `None` if it was dropped"
@@ -1,16 +1,48 @@
 from __future__ import annotations
 
-import warnings
+from typing import ClassVar, Collection, Dict, Iterable, List, Optional
 
-from typing import Optional, Iterable
-from pydantic import BaseModel
+import msgspec
 
-from api.models.output import OutputType
+from api.models.output import Output, OutputType
 
-warnings.filterwarnings("ignore", category=UserWarning)
+# MIME types of the result formats, other MIME types are kept in `extra`
+FORMAT_MIME_TYPES = {
+    "text": "text/plain",
+    "html": "text/html",
+    "markdown": "text/markdown",
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+    "latex": "text/latex",
+    "json": "application/json",
+    "javascript": "application/javascript",
+    "data": "e2b/data",
+    "arrow": "e2b/arrow",
+    "dataframe": "e2b/dataframe",
+    "chart": "e2b/chart",
+    "image_saves": "e2b/image_saves",
+}
 
 
-class Result(BaseModel):
+def format_mime_types(formats: Collection[str]) -> List[str]:
+    """MIME types of the formats, given by their name or MIME type."""
+    return list(dict.fromkeys(FORMAT_MIME_TYPES.get(f, f) for f in formats))
+
+
+class BlobReference(msgspec.Struct):
+    """A result format stored in the blob store, fetched with `GET /blobs/{hash}`."""
+
+    hash: str
+    "SHA-256 of the stored content"
+    size: int
+    "Size of the stored content in bytes"
+    mime_type: str
+
+
+class Result(Output, tag=OutputType.RESULT.value):
     """
     Represents the data to be displayed as a result of executing a cell in a Jupyter notebook.
     The result is similar to the structure returned by ipython kernel: https://ipython.readthedocs.io/en/stable/development/execution.html#execution-semantics
@@ -20,7 +52,7 @@ class Result(BaseModel):
     for the actual result the representation is always present for the result, the other representations are always optional.
     """
 
-    type: OutputType = OutputType.RESULT
+    type: ClassVar[OutputType] = OutputType.RESULT
 
     text: Optional[str] = None
     html: Optional[str] = None
@@ -28,41 +60,80 @@ class Result(BaseModel):
     svg: Optional[str] = None
     png: Optional[str] = None
     jpeg: Optional[str] = None
+    webp: Optional[str] = None
     pdf: Optional[str] = None
     latex: Optional[str] = None
     json: Optional[dict] = None
     javascript: Optional[str] = None
     data: Optional[dict] = None
+    arrow: Optional[str] = None
+    "DataFrame as an Arrow IPC stream, base64 encoded."
+    dataframe: Optional[dict] = None
+    "Summary of a DataFrame in the `summary` DataFrame mode, instead of its rows."
     chart: Optional[dict] = None
+    image_saves: Optional[dict] = None
+    "Count and paths of the PIL images saved in the execution that weren't displayed."
     extra: Optional[dict] = None
     "Extra data that can be included. Not part of the standard types."
+    blobs: Optional[Dict[str, BlobReference]] = None
+    "Formats stored in the blob store instead of being sent, by format name."
+    hashes: Optional[Dict[str, str]] = None
+    "SHA-256 of formats sent in a deduplicated session, later references in `blobs` can point to them."
 
     is_main_result: Optional[bool] = None
     "Whether this data is the result of the execetution. Data can be produced by display calls of which can be multiple in a cell."
 
-    def __init__(self, is_main_result: bool, data: [str, str]):
-        super().__init__()
-        self.is_main_result = is_main_result
+    is_thumbnail: Optional[bool] = None
+    "Whether this is a thumbnail of the image in the next result, sent first with the `thumbnail_size` image policy."
 
-        self.text = data.pop("text/plain", None)
-        if self.text and (
-            (self.text.startswith("'") and self.text.endswith("'"))
-            or (self.text.startswith('"') and self.text.endswith('"'))
+    display_id: Optional[str] = None
+    "ID of the display the data belongs to, results with the same ID replace the earlier ones."
+
+    @classmethod
+    def from_data(
+        cls,
+        is_main_result: bool,
+        data: [str, str],
+        display_id: Optional[str] = None,
+        mime_types: Optional[Collection[str]] = None,
+    ) -> "Result":
+        """
+        The result of the kernel's display data. With `mime_types`, only the data
+        of those is kept.
+        """
+        is_thumbnail = data.pop("e2b/thumbnail", None)
+        if mime_types is not None:
+            data = {key: value for key, value in data.items() if key in mime_types}
+
+        text = data.pop("text/plain", None)
+        if text and (
+            (text.startswith("'") and text.endswith("'"))
+            or (text.startswith('"') and text.endswith('"'))
         ):
-            self.text = self.text[1:-1]
-
-        self.html = data.pop("text/html", None)
-        self.markdown = data.pop("text/markdown", None)
-        self.svg = data.pop("image/svg+xml", None)
-        self.png = data.pop("image/png", None)
-        self.jpeg = data.pop("image/jpeg", None)
-        self.pdf = data.pop("application/pdf", None)
-        self.latex = data.pop("text/latex", None)
-        self.json = data.pop("application/json", None)
-        self.javascript = data.pop("application/javascript", None)
-        self.data = data.pop("e2b/data", None)
-        self.chart = data.pop("e2b/chart", None)
-        self.extra = data
+            text = text[1:-1]
+
+        return cls(
+            is_main_result=is_main_result,
+            display_id=display_id,
+            text=text,
+            html=data.pop("text/html", None),
+            markdown=data.pop("text/markdown", None),
+            svg=data.pop("image/svg+xml", None),
+            png=data.pop("image/png", None),
+            jpeg=data.pop("image/jpeg", None),
+            webp=data.pop("image/webp", None),
+            pdf=data.pop("application/pdf", None),
+            latex=data.pop("text/latex", None),
+            json=data.pop("application/json", None),
+            javascript=data.pop("application/javascript", None),
+            data=data.pop("e2b/data", None),
+            arrow=data.pop("e2b/arrow", None),
+            dataframe=data.pop("e2b/dataframe", None),
+            chart=data.pop("e2b/chart", None),
+            image_saves=data.pop("e2b/image_saves", None),
+            is_thumbnail=is_thumbnail,
+            extra=data,
+        )
 
     def formats(self) -> Iterable[str]:
         formats = []
@@ -74,12 +145,16 @@ class Result(BaseModel):
             "svg",
             "png",
             "jpeg",
+            "webp",
             "pdf",
             "latex",
             "json",
             "javascript",
             "data",
+            "arrow",
+            "dataframe",
             "chart",
+            "image_saves",
         ]:
             if getattr(self, key):
                 formats.append(key)
@@ -88,6 +163,9 @@ class Result(BaseModel):
             for key in self.extra:
                 formats.append(key)
 
+        if self.blobs:
+            formats.extend(self.blobs)
+
         return formats
 
     def __str__(self) -> str:
@@ -0,0 +1,100 @@
+"""
+Microbenchmark of the /execute stream encoding.
+
+Compares the previous encoding path (pydantic model -> `model_dump` ->
+`jsonable_encoder` -> `json.dumps` -> str) with the current one (msgspec struct ->
+bytes) on a mix of stdout chunks, keepalives and results, and prints messages/second
+for both.
+
+Run from `template/server`:
+
+    python -m benchmarks.stream_encoding [--messages 100000]
+"""
+
+import argparse
+import datetime
+import json
+import time
+from collections.abc import Callable
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from api.models.logs import Stdout
+from api.models.output import Keepalive
+from api.models.result import Result
+from stream import encode_line
+
+
+class LegacyStdout(BaseModel):
+    type: str = "stdout"
+    text: str | None = None
+    timestamp: datetime.datetime | None = None
+
+
+class LegacyResult(BaseModel):
+    type: str = "result"
+    text: str | None = None
+    png: str | None = None
+    extra: dict | None = None
+    is_main_result: bool | None = None
+
+
+PNG = "iVBORw0KGgo" * 2_000
+TIMESTAMP = "2024-01-01T00:00:00.000000Z"
+
+
+def legacy_messages(count: int) -> list:
+    messages = []
+    for i in range(count):
+        if i % 100 == 99:
+            messages.append(
+                LegacyResult(text="<Figure>", png=PNG, extra={}, is_main_result=False)
+            )
+        elif i % 50 == 49:
+            messages.append({"type": "keepalive"})
+        else:
+            messages.append(LegacyStdout(text=f"line {i}\n", timestamp=TIMESTAMP))
+    return messages
+
+
+def current_messages(count: int) -> list:
+    messages = []
+    for i in range(count):
+        if i % 100 == 99:
+            messages.append(
+                Result.from_data(False, {"text/plain": "<Figure>", "image/png": PNG})
+            )
+        elif i % 50 == 49:
+            messages.append(Keepalive())
+        else:
+            messages.append(Stdout(text=f"line {i}\n", timestamp=TIMESTAMP))
+    return messages
+
+
+def legacy_encode(item) -> str:
+    if isinstance(item, BaseModel):
+        item = item.model_dump(exclude_none=True)
+    return f"{json.dumps(jsonable_encoder(item))}\n"
+
+
+def run(name: str, encode: Callable, messages: list):
+    start = time.perf_counter()
+    for item in messages:
+        encode(item)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>8}: {len(messages) / elapsed:>12,.0f} messages/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run("legacy", legacy_encode, legacy_messages(args.messages))
+    run("msgspec", encode_line, current_messages(args.messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,9 @@
 import logging
-import uuid
 from typing import Optional
 
 from api.models.context import Context
 from fastapi.responses import PlainTextResponse
 
-from consts import JUPYTER_BASE_URL
 from errors import ExecutionError
 from messaging import ContextWebSocket
 
@@ -34,39 +32,43 @@ def normalize_language(language: Optional[str]) -> str:
     return language
 
 
-async def create_context(client, websockets: dict, language: str, cwd: str) -> Context:
-    data = {
-        "path": str(uuid.uuid4()),
-        "kernel": {"name": get_kernel_for_language(language)},
-        "type": "notebook",
-        "name": str(uuid.uuid4()),
-    }
+async def start_kernel(kernels, language: str, cwd: str) -> ContextWebSocket:
+    """Start a new kernel and connect to it."""
     logger.debug(f"Creating new {language} context")
 
-    response = await client.post(f"{JUPYTER_BASE_URL}/api/sessions", json=data)
-
-    if not response.is_success:
-        raise Exception(
-            f"Failed to create context: {response.text}",
-        )
-
-    session_data = response.json()
-    session_id = session_data["id"]
-    context_id = session_data["kernel"]["id"]
+    context_id, session_id = await kernels.start(get_kernel_for_language(language))
 
     logger.debug(f"Created context {context_id}")
 
-    ws = ContextWebSocket(context_id, session_id, language, cwd)
+    ws = kernels.connection(context_id, session_id, language, cwd)
     await ws.connect()
-    websockets[context_id] = ws
-
-    logger.info(f"Setting working directory to {cwd}")
-    try:
-        await ws.change_current_directory(cwd, language)
-    except ExecutionError:
-        return PlainTextResponse(
-            "Failed to set working directory",
-            status_code=500,
-        )
-
-    return Context(language=language, id=context_id, cwd=cwd)
+
+    return ws
+
+
+async def create_context(
+    kernels, websockets: dict, language: str, cwd: str, pool=None
+) -> Context:
+    # Pooled kernels are already connected and sitting in the pool's cwd,
+    # so a hit only pays for the directory change when the cwd differs.
+    ws = pool.acquire(language) if pool else None
+    if ws is None:
+        ws = await start_kernel(kernels, language, cwd)
+        needs_cwd = True
+    else:
+        needs_cwd = ws.cwd != cwd
+        ws.cwd = cwd
+
+    websockets[ws.context_id] = ws
+
+    if needs_cwd:
+        logger.info(f"Setting working directory to {cwd}")
+        try:
+            await ws.change_current_directory(cwd, language)
+        except ExecutionError:
+            return PlainTextResponse(
+                "Failed to set working directory",
+                status_code=500,
+            )
+
+    return Context(language=language, id=ws.context_id, cwd=cwd)
@@ -6,6 +6,67 @@ import httpx
 LOCAL = os.getenv("E2B_LOCAL", False)
 ENVD_PORT = 49983
 
+# "jupyter-server" talks to kernels through a separate jupyter-server process,
+# "in-process" starts and manages them in this server with jupyter_client
+KERNEL_MANAGER = os.getenv("E2B_KERNEL_MANAGER", "jupyter-server")
+
+# Target number of idle kernels kept warm per language, e.g. "python=2,javascript=1".
+# Empty by default, so no kernels are started ahead of time unless asked for
+KERNEL_POOL_SIZES = os.getenv("E2B_KERNEL_POOL_SIZES", "")
+
+# Where output over an execution's budget is written, one directory per execution
+OUTPUT_SPILL_DIR = os.getenv("E2B_OUTPUT_SPILL_DIR", "/tmp/e2b/executions")
+
+# Outputs of an execution buffered in memory for a slow client, and what happens
+# when they fill up: "pause", "drop" or "spill", see utils/queues.py
+EXECUTION_QUEUE_SIZE = int(os.getenv("E2B_EXECUTION_QUEUE_SIZE", "1024"))
+BACKPRESSURE_POLICY = os.getenv("E2B_BACKPRESSURE_POLICY", "pause")
+BACKPRESSURE_PAUSE_TIMEOUT = float(os.getenv("E2B_BACKPRESSURE_PAUSE_TIMEOUT", "10"))
+
+# Executions waiting for a busy context before new ones are rejected, 0 for no limit
+CONTEXT_QUEUE_MAX_WAITING = int(os.getenv("E2B_CONTEXT_QUEUE_MAX_WAITING", "64"))
+
+# Contexts a fan-out execution runs the code in at the same time, also the most a
+# request can ask for
+FANOUT_MAX_CONCURRENCY = int(os.getenv("E2B_FANOUT_MAX_CONCURRENCY", "16"))
+
+# Where result payloads over an execution's blob threshold are stored, and how many
+# bytes of them are kept, the oldest are removed first
+BLOB_DIR = os.getenv("E2B_BLOB_DIR", "/tmp/e2b/blobs")
+BLOB_STORE_MAX_BYTES = int(
+    os.getenv("E2B_BLOB_STORE_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+
+# Client sessions that result formats are deduplicated for, how many of the latest
+# formats sent each one remembers, and the smallest format worth deduplicating
+DEDUPE_MAX_SESSIONS = int(os.getenv("E2B_DEDUPE_MAX_SESSIONS", "256"))
+DEDUPE_SESSION_MAX_PAYLOADS = int(os.getenv("E2B_DEDUPE_SESSION_MAX_PAYLOADS", "256"))
+DEDUPE_MIN_BYTES = int(os.getenv("E2B_DEDUPE_MIN_BYTES", "1024"))
+
+# Most rows of a DataFrame sent in a single page
+DATAFRAME_ROWS_MAX_PAGE = int(os.getenv("E2B_DATAFRAME_ROWS_MAX_PAGE", "10000"))
+# Seconds fetching a page of rows may run before the kernel is interrupted
+DATAFRAME_ROWS_TIMEOUT = float(os.getenv("E2B_DATAFRAME_ROWS_TIMEOUT", "30"))
+
+# Outputs of a resumable execution kept for clients attaching again, and for how
+# many seconds after the execution finished, also how long the results of detached
+# executions are kept
+EXECUTION_REPLAY_BUFFER_SIZE = int(
+    os.getenv("E2B_EXECUTION_REPLAY_BUFFER_SIZE", "4096")
+)
+EXECUTION_REPLAY_TTL = float(os.getenv("E2B_EXECUTION_REPLAY_TTL", "600"))
+# Seconds to keep interrupting a cancelled execution before giving up on it
+EXECUTION_CANCEL_TIMEOUT = float(os.getenv("E2B_EXECUTION_CANCEL_TIMEOUT", "10"))
+# Total size of the kept results of detached executions, the oldest are evicted first
+EXECUTION_RESULTS_MAX_BYTES = int(
+    os.getenv("E2B_EXECUTION_RESULTS_MAX_BYTES", str(256 * 1024 * 1024))
+)
+# Size of the result of a single detached execution, the oldest stdout, stderr and
+# results over it are dropped while it runs
+EXECUTION_RESULT_MAX_BYTES = int(
+    os.getenv("E2B_EXECUTION_RESULT_MAX_BYTES", str(32 * 1024 * 1024))
+)
+
 
 async def get_envs(access_token: Optional[str]) -> dict:
     if LOCAL:
@@ -0,0 +1,424 @@
+import asyncio
+import heapq
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from itertools import islice
+
+from api.models.error import Error
+from api.models.execution import (
+    ExecutionCancellation,
+    ExecutionInfo,
+    ExecutionStatus,
+)
+from api.models.execution_request import StreamMode
+from api.models.logs import Stderr, Stdout
+from api.models.output import (
+    ExecutionQueued,
+    ExecutionStarted,
+    Keepalive,
+    OutputTruncated,
+)
+from api.models.result import Result
+from messaging import KEEPALIVE_INTERVAL, ContextWebSocket
+from stream import encode_line
+from utils.metrics import cancel_metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds between interrupts of a cancelled execution that keeps running, e.g.
+# because the code catches KeyboardInterrupt or is stuck in native code
+INTERRUPT_RETRY_INTERVAL = 1
+
+# Outputs dropped from the result of a detached execution over its size limit, by
+# the name they are reported under in `OutputTruncated`
+TRUNCATED_OUTPUTS = {Stdout: "stdout", Stderr: "stderr", Result: "results"}
+
+
+class ExecutionStream:
+    """
+    Outputs of a resumable execution, numbered with `seq` and kept in a ring buffer of
+    the last `buffer_size` of them, so a client that lost the stream can attach again
+    and continue after the last output it received.
+
+    While clients are attached, the execution waits for the slowest of them instead of
+    overwriting outputs it hasn't sent yet. Without any, the oldest outputs are
+    overwritten and attaching from before them is no longer possible.
+
+    With `keep_outputs`, the outputs are also kept for `outputs`, the final result of
+    a detached execution. Once they take more than `max_result_bytes`, the oldest
+    stdout, stderr and results are dropped, and reported with `OutputTruncated`
+    outputs at the end of the result.
+    """
+
+    def __init__(
+        self,
+        execution_id: str,
+        context_id: str,
+        buffer_size: int,
+        keep_outputs: bool = False,
+        max_result_bytes: int | None = None,
+        stream_mode: StreamMode = "raw",
+    ):
+        self.id = execution_id
+        self.context_id = context_id
+        self.stream_mode = stream_mode
+        self.started_at = datetime.now(UTC)
+        self.finished_at: datetime | None = None
+        # Filled in once finished
+        self.outputs: list | None = [] if keep_outputs else None
+        # Encoded size of the kept outputs
+        self.size = 0
+
+        self._max_result_bytes = max_result_bytes
+        # Kept outputs that can be dropped, with their size, and the ones that can't
+        self._kept: deque = deque()
+        self._pinned: list = []
+        self._total_bytes: dict[str, int] = {}
+        self._dropped_bytes: dict[str, int] = {}
+
+        self._outputs: deque = deque(maxlen=buffer_size)
+        self._buffer_size = buffer_size
+        self._seq = 0
+        self._started = False
+        self._changed = asyncio.Condition()
+        # Last seq sent to each attached client
+        self._positions: dict[object, int] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def status(self) -> ExecutionStatus:
+        if self.done:
+            return "finished"
+        # Outputs other than the queue position come once the context starts
+        # running the code
+        return "running" if self._started else "queued"
+
+    def info(self) -> ExecutionInfo:
+        return ExecutionInfo(
+            id=self.id,
+            context_id=self.context_id,
+            status=self.status,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            stream_mode=self.stream_mode,
+        )
+
+    @property
+    def first_seq(self) -> int:
+        """Seq of the oldest output still in the buffer."""
+        return self._seq - len(self._outputs) + 1
+
+    def can_resume(self, last_seq: int) -> bool:
+        return self.first_seq - 1 <= last_seq <= self._seq
+
+    async def append(self, output):
+        async with self._changed:
+            # Don't overwrite outputs an attached client hasn't received yet
+            await self._changed.wait_for(
+                lambda: (
+                    not self._positions
+                    or min(self._positions.values()) > self._seq - self._buffer_size
+                )
+            )
+
+            self._add(output)
+            self._changed.notify_all()
+
+    def _add(self, output):
+        if not isinstance(output, ExecutionQueued):
+            self._started = True
+        self._seq += 1
+        output.seq = self._seq
+        self._outputs.append(output)
+        if self.outputs is not None:
+            self._keep(output)
+
+    def _keep(self, output):
+        size = len(encode_line(output))
+        self.size += size
+
+        name = TRUNCATED_OUTPUTS.get(type(output))
+        if name is None:
+            self._pinned.append(output)
+            return
+
+        self._kept.append((output, size))
+        self._total_bytes[name] = self._total_bytes.get(name, 0) + size
+        while (
+            self._max_result_bytes is not None
+            and self.size > self._max_result_bytes
+            and self._kept
+        ):
+            dropped, dropped_size = self._kept.popleft()
+            dropped_name = TRUNCATED_OUTPUTS[type(dropped)]
+            self._dropped_bytes[dropped_name] = (
+                self._dropped_bytes.get(dropped_name, 0) + dropped_size
+            )
+            self.size -= dropped_size
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the execution to finish, returns whether it did in time."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: self.done), timeout=timeout
+                )
+            except TimeoutError:
+                return False
+        return True
+
+    async def finish(self, output=None):
+        """Mark the execution finished, after a last `output` if given."""
+        if output is not None:
+            self._add(output)
+
+        if self.outputs is not None:
+            truncations = [
+                OutputTruncated(
+                    output=name,
+                    total_bytes=self._total_bytes[name],
+                    truncated_bytes=dropped_bytes,
+                )
+                for name, dropped_bytes in self._dropped_bytes.items()
+            ]
+            self.outputs = [
+                *heapq.merge(
+                    self._pinned,
+                    (output for output, _ in self._kept),
+                    key=lambda output: output.seq,
+                ),
+                *truncations,
+            ]
+            self.size += sum(len(encode_line(output)) for output in truncations)
+            self._kept.clear()
+            self._pinned.clear()
+
+        async with self._changed:
+            self.finished_at = datetime.now(UTC)
+            self._changed.notify_all()
+
+    async def attach(self, last_seq: int = 0):
+        """
+        Stream the outputs after `last_seq` until the execution finishes, with
+        keepalives while waiting for the next one. Check `can_resume` first.
+        """
+        key = object()
+        self._positions[key] = last_seq
+
+        try:
+            yield ExecutionStarted(execution_id=self.id)
+
+            while True:
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(
+                                lambda seq=last_seq: self._seq > seq or self.done
+                            ),
+                            timeout=KEEPALIVE_INTERVAL,
+                        )
+                    except TimeoutError:
+                        yield_keepalive = True
+                    else:
+                        yield_keepalive = False
+
+                    start = last_seq - self.first_seq + 1
+                    pending = list(islice(self._outputs, max(0, start), None))
+
+                if yield_keepalive:
+                    yield Keepalive()
+                    continue
+
+                if start < 0:
+                    # Overwritten before the client attached
+                    yield Error(
+                        name="ExecutionStreamExpired",
+                        value=f"Outputs after {last_seq} are no longer buffered",
+                        traceback="",
+                    )
+                    return
+
+                for output in pending:
+                    yield output
+                    last_seq = output.seq
+                    self._positions[key] = last_seq
+
+                async with self._changed:
+                    self._changed.notify_all()
+                    if self.done and last_seq == self._seq:
+                        return
+        finally:
+            del self._positions[key]
+            # The execution might be waiting for this client
+            asyncio.create_task(self._notify())
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+
+class ExecutionRegistry:
+    """
+    Resumable and detached executions, running independently of the request that
+    started them. Finished ones are kept for `ttl` seconds for clients to attach to
+    them again or fetch their result, and the oldest results are evicted sooner when
+    they take more than `max_results_bytes` together. The result of each one is
+    limited to `max_result_bytes` already while it runs.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        ttl: float,
+        max_results_bytes: int,
+        max_result_bytes: int,
+    ):
+        self._buffer_size = buffer_size
+        self._ttl = ttl
+        self._max_results_bytes = max_results_bytes
+        self._max_result_bytes = max_result_bytes
+        self._streams: dict[str, ExecutionStream] = {}
+
+    def start(
+        self,
+        context_id: str,
+        outputs: AsyncIterator,
+        keep_outputs: bool = False,
+        stream_mode: StreamMode = "raw",
+    ) -> ExecutionStream:
+        """Run the execution streaming `outputs` in the background."""
+        self._evict()
+
+        stream = ExecutionStream(
+            str(uuid.uuid4()),
+            context_id,
+            self._buffer_size,
+            keep_outputs,
+            self._max_result_bytes,
+            stream_mode,
+        )
+        stream._task = asyncio.create_task(
+            self._run(stream, outputs), name=f"execution-{stream.id}"
+        )
+        self._streams[stream.id] = stream
+
+        logger.info(f"Started resumable execution {stream.id} in {context_id}")
+        return stream
+
+    def get(self, execution_id: str) -> ExecutionStream | None:
+        self._evict()
+        return self._streams.get(execution_id)
+
+    def list(self) -> list[ExecutionStream]:
+        self._evict()
+        return list(self._streams.values())
+
+    async def cancel(
+        self, stream: ExecutionStream, ws: ContextWebSocket, timeout: float
+    ) -> ExecutionCancellation:
+        """
+        Stop the execution. A queued one just doesn't start, a running one is
+        interrupted until it ends, at most for `timeout` seconds before it's abandoned.
+        """
+        start = time.monotonic()
+        cancelled = not stream.done
+        interrupts = 0
+        forced = False
+
+        if stream.status == "queued":
+            # Nothing to interrupt yet, the kernel might be running another execution
+            stream._task.cancel()
+            await asyncio.gather(stream._task, return_exceptions=True)
+        while not stream.done:
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                logger.warning(f"Execution {stream.id} ignored the interrupts")
+                forced = True
+                stream._task.cancel()
+                break
+
+            if await ws.interrupt():
+                interrupts += 1
+            await stream.wait(min(INTERRUPT_RETRY_INTERVAL, timeout - elapsed))
+
+        await asyncio.gather(stream._task, return_exceptions=True)
+        latency = time.monotonic() - start
+
+        if cancelled:
+            logger.info(
+                f"Cancelled execution {stream.id} in {latency * 1000:.1f} ms "
+                f"with {interrupts} interrupts"
+            )
+            cancel_metrics.inc("cancels")
+            cancel_metrics.inc("interrupts", interrupts)
+            cancel_metrics.inc("forced", forced)
+            cancel_metrics.inc("latency.seconds", latency)
+            cancel_metrics.max("latency.max_seconds", latency)
+
+        return ExecutionCancellation(
+            id=stream.id,
+            cancelled=cancelled,
+            interrupts=interrupts,
+            forced=forced,
+            latency_ms=latency * 1000,
+        )
+
+    async def close(self):
+        for stream in self._streams.values():
+            if stream._task is not None:
+                stream._task.cancel()
+
+        await asyncio.gather(
+            *(s._task for s in self._streams.values() if s._task is not None),
+            return_exceptions=True,
+        )
+        self._streams.clear()
+
+    async def _run(self, stream: ExecutionStream, outputs: AsyncIterator):
+        try:
+            async for output in outputs:
+                # Attached clients get their own keepalives
+                if isinstance(output, Keepalive):
+                    continue
+                await stream.append(output)
+        except asyncio.CancelledError:
+            await stream.finish(
+                Error(
+                    name="ExecutionCancelled",
+                    value="Execution was cancelled",
+                    traceback="",
+                )
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Resumable execution {stream.id} failed: {e}")
+            await stream.finish(
+                Error(name="ExecutionError", value=str(e), traceback="")
+            )
+        else:
+            await stream.finish()
+
+    def _evict(self):
+        now = datetime.now(UTC)
+        finished = sorted(
+            (stream for stream in self._streams.values() if stream.done),
+            key=lambda stream: stream.finished_at,
+        )
+
+        size = sum(stream.size for stream in finished)
+        for stream in finished:
+            expired = (now - stream.finished_at).total_seconds() > self._ttl
+            if not expired and size <= self._max_results_bytes:
+                break
+
+            logger.debug(f"Evicting finished execution {stream.id}")
+            del self._streams[stream.id]
+            size -= stream.size
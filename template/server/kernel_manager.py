@@ -0,0 +1,141 @@
+import logging
+import uuid
+
+from consts import JUPYTER_BASE_URL
+from envs import KERNEL_MANAGER
+from messaging import ContextKernelClient, ContextWebSocket
+
+logger = logging.getLogger(__name__)
+
+
+def kernel_spec_name(kernel_name: str) -> str:
+    """Name of the kernelspec a kernel started with `kernel_name` uses."""
+    # jupyter_client starts its native "python3" kernel for "python"
+    return "python3" if kernel_name == "python" else kernel_name
+
+
+class JupyterServerKernels:
+    """
+    Kernels managed by a separate jupyter-server process, reached over its REST API
+    and kernel websockets.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    async def start(self, kernel_name: str) -> tuple[str, str]:
+        """Start a kernel, returns the kernel and session IDs."""
+        data = {
+            "path": str(uuid.uuid4()),
+            "kernel": {"name": kernel_name},
+            "type": "notebook",
+            "name": str(uuid.uuid4()),
+        }
+
+        response = await self._client.post(
+            f"{JUPYTER_BASE_URL}/api/sessions", json=data
+        )
+
+        if not response.is_success:
+            raise Exception(
+                f"Failed to create context: {response.text}",
+            )
+
+        session_data = response.json()
+        return session_data["kernel"]["id"], session_data["id"]
+
+    async def has_kernel(self, kernel_name: str) -> bool:
+        """Whether a kernel can be started with `kernel_name`."""
+        response = await self._client.get(f"{JUPYTER_BASE_URL}/api/kernelspecs")
+        if not response.is_success:
+            raise Exception(f"Failed to list kernels: {response.text}")
+
+        return kernel_spec_name(kernel_name) in response.json()["kernelspecs"]
+
+    def connection(
+        self, context_id: str, session_id: str, language: str, cwd: str
+    ) -> ContextWebSocket:
+        return ContextWebSocket(
+            context_id, session_id, language, cwd, client=self._client
+        )
+
+    async def restart(self, context_id: str) -> bool:
+        response = await self._client.post(
+            f"{JUPYTER_BASE_URL}/api/kernels/{context_id}/restart"
+        )
+        return response.is_success
+
+    async def shutdown(self, context_id: str) -> bool:
+        response = await self._client.delete(
+            f"{JUPYTER_BASE_URL}/api/kernels/{context_id}"
+        )
+        return response.is_success
+
+    async def close(self):
+        pass
+
+
+class InProcessKernels:
+    """
+    Kernels started and managed by this server with jupyter_client, reached over ZMQ
+    directly. Skips the jupyter-server process, its JSON re-encoding of every message
+    and the localhost websocket hop.
+    """
+
+    def __init__(self, cwd: str = "/home/user"):
+        from jupyter_client.multikernelmanager import AsyncMultiKernelManager
+        from jupyter_core.paths import jupyter_runtime_dir
+
+        # Connection files default to the server's working directory otherwise
+        self._manager = AsyncMultiKernelManager(connection_dir=jupyter_runtime_dir())
+        self._cwd = cwd
+
+    async def start(self, kernel_name: str) -> tuple[str, str]:
+        """Start a kernel, returns the kernel and session IDs."""
+        kernel_id = await self._manager.start_kernel(
+            kernel_name=kernel_name, cwd=self._cwd
+        )
+        # Restart kernels that die on their own, same as jupyter-server does
+        self._manager.get_kernel(kernel_id).start_restarter()
+
+        return kernel_id, str(uuid.uuid4())
+
+    async def has_kernel(self, kernel_name: str) -> bool:
+        """Whether a kernel can be started with `kernel_name`."""
+        kernel_specs = self._manager.kernel_spec_manager.find_kernel_specs()
+        return kernel_spec_name(kernel_name) in kernel_specs
+
+    def connection(
+        self, context_id: str, session_id: str, language: str, cwd: str
+    ) -> ContextWebSocket:
+        kernel_manager = self._manager.get_kernel(context_id)
+        return ContextKernelClient(kernel_manager, session_id, language, cwd)
+
+    async def restart(self, context_id: str) -> bool:
+        try:
+            await self._manager.restart_kernel(context_id)
+        except Exception as e:
+            logger.error(f"Failed to restart kernel {context_id}: {e}")
+            return False
+
+        return True
+
+    async def shutdown(self, context_id: str) -> bool:
+        try:
+            await self._manager.shutdown_kernel(context_id)
+        except Exception as e:
+            logger.error(f"Failed to shut down kernel {context_id}: {e}")
+            return False
+
+        return True
+
+    async def close(self):
+        await self._manager.shutdown_all()
+
+
+def create_kernel_manager(client):
+    if KERNEL_MANAGER == "in-process":
+        logger.info("Managing kernels in-process")
+        return InProcessKernels()
+
+    return JupyterServerKernels(client)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from collections import deque
+
+from contexts import start_kernel
+from messaging import ContextWebSocket
+
+logger = logging.getLogger(__name__)
+
+REFILL_RETRY_DELAY = 1  # seconds before retrying a failed kernel start
+REFILL_RETRY_MAX_DELAY = 60  # the delay doubles after every failure up to this
+
+
+def parse_pool_sizes(value: str | None) -> dict[str, int]:
+    """
+    Parse pool sizes in the `python=2,javascript=1` format.
+
+    Invalid entries are skipped, so a typo doesn't prevent the server from starting.
+    """
+    sizes: dict[str, int] = {}
+    if not value:
+        return sizes
+
+    for entry in value.split(","):
+        language, _, size = entry.partition("=")
+        language = language.strip().lower()
+        try:
+            sizes[language] = max(0, int(size))
+        except ValueError:
+            logger.warning(f"Invalid kernel pool size entry: {entry!r}")
+
+    return sizes
+
+
+class KernelPool:
+    """
+    Per-language pool of idle, already-connected kernels.
+
+    Starting a kernel is the slowest part of creating a context — Python kernels run
+    the IPython startup scripts and JavaScript kernels start Node — so the pool starts
+    them ahead of time and refills itself in the background whenever a kernel is
+    handed out.
+    """
+
+    def __init__(self, kernels, sizes: dict[str, int], cwd: str = "/home/user"):
+        self._kernels = kernels
+        self._cwd = cwd
+        self._sizes: dict[str, int] = {}
+        self._idle: dict[str, deque[ContextWebSocket]] = {}
+        self._refill_tasks: dict[str, asyncio.Task] = {}
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self._closed = False
+
+        for language, size in sizes.items():
+            self.set_size(language, size)
+
+    def set_size(self, language: str, size: int):
+        self._sizes[language] = size
+        self._idle.setdefault(language, deque())
+        self._hits.setdefault(language, 0)
+        self._misses.setdefault(language, 0)
+
+        # Shrink right away, growing happens in the background refill
+        idle = self._idle[language]
+        while len(idle) > size:
+            asyncio.create_task(self._discard(idle.pop()))
+
+        self._schedule_refill(language)
+
+    def acquire(self, language: str) -> ContextWebSocket | None:
+        """Take an idle kernel for the language, or `None` if the pool is empty."""
+        idle = self._idle.get(language)
+        if idle is None:
+            return None
+
+        while idle:
+            ws = idle.popleft()
+            if ws.connected:
+                self._hits[language] += 1
+                self._schedule_refill(language)
+                logger.debug(f"Kernel pool hit for {language}: {ws.context_id}")
+                return ws
+
+            logger.warning(f"Discarding disconnected pooled kernel {ws.context_id}")
+            asyncio.create_task(self._discard(ws))
+
+        self._misses[language] += 1
+        self._schedule_refill(language)
+        logger.debug(f"Kernel pool miss for {language}")
+        return None
+
+    def _schedule_refill(self, language: str):
+        if self._closed:
+            return
+
+        task = self._refill_tasks.get(language)
+        if task and not task.done():
+            return
+
+        if len(self._idle[language]) >= self._sizes.get(language, 0):
+            return
+
+        self._refill_tasks[language] = asyncio.create_task(
+            self._refill(language), name=f"kernel_pool_refill_{language}"
+        )
+
+    async def _refill(self, language: str):
+        idle = self._idle[language]
+        delay = REFILL_RETRY_DELAY
+        while not self._closed and len(idle) < self._sizes.get(language, 0):
+            ws = await self._start(language)
+            if ws is None:
+                # E.g. the machine is out of memory for now, try again later
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, REFILL_RETRY_MAX_DELAY)
+                continue
+            delay = REFILL_RETRY_DELAY
+
+            if self._closed:
+                await self._discard(ws)
+                return
+
+            idle.append(ws)
+            logger.info(f"Added {language} kernel {ws.context_id} to the pool")
+
+    async def _start(self, language: str) -> ContextWebSocket | None:
+        """Start a kernel for the pool, or `None` if it failed."""
+        try:
+            ws = await start_kernel(self._kernels, language, self._cwd)
+        except Exception as e:
+            logger.error(f"Failed to start pooled {language} kernel: {e}")
+            return None
+
+        try:
+            await ws.change_current_directory(self._cwd, language)
+        except Exception as e:
+            logger.error(f"Failed to prepare pooled {language} kernel: {e}")
+            await self._discard(ws)
+            return None
+
+        return ws
+
+    async def _discard(self, ws: ContextWebSocket):
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+        try:
+            await self._kernels.shutdown(ws.context_id)
+        except Exception as e:
+            logger.warning(f"Failed to shut down pooled kernel {ws.context_id}: {e}")
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            language: {
+                "size": self._sizes[language],
+                "idle": len(self._idle[language]),
+                "hits": self._hits[language],
+                "misses": self._misses[language],
+            }
+            for language in self._sizes
+        }
+
+    async def close(self):
+        self._closed = True
+
+        for task in self._refill_tasks.values():
+            task.cancel()
+
+        for idle in self._idle.values():
+            while idle:
+                await self._discard(idle.pop())
@@ -1,22 +1,54 @@
+import asyncio
 import logging
 import sys
 import httpx
 
-from typing import Dict, Union, Literal, List
+from typing import Any, AsyncIterator, Dict, Optional, Union, Literal, List
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, Response
 
 from api.models.context import Context
 from api.models.create_context import CreateContext
-from api.models.execution_request import ExecutionRequest
-from consts import JUPYTER_BASE_URL
-from contexts import create_context, normalize_language
-from messaging import ContextWebSocket
-from stream import StreamingListJsonResponse
-from utils.locks import LockedMap
+from api.models.dataframe import DataFrameRows
+from api.models.execution import ExecutionCancellation, ExecutionInfo
+from api.models.error import Error
+from api.models.result import Result
+from api.models.execution_request import (
+    BatchExecutionRequest,
+    ExecutionRequest,
+    FanoutExecutionRequest,
+)
+from api.models.image_saves import ImageSavePolicy
+from api.models.kernel_pool import KernelPoolSize
+from contexts import create_context, get_kernel_for_language, normalize_language
+from envs import (
+    DATAFRAME_ROWS_MAX_PAGE,
+    DATAFRAME_ROWS_TIMEOUT,
+    EXECUTION_CANCEL_TIMEOUT,
+    EXECUTION_REPLAY_BUFFER_SIZE,
+    EXECUTION_REPLAY_TTL,
+    EXECUTION_RESULT_MAX_BYTES,
+    EXECUTION_RESULTS_MAX_BYTES,
+    FANOUT_MAX_CONCURRENCY,
+    KERNEL_POOL_SIZES,
+)
+from executions import ExecutionRegistry
+from kernel_manager import create_kernel_manager
+from kernel_pool import KernelPool, parse_pool_sizes
+from messaging import KEEPALIVE_INTERVAL, ContextWebSocket
+from stream import negotiate_stream_response
+from utils.blobs import blob_store, parse_byte_range
+from utils.fanout import fan_out
+from utils.locks import LockedMap, QueueFullError
+from utils.metrics import (
+    cancel_metrics,
+    context_queue_metrics,
+    dedupe_metrics,
+    queue_metrics,
+)
 
 logging.basicConfig(level=logging.DEBUG, stream=sys.stdout)
 logger = logging.Logger(__name__)
@@ -26,33 +58,57 @@ http_logger.setLevel(logging.WARNING)
 
 websockets: Dict[Union[str, Literal["default"]], ContextWebSocket] = {}
 default_websockets = LockedMap()
+executions = ExecutionRegistry(
+    EXECUTION_REPLAY_BUFFER_SIZE,
+    EXECUTION_REPLAY_TTL,
+    EXECUTION_RESULTS_MAX_BYTES,
+    EXECUTION_RESULT_MAX_BYTES,
+)
 global client
+global kernels
+global kernel_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global client
+    global kernels
+    global kernel_pool
     client = httpx.AsyncClient()
+    kernels = create_kernel_manager(client)
 
     try:
         python_context = await create_context(
-            client, websockets, "python", "/home/user"
+            kernels, websockets, "python", "/home/user"
         )
         default_websockets["python"] = python_context.id
         websockets["default"] = websockets[python_context.id]
 
         javascript_context = await create_context(
-            client, websockets, "javascript", "/home/user"
+            kernels, websockets, "javascript", "/home/user"
         )
         default_websockets["javascript"] = javascript_context.id
 
+        # Started after the default contexts so warming the pool doesn't
+        # delay the server becoming ready
+        pool_sizes = parse_pool_sizes(KERNEL_POOL_SIZES)
+        for language in list(pool_sizes):
+            if not await kernels.has_kernel(get_kernel_for_language(language)):
+                logger.warning(f"No kernel for pooled language {language}")
+                del pool_sizes[language]
+        kernel_pool = KernelPool(kernels, pool_sizes)
+
         logger.info("Connected to default runtime")
         yield
 
         # Will cleanup after application shuts down
+        await executions.close()
+        await kernel_pool.close()
+
         for ws in websockets.values():
             await ws.close()
 
+        await kernels.close()
         await client.aclose()
     except Exception as e:
         logger.error(f"Failed to initialize default context: {e}")
@@ -76,10 +132,10 @@ async def get_health():
     return "OK"
 
 
-@app.post("/execute")
-async def post_execute(request: Request, exec_request: ExecutionRequest):
-    logger.info(f"Executing code: {exec_request.code}")
-
+async def get_execution_websocket(
+    exec_request: Union[ExecutionRequest, BatchExecutionRequest],
+) -> Union[ContextWebSocket, PlainTextResponse]:
+    """The context to run the request's code in, or the error response."""
     if exec_request.context_id and exec_request.language:
         return PlainTextResponse(
             "Only one of context_id or language can be provided",
@@ -96,7 +152,7 @@ async def post_execute(request: Request, exec_request: ExecutionRequest):
             if not context_id:
                 try:
                     context = await create_context(
-                        client, websockets, language, "/home/user"
+                        kernels, websockets, language, "/home/user", kernel_pool
                     )
                 except Exception as e:
                     return PlainTextResponse(str(e), status_code=500)
@@ -118,13 +174,239 @@ async def post_execute(request: Request, exec_request: ExecutionRequest):
             status_code=404,
         )
 
-    return StreamingListJsonResponse(
-        ws.execute(
-            exec_request.code,
-            env_vars=exec_request.env_vars,
+    return ws
+
+
+def execute_request(
+    request: Request, ws: ContextWebSocket, exec_request: ExecutionRequest
+):
+    return ws.execute(
+        exec_request.code,
+        env_vars=exec_request.env_vars,
+        access_token=request.headers.get("X-Access-Token", None),
+        coalesce_ms=exec_request.stream_coalesce_ms,
+        coalesce_bytes=exec_request.stream_coalesce_bytes,
+        stream_mode=exec_request.stream_mode or "raw",
+        progress_interval_ms=exec_request.stream_progress_interval_ms,
+        max_output_bytes=exec_request.max_output_bytes,
+        max_results=exec_request.max_results,
+        max_result_bytes=exec_request.max_result_bytes,
+        backpressure=exec_request.backpressure,
+        timeout=exec_request.timeout,
+        dataframe_mode=exec_request.dataframe_mode,
+        formats=exec_request.formats,
+        blob_threshold_bytes=exec_request.blob_threshold_bytes,
+        dedupe_session=exec_request.dedupe_session,
+        image_policy=exec_request.image_policy,
+    )
+
+
+async def start_execution(
+    outputs: AsyncIterator,
+) -> Union[AsyncIterator, PlainTextResponse]:
+    """
+    The outputs of the execution, or the error response if too many executions are
+    already waiting for the context. Runs it up to its first output to find out.
+    """
+    try:
+        first = await outputs.__anext__()
+    except QueueFullError as e:
+        return PlainTextResponse(str(e), status_code=429)
+    except StopAsyncIteration:
+        return outputs
+
+    async def resumed():
+        try:
+            yield first
+            async for output in outputs:
+                yield output
+        finally:
+            await outputs.aclose()
+
+    return resumed()
+
+
+@app.post("/execute")
+async def post_execute(request: Request, exec_request: ExecutionRequest):
+    logger.info(f"Executing code: {exec_request.code}")
+
+    ws = await get_execution_websocket(exec_request)
+    if isinstance(ws, PlainTextResponse):
+        return ws
+
+    outputs = await start_execution(execute_request(request, ws, exec_request))
+    if isinstance(outputs, PlainTextResponse):
+        return outputs
+
+    response_class = negotiate_stream_response(request.headers.get("Accept"))
+    if not exec_request.resumable:
+        return response_class(outputs)
+
+    # Runs on its own, so a dropped connection doesn't interrupt the execution
+    stream = executions.start(ws.context_id, outputs)
+    return response_class(stream.attach())
+
+
+@app.post("/execute/batch")
+async def post_execute_batch(request: Request, batch_request: BatchExecutionRequest):
+    logger.info(f"Executing a batch of {len(batch_request.cells)} cells")
+
+    ws = await get_execution_websocket(batch_request)
+    if isinstance(ws, PlainTextResponse):
+        return ws
+
+    outputs = await start_execution(
+        ws.execute_batch(
+            batch_request.cells,
+            env_vars=batch_request.env_vars,
             access_token=request.headers.get("X-Access-Token", None),
+            stop_on_error=batch_request.stop_on_error,
+        )
+    )
+    if isinstance(outputs, PlainTextResponse):
+        return outputs
+
+    response_class = negotiate_stream_response(request.headers.get("Accept"))
+    return response_class(outputs)
+
+
+@app.post("/execute/fanout")
+async def post_execute_fanout(request: Request, fanout_request: FanoutExecutionRequest):
+    context_ids = list(dict.fromkeys(fanout_request.context_ids))
+    logger.info(f"Executing code in {len(context_ids)} contexts: {fanout_request.code}")
+
+    async def context_not_found(context_id: str):
+        yield Error(
+            name="ContextNotFound",
+            value=f"Context {context_id} not found",
+            traceback="",
+        )
+
+    outputs_by_context = {}
+    for context_id in context_ids:
+        ws = websockets.get(context_id, None)
+        outputs_by_context[context_id] = (
+            ws.execute(
+                fanout_request.code,
+                env_vars=fanout_request.env_vars,
+                access_token=request.headers.get("X-Access-Token", None),
+                timeout=fanout_request.timeout,
+            )
+            if ws
+            else context_not_found(context_id)
         )
+
+    max_concurrency = min(
+        fanout_request.max_concurrency or FANOUT_MAX_CONCURRENCY,
+        FANOUT_MAX_CONCURRENCY,
+    )
+    response_class = negotiate_stream_response(request.headers.get("Accept"))
+    return response_class(
+        fan_out(outputs_by_context, max_concurrency, KEEPALIVE_INTERVAL)
+    )
+
+
+@app.post("/executions")
+async def post_executions(
+    request: Request, exec_request: ExecutionRequest
+) -> ExecutionInfo:
+    logger.info(f"Submitting code: {exec_request.code}")
+
+    ws = await get_execution_websocket(exec_request)
+    if isinstance(ws, PlainTextResponse):
+        return ws
+
+    outputs = await start_execution(execute_request(request, ws, exec_request))
+    if isinstance(outputs, PlainTextResponse):
+        return outputs
+
+    stream = executions.start(
+        ws.context_id,
+        outputs,
+        keep_outputs=True,
+        stream_mode=exec_request.stream_mode or "raw",
     )
+    return stream.info()
+
+
+@app.get("/executions")
+async def get_executions() -> List[ExecutionInfo]:
+    logger.info("Listing executions")
+
+    return [stream.info() for stream in executions.list()]
+
+
+@app.get("/executions/{execution_id}")
+async def get_execution(execution_id: str) -> ExecutionInfo:
+    stream = executions.get(execution_id)
+    if not stream:
+        return PlainTextResponse(
+            f"Execution {execution_id} not found",
+            status_code=404,
+        )
+
+    return stream.info()
+
+
+@app.delete("/executions/{execution_id}")
+async def delete_execution(execution_id: str) -> ExecutionCancellation:
+    logger.info(f"Cancelling execution {execution_id}")
+
+    stream = executions.get(execution_id)
+    ws = websockets.get(stream.context_id, None) if stream else None
+    if not stream or (not ws and not stream.done):
+        return PlainTextResponse(
+            f"Execution {execution_id} not found",
+            status_code=404,
+        )
+
+    return await executions.cancel(stream, ws, EXECUTION_CANCEL_TIMEOUT)
+
+
+@app.get("/executions/{execution_id}/result")
+async def get_execution_result(request: Request, execution_id: str):
+    logger.info(f"Getting the result of execution {execution_id}")
+
+    stream = executions.get(execution_id)
+    if not stream or stream.outputs is None:
+        return PlainTextResponse(
+            f"Execution {execution_id} not found",
+            status_code=404,
+        )
+
+    if not stream.done:
+        return PlainTextResponse(
+            f"Execution {execution_id} is still {stream.status}",
+            status_code=409,
+        )
+
+    async def outputs():
+        for output in stream.outputs:
+            yield output
+
+    response_class = negotiate_stream_response(request.headers.get("Accept"))
+    return response_class(outputs())
+
+
+@app.get("/executions/{execution_id}/stream")
+async def get_execution_stream(request: Request, execution_id: str, last_seq: int = 0):
+    logger.info(f"Attaching to execution {execution_id} after {last_seq}")
+
+    stream = executions.get(execution_id)
+    if not stream:
+        return PlainTextResponse(
+            f"Execution {execution_id} not found",
+            status_code=404,
+        )
+
+    if not stream.can_resume(last_seq):
+        return PlainTextResponse(
+            f"Outputs of execution {execution_id} after {last_seq} are no longer available",
+            status_code=410,
+        )
+
+    response_class = negotiate_stream_response(request.headers.get("Accept"))
+    return response_class(stream.attach(last_seq))
 
 
 @app.post("/contexts")
@@ -135,7 +417,7 @@ async def post_contexts(request: CreateContext) -> Context:
     cwd = request.cwd or "/home/user"
 
     try:
-        return await create_context(client, websockets, language, cwd)
+        return await create_context(kernels, websockets, language, cwd, kernel_pool)
     except Exception as e:
         return PlainTextResponse(str(e), status_code=500)
 
@@ -155,6 +437,153 @@ async def get_contexts() -> List[Context]:
     ]
 
 
+@app.get("/contexts/{context_id}/dataframes/{dataframe_id}/rows")
+async def get_dataframe_rows(
+    request: Request,
+    context_id: str,
+    dataframe_id: str,
+    start: int = Query(default=0, ge=0),
+    stop: Optional[int] = Query(default=None, ge=0),
+    columns: Optional[List[str]] = Query(default=None),
+) -> DataFrameRows:
+    """
+    Rows of a DataFrame summarized by an execution in the `summary` DataFrame mode,
+    by the `id` of its summary, or of a DataFrame variable in the context by name.
+    At most `DATAFRAME_ROWS_MAX_PAGE` rows are sent, check `stop` of the response.
+    Fetching the rows takes a turn in the context's queue like an execution.
+    """
+    logger.info(f"Fetching rows {start}-{stop} of DataFrame {dataframe_id}")
+
+    ws = websockets.get(context_id, None)
+    if not ws or ws.language != "python":
+        return PlainTextResponse(
+            f"Context {context_id} not found",
+            status_code=404,
+        )
+
+    stop = min(
+        stop if stop is not None else start + DATAFRAME_ROWS_MAX_PAGE,
+        start + DATAFRAME_ROWS_MAX_PAGE,
+    )
+    code = f"_e2b_dataframe_rows({dataframe_id!r}, {start}, {stop}, {columns!r})"
+
+    rows = None
+    outputs = ws.execute_silently_in_turn(code, timeout=DATAFRAME_ROWS_TIMEOUT)
+    try:
+        async for output in outputs:
+            if isinstance(output, Result) and output.data is not None:
+                rows = output.data
+            elif isinstance(output, Error):
+                if output.name == "E2BDataFrameNotFound":
+                    status_code = 404
+                elif output.name == "ExecutionTimeout":
+                    status_code = 504
+                else:
+                    status_code = 400
+                return PlainTextResponse(output.value, status_code=status_code)
+    except QueueFullError as e:
+        return PlainTextResponse(str(e), status_code=429)
+    finally:
+        await outputs.aclose()
+
+    if rows is None:
+        return PlainTextResponse("Failed to fetch the rows", status_code=500)
+
+    return DataFrameRows(**rows)
+
+
+@app.get("/blobs/{blob_hash}")
+async def get_blob(request: Request, blob_hash: str):
+    """
+    A result format stored in the blob store. Supports a single `Range`, e.g. to
+    fetch a large payload in parts.
+    """
+    size = blob_store.size(blob_hash)
+    if size is None:
+        return PlainTextResponse(f"Blob {blob_hash} not found", status_code=404)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{blob_hash}"',
+        # Content-addressed, so it never changes
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    start, stop = 0, size
+    status_code = 200
+    range_header = request.headers.get("Range")
+    if range_header:
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except ValueError:
+            # Unsupported ranges can be ignored, the whole blob is sent instead
+            byte_range = (start, stop)
+        else:
+            if byte_range is None:
+                return PlainTextResponse(
+                    "Range not satisfiable",
+                    status_code=416,
+                    headers={"Content-Range": f"bytes */{size}"},
+                )
+            status_code = 206
+            headers["Content-Range"] = (
+                f"bytes {byte_range[0]}-{byte_range[1] - 1}/{size}"
+            )
+        start, stop = byte_range
+
+    try:
+        data = await asyncio.to_thread(blob_store.read, blob_hash, start, stop)
+    except OSError:
+        # Evicted in the meantime
+        return PlainTextResponse(f"Blob {blob_hash} not found", status_code=404)
+    return Response(
+        data,
+        status_code=status_code,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+@app.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    return {
+        "kernel_pool": kernel_pool.stats(),
+        "execution_queues": queue_metrics.snapshot(),
+        "execution_cancels": cancel_metrics.snapshot(),
+        "context_queues": context_queue_metrics.snapshot(),
+        "result_dedupe": dedupe_metrics.snapshot(),
+    }
+
+
+@app.put("/kernel-pool/{language}")
+async def put_kernel_pool_size(language: str, request: KernelPoolSize) -> None:
+    language = normalize_language(language)
+    logger.info(f"Setting {language} kernel pool size to {request.size}")
+
+    if not await kernels.has_kernel(get_kernel_for_language(language)):
+        return PlainTextResponse(
+            f"No kernel for language {language}",
+            status_code=400,
+        )
+
+    kernel_pool.set_size(language, request.size)
+
+
+@app.put("/contexts/{context_id}/image-saves")
+async def put_image_saves(context_id: str, request: ImageSavePolicy) -> None:
+    """Set how PIL images saved to a path in the context's executions are displayed."""
+    logger.info(f"Setting image save policy of context {context_id}")
+
+    ws = websockets.get(context_id, None)
+    if not ws:
+        return PlainTextResponse(
+            f"Context {context_id} not found",
+            status_code=404,
+        )
+
+    ws.image_saves = request
+
+
 @app.post("/contexts/{context_id}/restart")
 async def restart_context(context_id: str) -> None:
     logger.info(f"Restarting context {context_id}")
@@ -167,25 +596,24 @@ async def restart_context(context_id: str) -> None:
         )
 
     session_id = ws.session_id
+    image_saves = ws.image_saves
 
     await ws.close()
 
-    response = await client.post(
-        f"{JUPYTER_BASE_URL}/api/kernels/{ws.context_id}/restart"
-    )
-    if not response.is_success:
+    if not await kernels.restart(ws.context_id):
         return PlainTextResponse(
             f"Failed to restart context {context_id}",
             status_code=500,
         )
 
-    ws = ContextWebSocket(
+    ws = kernels.connection(
         ws.context_id,
         session_id,
         ws.language,
         ws.cwd,
     )
 
+    ws.image_saves = image_saves
     await ws.connect()
 
     websockets[context_id] = ws
@@ -207,8 +635,7 @@ async def remove_context(context_id: str) -> None:
     except:  # noqa: E722
         pass
 
-    response = await client.delete(f"{JUPYTER_BASE_URL}/api/kernels/{ws.context_id}")
-    if not response.is_success:
+    if not await kernels.shutdown(ws.context_id):
         return PlainTextResponse(
             f"Failed to remove context {context_id}",
             status_code=500,
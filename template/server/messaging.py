@@ -1,60 +1,263 @@
 import datetime
 import json
 import logging
+import os
+import time
 import uuid
 import asyncio
 
 import httpx
 
-from asyncio import Queue
+from collections import deque
+
 from typing import (
     Dict,
+    List,
     Optional,
     Union,
 )
 from pydantic import StrictStr
 from websockets.client import WebSocketClientProtocol, connect
+from websockets.typing import Subprotocol
 from websockets.exceptions import (
     ConnectionClosedError,
     WebSocketException,
 )
 
 from api.models.error import Error
+from api.models.execution_request import DataFrameMode, ImagePolicy, StreamMode
+from api.models.image_saves import ImageSavePolicy
 from api.models.logs import Stdout, Stderr
-from api.models.result import Result
+from api.models.result import FORMAT_MIME_TYPES, Result, format_mime_types
 from api.models.output import (
+    ClearOutput,
     EndOfExecution,
+    ExecutionQueued,
+    Keepalive,
     NumberOfExecutions,
     OutputType,
     UnexpectedEndOfExecution,
 )
 from consts import JUPYTER_BASE_URL
 from errors import ExecutionError
-from envs import get_envs
+from envs import (
+    BACKPRESSURE_PAUSE_TIMEOUT,
+    BACKPRESSURE_POLICY,
+    CONTEXT_QUEUE_MAX_WAITING,
+    EXECUTION_QUEUE_SIZE,
+    OUTPUT_SPILL_DIR,
+    get_envs,
+)
+from utils.blobs import blob_store
+from utils.budget import OutputBudget
+from utils.compaction import StreamCompactor
+from utils.dedupe import dedupe_sessions
+from utils.locks import QueuedLock, QueueFullError
+from utils.metrics import context_queue_metrics
+from utils.queues import BackpressurePolicy, OutputQueue
+from utils.websocket_protocol import V1_SUBPROTOCOL, deserialize_v1, serialize_v1
 
 logger = logging.getLogger(__name__)
 
 MAX_RECONNECT_RETRIES = 3
 PING_TIMEOUT = 30
 KEEPALIVE_INTERVAL = 5  # seconds between keepalive pings during streaming
+DEFAULT_COALESCE_BYTES = 64 * 1024  # stdout/stderr budget when only a window is set
+DEFAULT_PROGRESS_INTERVAL = 0.2  # seconds between redraws of a line in compact mode
+TIMEOUT_INTERRUPT_GRACE = 2  # seconds between interrupts of a timed out execution
+WEBSOCKET_MAX_QUEUE = 1024  # kernel messages buffered by the websocket client
+
+# Kernel messages _process_message acts on, with the binary websocket protocol
+# the rest are dropped after decoding just their header
+PROCESSED_MESSAGE_TYPES = {
+    "status",
+    "error",
+    "stream",
+    "display_data",
+    "update_display_data",
+    "clear_output",
+    "execute_result",
+    "execute_reply",
+    "execute_input",
+}
 
 
 class Execution:
-    def __init__(self, in_background: bool = False):
-        self.queue = Queue[
-            Union[
-                Result,
-                Error,
-                Stdout,
-                Stderr,
-                EndOfExecution,
-                NumberOfExecutions,
-                UnexpectedEndOfExecution,
-            ]
-        ]()
+    def __init__(
+        self,
+        in_background: bool = False,
+        stream_mode: StreamMode = "raw",
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        budget: Optional[OutputBudget] = None,
+        backpressure: BackpressurePolicy = BACKPRESSURE_POLICY,
+        mime_types: Optional[List[str]] = None,
+        blob_threshold: Optional[int] = None,
+        dedupe_session: Optional[str] = None,
+    ):
+        self.queue = OutputQueue(
+            EXECUTION_QUEUE_SIZE,
+            policy=backpressure,
+            pause_timeout=BACKPRESSURE_PAUSE_TIMEOUT,
+        )
         self.input_accepted = False
         self.errored = False
         self.in_background = in_background
+        self.compact = stream_mode == "compact"
+        self._compactors = {
+            Stdout: StreamCompactor(progress_interval),
+            Stderr: StreamCompactor(progress_interval),
+        }
+        self._clear_on_output = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._budget = budget
+        # Only these are sent in the results, all if None
+        self.mime_types = mime_types
+        self.blob_threshold = blob_threshold
+        self.dedupe_session = dedupe_session
+        # Outputs from the kernel waiting for their turn in `put`
+        self._pending: deque = deque()
+        self._sender: Optional[asyncio.Task] = None
+
+    def send(self, output):
+        """
+        `put` the output after the ones sent before it, without waiting for it. The
+        context's receive loop sends the outputs this way, so an execution paused by
+        a slow client (see `OutputQueue`) holds back only its own outputs, here,
+        while the context keeps reading the kernel's messages for the others.
+        """
+        self._defer(self.put, output)
+
+    def send_clear_output(self, wait: bool = False):
+        """`clear_output` in order with the outputs passed to `send`."""
+        self._defer(self.clear_output, wait)
+
+    def _defer(self, method, *args):
+        self._pending.append((method, args))
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_pending())
+
+    async def _send_pending(self):
+        while self._pending:
+            method, args = self._pending.popleft()
+            try:
+                await method(*args)
+            except Exception as e:
+                logger.error(f"Failed to send an output of the execution: {e}")
+
+    async def put(self, output):
+        """
+        Queue an output for the client. In the compact stream mode stdout/stderr go
+        through the stream compactors first and a waiting clear_output is sent
+        right before the next output. Result formats already sent in the dedupe
+        session are replaced by references, and those over the blob threshold are
+        moved to the blob store.
+        """
+        if isinstance(output, Result) and self.dedupe_session is not None:
+            output = await asyncio.to_thread(
+                dedupe_sessions.dedupe, output, self.dedupe_session
+            )
+        if isinstance(output, Result) and self.blob_threshold is not None:
+            output = await asyncio.to_thread(
+                blob_store.offload, output, self.blob_threshold
+            )
+
+        if not self.compact:
+            await self._enqueue(output)
+            return
+
+        if self._clear_on_output and not isinstance(
+            output, (NumberOfExecutions, EndOfExecution, UnexpectedEndOfExecution)
+        ):
+            self._clear_on_output = False
+            await self.clear_output()
+
+        if isinstance(output, (Stdout, Stderr)):
+            # Keep the order the other stream's latest redraw was written in
+            await self._flush_compactors(exclude=type(output))
+
+            text = self._compactors[type(output)].feed(output.text or "")
+            if text:
+                await self._enqueue(type(output)(text=text, timestamp=output.timestamp))
+            self._schedule_flush(output.timestamp)
+            return
+
+        await self._flush_compactors()
+        await self._enqueue(output)
+
+    async def clear_output(self, wait: bool = False):
+        if wait:
+            self._clear_on_output = True
+            return
+
+        for compactor in self._compactors.values():
+            compactor.reset()
+        await self._enqueue(ClearOutput())
+
+    def close(self):
+        self._cancel_flush()
+        self._pending.clear()
+        if self._sender is not None:
+            self._sender.cancel()
+        self.queue.close()
+        if self._budget is not None:
+            self._budget.close()
+
+    async def _enqueue(self, output):
+        if isinstance(output, EndOfExecution):
+            truncations = self.queue.dropped()
+            if self._budget is not None:
+                truncations = await self._budget.truncations() + truncations
+            for truncation in truncations:
+                self.queue.put_nowait(truncation)
+
+        if self._budget is not None:
+            output = await self._budget.check(output)
+            if output is None:
+                return
+
+        await self.queue.put(output)
+
+    async def _flush_compactors(self, exclude=None, timestamp=None, due_only=False):
+        for output_type, compactor in self._compactors.items():
+            if output_type is exclude or (due_only and compactor.due_in() != 0):
+                continue
+
+            text = compactor.flush()
+            if text:
+                await self._enqueue(output_type(text=text, timestamp=timestamp))
+
+        if not any(compactor.pending for compactor in self._compactors.values()):
+            self._cancel_flush()
+
+    def _schedule_flush(self, timestamp):
+        """Send redraws held back by the rate limit once it allows, even if nothing else is written."""
+        if self._flush_handle is not None:
+            return
+
+        delays = [
+            delay
+            for compactor in self._compactors.values()
+            if (delay := compactor.due_in()) is not None
+        ]
+        if not delays:
+            return
+
+        async def flush_due():
+            await self._flush_compactors(timestamp=timestamp, due_only=True)
+            self._schedule_flush(timestamp)
+
+        def on_timer():
+            self._flush_handle = None
+            asyncio.create_task(flush_due())
+
+        self._flush_handle = asyncio.get_running_loop().call_later(
+            min(delays), on_timer
+        )
+
+    def _cancel_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
 
 
 class ContextWebSocket:
@@ -62,15 +265,40 @@ class ContextWebSocket:
     _receive_task: Optional[asyncio.Task] = None
     _global_env_vars: Optional[Dict[StrictStr, str]] = None
     _cleanup_task: Optional[asyncio.Task] = None
+    _binary: bool = False
 
-    def __init__(self, context_id: str, session_id: str, language: str, cwd: str):
+    def __init__(
+        self,
+        context_id: str,
+        session_id: str,
+        language: str,
+        cwd: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.language = language
         self.cwd = cwd
         self.context_id = context_id
         self.url = f"ws://localhost:8888/api/kernels/{context_id}/channels"
         self.session_id = session_id
         self._executions: Dict[str, Execution] = {}
-        self._lock = asyncio.Lock()
+        self._queue = QueuedLock(CONTEXT_QUEUE_MAX_WAITING)
+        # Reused for interrupts, so they don't wait for a new connection
+        self._http_client = client
+        # Displaying of saved PIL images, the kernel's defaults if None
+        self.image_saves: Optional[ImageSavePolicy] = None
+
+    @property
+    def _opened(self) -> bool:
+        return self._ws is not None
+
+    @property
+    def connected(self) -> bool:
+        return (
+            self._ws is not None
+            and self._ws.open
+            and self._receive_task is not None
+            and not self._receive_task.done()
+        )
 
     async def reconnect(self):
         if self._ws is not None:
@@ -91,62 +319,116 @@ class ContextWebSocket:
             self.url,
             ping_timeout=PING_TIMEOUT,
             max_size=None,
-            max_queue=None,
+            # Bounded, so that when a slow client pauses the execution queues the
+            # backpressure reaches the kernel instead of piling up here
+            max_queue=WEBSOCKET_MAX_QUEUE,
             logger=ws_logger,
+            subprotocols=[Subprotocol(V1_SUBPROTOCOL)],
         )
+        # Falls back to the JSON protocol if the server doesn't support the binary one
+        self._binary = self._ws.subprotocol == V1_SUBPROTOCOL
 
-        logger.info(f"WebSocket connected to {self.url}")
+        protocol = "binary" if self._binary else "JSON"
+        logger.info(f"WebSocket connected to {self.url} ({protocol} protocol)")
         self._receive_task = asyncio.create_task(
             self._receive_message(),
             name="receive_message",
         )
 
-    async def interrupt(self):
-        """Interrupt the current kernel execution via the Jupyter REST API."""
+    async def interrupt(self) -> bool:
+        """
+        Interrupt the current kernel execution via the Jupyter REST API.
+        Returns whether the interrupt was sent.
+        """
+        url = f"{JUPYTER_BASE_URL}/api/kernels/{self.context_id}/interrupt"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{JUPYTER_BASE_URL}/api/kernels/{self.context_id}/interrupt"
-                )
-                if response.is_success:
-                    logger.info(f"Kernel {self.context_id} interrupted successfully")
-                else:
-                    logger.error(
-                        f"Failed to interrupt kernel {self.context_id}: {response.status_code}"
-                    )
+            if self._http_client is not None:
+                response = await self._http_client.post(url)
+            else:
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(url)
         except Exception as e:
             logger.error(f"Error interrupting kernel {self.context_id}: {e}")
+            return False
+
+        if not response.is_success:
+            logger.error(
+                f"Failed to interrupt kernel {self.context_id}: {response.status_code}"
+            )
+            return False
+
+        logger.info(f"Kernel {self.context_id} interrupted successfully")
+        return True
 
     def _get_execute_request(
-        self, msg_id: str, code: Union[str, StrictStr], background: bool
-    ) -> str:
-        return json.dumps(
-            {
-                "header": {
-                    "msg_id": msg_id,
-                    "username": "e2b",
-                    "session": self.session_id,
-                    "msg_type": "execute_request",
-                    "version": "5.3",
-                    "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                },
-                "parent_header": {},
-                "metadata": {
-                    "trusted": True,
-                    "deletedCells": [],
-                    "recordTiming": False,
-                    "cellId": str(uuid.uuid4()),
-                },
-                "content": {
-                    "code": code,
-                    "silent": background,
-                    "store_history": True,
-                    "user_expressions": {},
-                    "stop_on_error": True,
-                    "allow_stdin": False,
-                },
-            }
-        )
+        self,
+        msg_id: str,
+        code: Union[str, StrictStr],
+        background: bool,
+        stop_on_error: bool = True,
+    ) -> dict:
+        return {
+            "header": {
+                "msg_id": msg_id,
+                "username": "e2b",
+                "session": self.session_id,
+                "msg_type": "execute_request",
+                "version": "5.3",
+                "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            },
+            "parent_header": {},
+            "metadata": {
+                "trusted": True,
+                "deletedCells": [],
+                "recordTiming": False,
+                "cellId": str(uuid.uuid4()),
+            },
+            "content": {
+                "code": code,
+                "silent": background,
+                "store_history": not background,
+                "user_expressions": {},
+                "stop_on_error": stop_on_error,
+                "allow_stdin": False,
+            },
+        }
+
+    async def _send_request(self, request: dict):
+        if not self._binary:
+            await self._ws.send(json.dumps(request))
+            return
+
+        parts = [
+            json.dumps(request[key]).encode("utf-8")
+            for key in ("header", "parent_header", "metadata", "content")
+        ]
+        await self._ws.send(serialize_v1(parts, "shell"))
+
+    def _decode_binary_message(self, message: bytes) -> Optional[dict]:
+        """
+        Decode a binary protocol message, or return `None` for messages that
+        `_process_message` would ignore, without decoding their content.
+        """
+        channel, parts = deserialize_v1(message)
+
+        header = json.loads(bytes(parts[0]))
+        msg_type = header["msg_type"]
+        if msg_type not in PROCESSED_MESSAGE_TYPES:
+            return None
+
+        parent_header = json.loads(bytes(parts[1]))
+        # Status messages are needed even without a parent, e.g. for restarts
+        if msg_type != "status" and parent_header.get("msg_id") not in self._executions:
+            return None
+
+        return {
+            "channel": channel,
+            "header": header,
+            "msg_type": msg_type,
+            "parent_header": parent_header,
+            "content": json.loads(bytes(parts[3])),
+            "buffers": parts[4:],
+        }
 
     def _set_env_var_snippet(self, key: str, value: str) -> str:
         """Get environment variable set command for the current language."""
@@ -243,16 +525,71 @@ class ContextWebSocket:
             if cleanup_code:
                 logger.info(f"Cleaning up env vars: {cleanup_code}")
                 request = self._get_execute_request(message_id, cleanup_code, True)
-                await self._ws.send(request)
+                await self._send_request(request)
 
                 async for item in self._wait_for_result(message_id):
-                    if item["type"] == "error":
+                    if isinstance(item, Error):
                         logger.error(f"Error during env var cleanup: {item}")
         finally:
-            del self._executions[message_id]
+            self._executions.pop(message_id).close()
+
+    async def _coalesce_stream(
+        self,
+        queue: OutputQueue,
+        first: Union[Stdout, Stderr],
+        window_ms: float,
+        max_bytes: int,
+    ):
+        """
+        Merge the stream chunks following `first` from the same stream, until the
+        window passes, the byte budget is reached or another kind of output arrives.
+
+        Returns the merged chunk and the output that ended the merge, if any.
+        """
+        texts = [first.text or ""]
+        size = len(texts[0])
+        deadline = asyncio.get_running_loop().time() + window_ms / 1000
+
+        while size < max_bytes:
+            if queue.empty():
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    output = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                output = queue.get_nowait()
+
+            if type(output) is not type(first):
+                return self._merged_stream(first, texts), output
+
+            texts.append(output.text or "")
+            size += len(texts[-1])
+
+        return self._merged_stream(first, texts), None
+
+    @staticmethod
+    def _merged_stream(first: Union[Stdout, Stderr], texts: List[str]):
+        if len(texts) == 1:
+            return first
 
-    async def _wait_for_result(self, message_id: str):
+        # Keep the first chunk's timestamp, the merged text started then
+        return type(first)(text="".join(texts), timestamp=first.timestamp)
+
+    async def _wait_for_result(
+        self,
+        message_id: str,
+        coalesce_ms: Optional[float] = None,
+        coalesce_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
         queue = self._executions[message_id].queue
+        coalesce = coalesce_ms is not None or coalesce_bytes is not None
+        pending = None
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        timed_out = False
 
         # Use a timeout on queue.get() to periodically send keepalives.
         # Without keepalives, the generator blocks indefinitely waiting for
@@ -263,18 +600,48 @@ class ContextWebSocket:
         # interrupt for abandoned executions (see #213).
         while True:
             try:
-                output = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                if pending is not None:
+                    output, pending = pending, None
+                else:
+                    wait = KEEPALIVE_INTERVAL
+                    if deadline is not None:
+                        wait = min(wait, max(0.0, deadline - time.monotonic()))
+                    output = await asyncio.wait_for(queue.get(), timeout=wait)
             except asyncio.TimeoutError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    # Stop the kernel and keep streaming what it still sends.
+                    # The context stays locked until the kernel reports idle or
+                    # is restarted, so keep interrupting it until then.
+                    if timed_out:
+                        logger.warning(
+                            f"Execution ({message_id}) didn't stop after the timeout interrupt, interrupting again"
+                        )
+                    else:
+                        logger.info(
+                            f"Execution ({message_id}) timed out, interrupting kernel"
+                        )
+                        timed_out = True
+                    deadline = time.monotonic() + TIMEOUT_INTERRUPT_GRACE
+                    await self.interrupt()
+
                 # Yield a keepalive so Starlette writes to the socket.
                 # If the client has disconnected, the write fails and
                 # uvicorn delivers http.disconnect, which cancels this
                 # generator via CancelledError.
-                yield {"type": "keepalive"}
+                yield Keepalive()
                 continue
 
             if output.type == OutputType.END_OF_EXECUTION:
                 break
 
+            # The KeyboardInterrupt raised by the timeout, reported below instead
+            if (
+                timed_out
+                and output.type == OutputType.ERROR
+                and output.name == "KeyboardInterrupt"
+            ):
+                continue
+
             if output.type == OutputType.UNEXPECTED_END_OF_EXECUTION:
                 logger.error(f"Unexpected end of execution for code ({message_id})")
                 yield Error(
@@ -284,7 +651,22 @@ class ContextWebSocket:
                 )
                 break
 
-            yield output.model_dump(exclude_none=True)
+            if coalesce and isinstance(output, (Stdout, Stderr)):
+                output, pending = await self._coalesce_stream(
+                    queue,
+                    output,
+                    coalesce_ms or 0,
+                    coalesce_bytes or DEFAULT_COALESCE_BYTES,
+                )
+
+            yield output
+
+        if timed_out:
+            yield Error(
+                name="ExecutionTimeout",
+                value=f"Execution exceeded the timeout of {timeout:g} seconds",
+                traceback="",
+            )
 
     async def change_current_directory(
         self, path: Union[str, StrictStr], language: str
@@ -309,10 +691,10 @@ class ContextWebSocket:
         else:
             return
 
-        await self._ws.send(request)
+        await self._send_request(request)
 
         async for item in self._wait_for_result(message_id):
-            if item["type"] == "error":
+            if isinstance(item, Error):
                 raise ExecutionError(f"Error during execution: {item}")
 
     async def execute(
@@ -320,104 +702,385 @@ class ContextWebSocket:
         code: Union[str, StrictStr],
         env_vars: Dict[StrictStr, str],
         access_token: str,
+        coalesce_ms: Optional[float] = None,
+        coalesce_bytes: Optional[int] = None,
+        stream_mode: StreamMode = "raw",
+        progress_interval_ms: Optional[float] = None,
+        max_output_bytes: Optional[int] = None,
+        max_results: Optional[int] = None,
+        max_result_bytes: Optional[int] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
+        timeout: Optional[float] = None,
+        dataframe_mode: Optional[DataFrameMode] = None,
+        formats: Optional[List[str]] = None,
+        blob_threshold_bytes: Optional[int] = None,
+        dedupe_session: Optional[str] = None,
+        image_policy: Optional[ImagePolicy] = None,
     ):
-        if self._ws is None:
-            raise Exception("WebSocket not connected")
+        """
+        Execute the code and stream its outputs.
 
-        async with self._lock:
-            # Wait for any pending cleanup task to complete
-            if self._cleanup_task and not self._cleanup_task.done():
-                logger.debug("Waiting for pending cleanup task to complete")
-                try:
-                    await self._cleanup_task
-                except Exception as e:
-                    logger.warning(f"Cleanup task failed: {e}")
-                finally:
-                    self._cleanup_task = None
+        Setting `coalesce_ms` or `coalesce_bytes` merges consecutive stdout/stderr
+        chunks into one output, for up to `coalesce_ms` milliseconds or until
+        `coalesce_bytes` characters. With only `coalesce_bytes`, chunks are merged
+        only if they are already waiting, without holding any output back.
 
-            # Get the indentation level from the code
-            code_indent = self._get_code_indentation(code)
+        The `compact` stream mode sends only the latest state of lines redrawn with
+        `\\r` or ANSI erase sequences, at most once per `progress_interval_ms`, and
+        forwards display updates and `clear_output` so the client can replace
+        earlier outputs instead of adding to them.
 
-            # Build the complete code snippet with env vars
-            complete_code = code
+        Output over `max_output_bytes` (stdout and stderr together), `max_results` or
+        `max_result_bytes` is written to files in `OUTPUT_SPILL_DIR` instead, and an
+        `output_truncated` event tells the client where before the execution ends.
 
-            global_env_vars_snippet = ""
-            env_vars_snippet = ""
+        `backpressure` overrides the server's policy for when the client reads the
+        outputs slower than they're produced, see `OutputQueue`.
 
-            if self._global_env_vars is None:
-                self._global_env_vars = await get_envs(access_token=access_token)
-                global_env_vars_snippet = self._set_env_vars_code(self._global_env_vars)
+        After `timeout` seconds of running, the kernel is interrupted and the stream
+        ends with an `ExecutionTimeout` error after the outputs produced until then.
 
-            if env_vars:
-                env_vars_snippet = self._set_env_vars_code(env_vars)
+        The `summary` DataFrame mode sends only a summary of displayed DataFrames in
+        Python, see `startup_scripts/0002_data.py`.
 
-            if global_env_vars_snippet or env_vars_snippet:
-                indented_env_code = self._indent_code_with_level(
-                    f"{global_env_vars_snippet}\n{env_vars_snippet}", code_indent
-                )
-                complete_code = f"{indented_env_code}\n{complete_code}"
+        With `formats`, the results carry only those formats, and Python kernels
+        compute only those in the first place.
 
-            message_id = str(uuid.uuid4())
-            execution = Execution()
-            self._executions[message_id] = execution
+        Result formats over `blob_threshold_bytes` are stored in the blob store and
+        sent as references, see `BlobStore`. Formats already sent in the
+        `dedupe_session` are sent as references too, see `DedupeSessions`.
 
-            # Send the code for execution
-            # Initial request and retries
-            for i in range(1 + MAX_RECONNECT_RETRIES):
-                try:
-                    logger.info(
-                        f"Sending code for the execution ({message_id}): {complete_code}"
-                    )
-                    request = self._get_execute_request(
-                        message_id, complete_code, False
-                    )
-                    await self._ws.send(request)
-                    break
-                except (ConnectionClosedError, WebSocketException) as e:
-                    # Keep the last result, even if error
-                    if i < MAX_RECONNECT_RETRIES:
-                        logger.warning(
-                            f"WebSocket connection lost while sending execution request, {i + 1}. reconnecting...: {str(e)}"
-                        )
-                        await self.reconnect()
-            else:
-                # The retry didn't help, request wasn't sent successfully
-                logger.error("Failed to send execution request")
-                await execution.queue.put(
-                    Error(
-                        name="WebSocketError",
-                        value="Failed to send execution request",
-                        traceback="",
-                    )
+        The `image_policy` scales down and re-encodes displayed images in Python,
+        and the context's `image_saves` policy limits the displays of saved PIL
+        images, see `startup_scripts/0003_images.py`.
+
+        Executions in the context run one at a time in the order they came in, while
+        waiting they stream `execution_queued` with their position. Raises
+        `QueueFullError` on the first step when too many are already waiting.
+        """
+        if not self._opened:
+            raise Exception("WebSocket not connected")
+
+        ticket = self._enqueue()
+        try:
+            async for output in self._wait_in_line(ticket):
+                yield output
+
+            complete_code = await self._prepare_code(code, env_vars, access_token)
+            mime_types = format_mime_types(formats) if formats else None
+            if (
+                mime_types
+                and image_policy
+                and image_policy.format
+                and FORMAT_MIME_TYPES[image_policy.format] in mime_types
+            ):
+                # The kernel encodes the images in the policy's format from their
+                # PNG or JPEG
+                mime_types = format_mime_types([*mime_types, "png", "jpeg"])
+            await self._set_display_options(
+                dataframe_mode=dataframe_mode,
+                formats=mime_types,
+                image_policy=(
+                    image_policy.model_dump(exclude_none=True) or None
+                    if image_policy
+                    else None
+                ),
+                image_saves=(
+                    self.image_saves.model_dump(exclude_none=True)
+                    if self.image_saves
+                    else None
+                ),
+            )
+
+            message_id = str(uuid.uuid4())
+            budget = None
+            if any(
+                limit is not None
+                for limit in (max_output_bytes, max_results, max_result_bytes)
+            ):
+                budget = OutputBudget(
+                    os.path.join(OUTPUT_SPILL_DIR, message_id),
+                    max_output_bytes=max_output_bytes,
+                    max_results=max_results,
+                    max_result_bytes=max_result_bytes,
                 )
-                await execution.queue.put(UnexpectedEndOfExecution())
+
+            execution = Execution(
+                budget=budget,
+                backpressure=backpressure or BACKPRESSURE_POLICY,
+                stream_mode=stream_mode,
+                progress_interval=(
+                    progress_interval_ms / 1000
+                    if progress_interval_ms is not None
+                    else DEFAULT_PROGRESS_INTERVAL
+                ),
+                mime_types=mime_types,
+                blob_threshold=blob_threshold_bytes,
+                dedupe_session=dedupe_session,
+            )
+            self._executions[message_id] = execution
+            await self._send_execution(message_id, complete_code, execution)
 
             # Stream the results.
             # If the client disconnects (Starlette cancels the task), we
             # interrupt the kernel so the next execution isn't blocked (#213).
             try:
-                async for item in self._wait_for_result(message_id):
+                async for item in self._wait_for_result(
+                    message_id, coalesce_ms, coalesce_bytes, timeout
+                ):
                     yield item
             except (asyncio.CancelledError, GeneratorExit):
-                logger.warning(
-                    f"Client disconnected during execution ({message_id}), interrupting kernel"
-                )
-                # Shield the interrupt from the ongoing cancellation so
-                # the HTTP request to the kernel actually completes.
-                try:
-                    await asyncio.shield(self.interrupt())
-                except asyncio.CancelledError:
-                    pass
+                await self._interrupt_abandoned(message_id)
                 raise
             finally:
-                if message_id in self._executions:
-                    del self._executions[message_id]
+                execution = self._executions.pop(message_id, None)
+                if execution is not None:
+                    execution.close()
 
             # Clean up env vars in a separate request after the main code has run
             if env_vars:
                 self._cleanup_task = asyncio.create_task(
                     self._cleanup_env_vars(env_vars)
                 )
+        finally:
+            self._queue.release(ticket)
+
+    async def execute_batch(
+        self,
+        cells: List[Union[str, StrictStr]],
+        env_vars: Dict[StrictStr, str],
+        access_token: str,
+        stop_on_error: bool = True,
+    ):
+        """
+        Execute the cells one after another and stream their outputs, each with the
+        index of its cell in `cells` as `cell`.
+
+        All of the cells are sent to the kernel at once, so it starts each of them
+        right after the previous one without a round trip through the server, and
+        the batch takes a single turn in the context's queue. With `stop_on_error`
+        the kernel aborts the cells after the first one that fails, they end with an
+        `ExecutionAborted` error. Without it, cells the kernel already has still run
+        if the client disconnects, only the current one is interrupted. If the
+        connection to the kernel is lost or it restarts, every unfinished cell ends
+        with the error.
+        """
+        if not self._opened:
+            raise Exception("WebSocket not connected")
+
+        ticket = self._enqueue()
+        message_ids: List[str] = []
+        try:
+            async for output in self._wait_in_line(ticket):
+                yield output
+
+            for index, code in enumerate(cells):
+                # The env vars are set once for the whole batch
+                if index == 0:
+                    code = await self._prepare_code(code, env_vars, access_token)
+
+                message_id = str(uuid.uuid4())
+                execution = Execution()
+                self._executions[message_id] = execution
+                message_ids.append(message_id)
+                await self._send_execution(message_id, code, execution, stop_on_error)
+
+            try:
+                for index, message_id in enumerate(message_ids):
+                    async for item in self._wait_for_result(message_id):
+                        # Errors about the connection or a restart end each of the
+                        # unfinished cells, so they are tagged like their outputs
+                        if not isinstance(item, Keepalive):
+                            item.cell = index
+                        yield item
+            except (asyncio.CancelledError, GeneratorExit):
+                await self._interrupt_abandoned(message_id)
+                raise
+            finally:
+                for message_id in message_ids:
+                    execution = self._executions.pop(message_id, None)
+                    if execution is not None:
+                        execution.close()
+
+            if env_vars:
+                self._cleanup_task = asyncio.create_task(
+                    self._cleanup_env_vars(env_vars)
+                )
+        finally:
+            self._queue.release(ticket)
+
+    def _enqueue(self) -> object:
+        try:
+            return self._queue.enqueue()
+        except QueueFullError:
+            context_queue_metrics.inc("rejected")
+            raise
+
+    async def _wait_in_line(self, ticket: object):
+        """Wait for the ticket's turn in the context's queue, streaming its position."""
+        position = self._queue.position(ticket)
+        if not position:
+            return
+
+        # Tell the client where it is in line while it waits, the keepalives also
+        # notice if it gives up in the meantime
+        queued_at = time.monotonic()
+        reported = None
+        while position:
+            if position != reported:
+                yield ExecutionQueued(position=position)
+                reported = position
+            else:
+                yield Keepalive()
+            position = await self._queue.wait_turn(ticket, timeout=KEEPALIVE_INTERVAL)
+
+        waited = time.monotonic() - queued_at
+        context_queue_metrics.inc("waits")
+        context_queue_metrics.inc("wait.seconds", waited)
+        context_queue_metrics.max("wait.max_seconds", waited)
+
+    async def _prepare_code(
+        self,
+        code: Union[str, StrictStr],
+        env_vars: Dict[StrictStr, str],
+        access_token: str,
+    ) -> str:
+        """The code with the env vars set before it."""
+        # Wait for any pending cleanup task to complete
+        if self._cleanup_task and not self._cleanup_task.done():
+            logger.debug("Waiting for pending cleanup task to complete")
+            try:
+                await self._cleanup_task
+            except Exception as e:
+                logger.warning(f"Cleanup task failed: {e}")
+            finally:
+                self._cleanup_task = None
+
+        # Get the indentation level from the code
+        code_indent = self._get_code_indentation(code)
+
+        # Build the complete code snippet with env vars
+        complete_code = code
+
+        global_env_vars_snippet = ""
+        env_vars_snippet = ""
+
+        if self._global_env_vars is None:
+            self._global_env_vars = await get_envs(access_token=access_token)
+            global_env_vars_snippet = self._set_env_vars_code(self._global_env_vars)
+
+        if env_vars:
+            env_vars_snippet = self._set_env_vars_code(env_vars)
+
+        if global_env_vars_snippet or env_vars_snippet:
+            indented_env_code = self._indent_code_with_level(
+                f"{global_env_vars_snippet}\n{env_vars_snippet}", code_indent
+            )
+            complete_code = f"{indented_env_code}\n{complete_code}"
+
+        return complete_code
+
+    async def _set_display_options(self, **options):
+        """
+        Set the kernel's display options for the next execution in a separate silent
+        execution, so the code itself is sent as is and cell magics still work.
+        Silent executions don't run the `post_run_cell` hooks, the options last until
+        the end of the next cell. Only Python kernels have them.
+        """
+        options = {key: value for key, value in options.items() if value is not None}
+        if not options or self.language != "python":
+            return
+
+        arguments = ", ".join(f"{key}={value!r}" for key, value in options.items())
+        async for item in self.execute_silently(
+            f"_e2b_set_display_options({arguments})"
+        ):
+            if isinstance(item, Error):
+                logger.error(f"Error setting the display options: {item}")
+
+    async def execute_silently(self, code: str, timeout: Optional[float] = None):
+        """
+        Run the server's own code in a silent execution, which isn't stored in the
+        history and doesn't count as a cell, and stream its outputs. Only outputs it
+        displays explicitly are sent, not the value of its last expression. After
+        `timeout` seconds the kernel is interrupted, like in `execute`.
+        """
+        message_id = str(uuid.uuid4())
+        self._executions[message_id] = Execution(in_background=True)
+
+        try:
+            request = self._get_execute_request(message_id, code, True)
+            await self._send_request(request)
+
+            async for item in self._wait_for_result(message_id, timeout=timeout):
+                yield item
+        finally:
+            self._executions.pop(message_id).close()
+
+    async def execute_silently_in_turn(
+        self, code: str, timeout: Optional[float] = None
+    ):
+        """
+        `execute_silently` for code run on behalf of a request, which takes its turn
+        in the context's queue like the executions do. Raises `QueueFullError` on the
+        first step when too many are already waiting.
+        """
+        ticket = self._enqueue()
+        try:
+            async for output in self._wait_in_line(ticket):
+                yield output
+
+            async for output in self.execute_silently(code, timeout):
+                yield output
+        finally:
+            self._queue.release(ticket)
+
+    async def _send_execution(
+        self,
+        message_id: str,
+        code: str,
+        execution: Execution,
+        stop_on_error: bool = True,
+    ):
+        # Send the code for execution
+        # Initial request and retries
+        for i in range(1 + MAX_RECONNECT_RETRIES):
+            try:
+                logger.info(f"Sending code for the execution ({message_id}): {code}")
+                request = self._get_execute_request(
+                    message_id, code, False, stop_on_error
+                )
+                await self._send_request(request)
+                break
+            except (ConnectionClosedError, WebSocketException) as e:
+                # Keep the last result, even if error
+                if i < MAX_RECONNECT_RETRIES:
+                    logger.warning(
+                        f"WebSocket connection lost while sending execution request, {i + 1}. reconnecting...: {str(e)}"
+                    )
+                    await self.reconnect()
+        else:
+            # The retry didn't help, request wasn't sent successfully
+            logger.error("Failed to send execution request")
+            await execution.queue.put(
+                Error(
+                    name="WebSocketError",
+                    value="Failed to send execution request",
+                    traceback="",
+                )
+            )
+            await execution.queue.put(UnexpectedEndOfExecution())
+
+    async def _interrupt_abandoned(self, message_id: str):
+        logger.warning(
+            f"Client disconnected during execution ({message_id}), interrupting kernel"
+        )
+        # Shield the interrupt from the ongoing cancellation so
+        # the HTTP request to the kernel actually completes.
+        try:
+            await asyncio.shield(self.interrupt())
+        except asyncio.CancelledError:
+            pass
 
     async def _receive_message(self):
         if not self._ws:
@@ -426,21 +1089,32 @@ class ContextWebSocket:
 
         try:
             async for message in self._ws:
-                await self._process_message(json.loads(message))
+                if isinstance(message, bytes):
+                    data = self._decode_binary_message(message)
+                    if data is None:
+                        continue
+                else:
+                    data = json.loads(message)
+
+                await self._process_message(data)
         except Exception as e:
             logger.error(f"WebSocket received error while receiving messages: {str(e)}")
         finally:
-            # To prevent infinite hang, we need to cancel all ongoing execution as we could lost results during the reconnect
-            # Thanks to the locking, there can be either no ongoing execution or just one.
-            for key, execution in self._executions.items():
-                await execution.queue.put(
-                    Error(
-                        name="WebSocketError",
-                        value="The connections was lost, rerun the code to get the results",
-                        traceback="",
-                    )
+            await self._abort_executions()
+
+    async def _abort_executions(self):
+        # To prevent infinite hang, we need to cancel all ongoing execution as we could lost results during the reconnect
+        # Executions are only registered once they're sent to the kernel, so besides the running one
+        # these are the rest of a batch's cells and background requests like the env vars cleanup.
+        for key, execution in self._executions.items():
+            execution.send(
+                Error(
+                    name="WebSocketError",
+                    value="The connections was lost, rerun the code to get the results",
+                    traceback="",
                 )
-                await execution.queue.put(UnexpectedEndOfExecution())
+            )
+            execution.send(UnexpectedEndOfExecution())
 
     async def _process_message(self, data: dict):
         """
@@ -457,14 +1131,14 @@ class ContextWebSocket:
         ):
             logger.error("Context is restarting")
             for execution in self._executions.values():
-                await execution.queue.put(
+                execution.send(
                     Error(
                         name="ContextRestarting",
                         value="Context was restarted",
                         traceback="",
                     )
                 )
-                await execution.queue.put(EndOfExecution())
+                execution.send(EndOfExecution())
             return
 
         parent_msg_ig = data["parent_header"].get("msg_id", None)
@@ -476,7 +1150,6 @@ class ContextWebSocket:
         if not execution:
             return
 
-        queue = execution.queue
         if data["msg_type"] == "error":
             logger.debug(
                 f"Execution {parent_msg_ig} finished execution with error: {data['content']['ename']}: {data['content']['evalue']}"
@@ -486,7 +1159,7 @@ class ContextWebSocket:
                 return
 
             execution.errored = True
-            await queue.put(
+            execution.send(
                 Error(
                     name=data["content"]["ename"],
                     value=data["content"]["evalue"],
@@ -499,7 +1172,7 @@ class ContextWebSocket:
                 logger.debug(
                     f"Execution {parent_msg_ig} received stdout: {data['content']['text']}"
                 )
-                await queue.put(
+                execution.send(
                     Stdout(
                         text=data["content"]["text"], timestamp=data["header"]["date"]
                     )
@@ -509,25 +1182,57 @@ class ContextWebSocket:
                 logger.debug(
                     f"Execution {parent_msg_ig} received stderr: {data['content']['text']}"
                 )
-                await queue.put(
+                execution.send(
                     Stderr(
                         text=data["content"]["text"], timestamp=data["header"]["date"]
                     )
                 )
 
         elif data["msg_type"] in "display_data":
-            result = Result(is_main_result=False, data=data["content"]["data"])
+            result = Result.from_data(
+                is_main_result=False,
+                data=data["content"]["data"],
+                display_id=data["content"].get("transient", {}).get("display_id"),
+                mime_types=execution.mime_types,
+            )
             logger.debug(
                 f"Execution {parent_msg_ig} received display data with following formats: {result.formats()}"
             )
-            await queue.put(result)
+            execution.send(result)
+
+        elif data["msg_type"] == "update_display_data":
+            # Only the compact stream mode tells the client to replace the display
+            if not execution.compact:
+                return
+
+            result = Result.from_data(
+                is_main_result=False,
+                data=data["content"]["data"],
+                display_id=data["content"].get("transient", {}).get("display_id"),
+                mime_types=execution.mime_types,
+            )
+            logger.debug(
+                f"Execution {parent_msg_ig} received display update for {result.display_id}"
+            )
+            execution.send(result)
+
+        elif data["msg_type"] == "clear_output":
+            if not execution.compact:
+                return
+
+            logger.debug(f"Execution {parent_msg_ig} cleared its output")
+            execution.send_clear_output(wait=data["content"].get("wait", False))
 
         elif data["msg_type"] == "execute_result":
-            result = Result(is_main_result=True, data=data["content"]["data"])
+            result = Result.from_data(
+                is_main_result=True,
+                data=data["content"]["data"],
+                mime_types=execution.mime_types,
+            )
             logger.debug(
                 f"Execution {parent_msg_ig} received execution result with following formats: {result.formats()}"
             )
-            await queue.put(result)
+            execution.send(result)
 
         elif data["msg_type"] == "status":
             if data["content"]["execution_state"] == "busy" and execution.in_background:
@@ -537,18 +1242,18 @@ class ContextWebSocket:
             if data["content"]["execution_state"] == "idle":
                 if execution.input_accepted:
                     logger.debug(f"Execution {parent_msg_ig} finished execution")
-                    await queue.put(EndOfExecution())
+                    execution.send(EndOfExecution())
 
             elif data["content"]["execution_state"] == "error":
                 logger.debug(f"Execution {parent_msg_ig} finished execution with error")
-                await queue.put(
+                execution.send(
                     Error(
                         name=data["content"]["ename"],
                         value=data["content"]["evalue"],
                         traceback="".join(data["content"]["traceback"]),
                     )
                 )
-                await queue.put(EndOfExecution())
+                execution.send(EndOfExecution())
 
         elif data["msg_type"] == "execute_reply":
             if data["content"]["status"] == "error":
@@ -558,29 +1263,30 @@ class ContextWebSocket:
                     return
 
                 execution.errored = True
-                await queue.put(
+                execution.send(
                     Error(
                         name=data["content"].get("ename", ""),
                         value=data["content"].get("evalue", ""),
                         traceback="".join(data["content"].get("traceback", [])),
                     )
                 )
-            elif data["content"]["status"] == "abort":
+            # "aborted" as in the messaging spec, "abort" for kernels that send it
+            elif data["content"]["status"] in ("aborted", "abort"):
                 logger.debug(f"Execution {parent_msg_ig} was aborted")
-                await queue.put(
+                execution.send(
                     Error(
                         name="ExecutionAborted",
                         value="Execution was aborted",
                         traceback="",
                     )
                 )
-                await queue.put(EndOfExecution())
+                execution.send(EndOfExecution())
             elif data["content"]["status"] == "ok":
                 pass
 
         elif data["msg_type"] == "execute_input":
             logger.debug(f"Input accepted for {parent_msg_ig}")
-            await queue.put(
+            execution.send(
                 NumberOfExecutions(execution_count=data["content"]["execution_count"])
             )
             execution.input_accepted = True
@@ -606,3 +1312,109 @@ class ContextWebSocket:
 
         for execution in self._executions.values():
             execution.queue.put_nowait(UnexpectedEndOfExecution())
+
+
+class ContextKernelClient(ContextWebSocket):
+    """
+    Talks to a kernel the server manages itself, over ZMQ instead of a
+    jupyter-server websocket.
+    """
+
+    def __init__(self, kernel_manager, session_id: str, language: str, cwd: str):
+        super().__init__(kernel_manager.kernel_id, session_id, language, cwd)
+        self.url = kernel_manager.connection_file
+        self._kernel_manager = kernel_manager
+        self._client = None
+
+    @property
+    def _opened(self) -> bool:
+        return self._client is not None
+
+    @property
+    def connected(self) -> bool:
+        return (
+            self._client is not None
+            and self._client.channels_running
+            and self._receive_task is not None
+            and not self._receive_task.done()
+        )
+
+    async def reconnect(self):
+        await self.close()
+        await self.connect()
+
+    async def connect(self):
+        logger.debug(f"Connecting to kernel {self.context_id}")
+
+        self._client = self._kernel_manager.client()
+        self._client.start_channels()
+        await self._client.wait_for_ready(timeout=PING_TIMEOUT)
+
+        self._kernel_manager.add_restart_callback(self._on_restart, "restart")
+
+        logger.info(f"Connected to kernel {self.context_id}")
+        self._receive_task = asyncio.create_task(
+            self._receive_message(),
+            name="receive_message",
+        )
+
+    async def interrupt(self) -> bool:
+        """Interrupt the current kernel execution by signalling the kernel directly."""
+        try:
+            await self._kernel_manager.interrupt_kernel()
+        except Exception as e:
+            logger.error(f"Error interrupting kernel {self.context_id}: {e}")
+            return False
+
+        logger.info(f"Kernel {self.context_id} interrupted successfully")
+        return True
+
+    async def _send_request(self, request: dict):
+        self._client.shell_channel.send(request)
+
+    def _on_restart(self):
+        asyncio.create_task(
+            self._process_message(
+                {
+                    "msg_type": "status",
+                    "parent_header": {},
+                    "content": {"execution_state": "restarting"},
+                }
+            )
+        )
+
+    async def _receive_channel(self, get_message):
+        while True:
+            await self._process_message(await get_message())
+
+    async def _receive_message(self):
+        try:
+            await asyncio.gather(
+                self._receive_channel(self._client.get_iopub_msg),
+                self._receive_channel(self._client.get_shell_msg),
+            )
+        except Exception as e:
+            logger.error(f"Kernel client received error while receiving messages: {e}")
+        finally:
+            await self._abort_executions()
+
+    async def close(self):
+        logger.debug(f"Closing kernel client {self.context_id}")
+
+        self._kernel_manager.remove_restart_callback(self._on_restart, "restart")
+
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+
+        if self._client is not None:
+            self._client.stop_channels()
+
+        if self._cleanup_task and not self._cleanup_task.done():
+            self._cleanup_task.cancel()
+            try:
+                await self._cleanup_task
+            except asyncio.CancelledError:
+                pass
+
+        for execution in self._executions.values():
+            execution.queue.put_nowait(UnexpectedEndOfExecution())
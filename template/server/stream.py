@@ -1,18 +1,55 @@
-import json
-from typing import Mapping, Optional, AsyncIterable
+import base64
+from typing import Mapping, Optional, AsyncIterable, Type
 
-from fastapi.encoders import jsonable_encoder
+import msgspec
 from starlette.background import BackgroundTask
 from fastapi.responses import StreamingResponse
 
+from api.models.output import EndOfExecution
+from api.models.result import Result
+
+MSGPACK_MEDIA_TYPE = "application/vnd.e2b.execution+msgpack"
+
+# Result formats that are base64 in the kernel's output and sent as raw bytes
+# in the binary stream format
+BINARY_RESULT_FORMATS = ("png", "jpeg", "webp", "pdf", "arrow")
+
+# Size of the big-endian length prefix of every msgpack record
+RECORD_LENGTH_SIZE = 4
+
+encoder = msgspec.json.Encoder()
+msgpack_encoder = msgspec.msgpack.Encoder()
+
+
+def encode_line(item) -> bytes:
+    """Encodes an output struct (or any JSON-serializable value) as a single NDJSON line."""
+    return encoder.encode_lines((item,))
+
+
+def encode_record(item) -> bytes:
+    """Encodes an output struct as a length-prefixed msgpack record."""
+    if isinstance(item, Result):
+        binary = {
+            key: base64.b64decode(value)
+            for key in BINARY_RESULT_FORMATS
+            if (value := getattr(item, key)) is not None
+        }
+        if binary:
+            item = msgspec.structs.replace(item, **binary)
+
+    body = msgpack_encoder.encode(item)
+    return len(body).to_bytes(RECORD_LENGTH_SIZE, "big") + body
+
 
 class StreamingListJsonResponse(StreamingResponse):
-    """Converts a pydantic model generator into a streaming HTTP Response
+    """Converts an output struct generator into a streaming HTTP Response
     that streams a JSON list, one element at a time.
 
     See https://github.com/tiangolo/fastapi/issues/1978
     """
 
+    encode = staticmethod(encode_line)
+
     def __init__(
         self,
         content_generator: AsyncIterable,
@@ -32,9 +69,29 @@ class StreamingListJsonResponse(StreamingResponse):
         )
 
     async def _encoded_async_generator(self, async_generator: AsyncIterable):
-        """Converts an asynchronous pydantic model generator
+        """Converts an asynchronous output struct generator
         into a streaming JSON list
         """
         async for item in async_generator:
-            yield f"{json.dumps(jsonable_encoder(item))}\n"
-        yield '{"type": "end_of_execution"}\n'
+            yield self.encode(item)
+        yield self.encode(EndOfExecution())
+
+
+class StreamingMsgpackResponse(StreamingListJsonResponse):
+    """Streams the same outputs as `StreamingListJsonResponse`, as length-prefixed
+    msgpack records with images, PDFs and Arrow data as raw bytes instead of base64
+    strings.
+    """
+
+    media_type = MSGPACK_MEDIA_TYPE
+    encode = staticmethod(encode_record)
+
+
+def negotiate_stream_response(
+    accept: Optional[str],
+) -> Type[StreamingListJsonResponse]:
+    """Picks the stream format based on the request's Accept header, NDJSON by default."""
+    if accept and MSGPACK_MEDIA_TYPE in accept:
+        return StreamingMsgpackResponse
+
+    return StreamingListJsonResponse
@@ -0,0 +1,56 @@
+import asyncio
+
+from api.models.logs import Stdout
+from api.models.output import EndOfExecution
+from messaging import ContextWebSocket, Execution
+from utils.queues import OutputQueue
+
+
+def _stream_message(message_id: str, text: str) -> dict:
+    return {
+        "msg_type": "stream",
+        "parent_header": {"msg_id": message_id},
+        "header": {"date": "2024-01-01T00:00:00Z"},
+        "content": {"name": "stdout", "text": text},
+    }
+
+
+async def test_paused_execution_holds_back_only_its_outputs():
+    ws = ContextWebSocket("context-id", "session-id", "python", "/home/user")
+    paused = Execution(backpressure="pause")
+    paused.queue = OutputQueue(1, policy="pause", pause_timeout=60)
+    other = Execution(in_background=True)
+    ws._executions = {"paused": paused, "other": other}
+
+    # Nobody reads the paused execution's outputs
+    for i in range(3):
+        await asyncio.wait_for(
+            ws._process_message(_stream_message("paused", f"{i}\n")), timeout=1
+        )
+    await asyncio.wait_for(
+        ws._process_message(_stream_message("other", "other\n")), timeout=1
+    )
+
+    assert (await asyncio.wait_for(other.queue.get(), timeout=1)).text == "other\n"
+
+    # The held back outputs follow once the client reads again
+    paused.send(EndOfExecution())
+    outputs = [await asyncio.wait_for(paused.queue.get(), timeout=1) for _ in range(4)]
+    assert [output.text for output in outputs[:3]] == ["0\n", "1\n", "2\n"]
+    assert isinstance(outputs[3], EndOfExecution)
+
+    paused.close()
+    other.close()
+
+
+async def test_outputs_are_sent_in_order():
+    execution = Execution()
+    for i in range(100):
+        execution.send(Stdout(text=f"{i}\n"))
+    execution.send(EndOfExecution())
+
+    outputs = [await execution.queue.get() for _ in range(101)]
+    assert [output.text for output in outputs[:100]] == [f"{i}\n" for i in range(100)]
+    assert isinstance(outputs[100], EndOfExecution)
+
+    execution.close()
@@ -0,0 +1,30 @@
+import os
+
+from api.models.logs import Stdout
+from utils.budget import OutputBudget
+
+
+async def test_spilled_output_is_written_to_the_file(tmp_path):
+    budget = OutputBudget(str(tmp_path), max_output_bytes=4)
+    assert (await budget.check(Stdout(text="12"))).text == "12"
+    assert (await budget.check(Stdout(text="3456"))).text == "34"
+    assert await budget.check(Stdout(text="78")) is None
+
+    [truncation] = await budget.truncations()
+    assert truncation.output == "stdout"
+    assert truncation.total_bytes == 8
+    assert truncation.truncated_bytes == 4
+    with open(os.path.join(tmp_path, "stdout.log"), encoding="utf-8") as f:
+        assert f.read() == "5678"
+
+
+async def test_close_closes_the_spill_files(tmp_path):
+    budget = OutputBudget(str(tmp_path), max_output_bytes=0)
+    await budget.check(Stdout(text="1"))
+    [file] = budget._files.values()
+
+    # The execution ended without reporting its truncations
+    budget.close()
+    budget.close()
+
+    assert file.closed
@@ -0,0 +1,55 @@
+from api.models.error import Error
+from api.models.logs import Stdout
+from api.models.output import NumberOfExecutions, OutputTruncated
+from executions import ExecutionStream
+from stream import encode_line
+
+
+def _stream(max_result_bytes):
+    return ExecutionStream(
+        "execution-id",
+        "context-id",
+        buffer_size=8,
+        keep_outputs=True,
+        max_result_bytes=max_result_bytes,
+    )
+
+
+async def test_result_is_limited_while_running():
+    stream = _stream(max_result_bytes=2048)
+    await stream.append(NumberOfExecutions(execution_count=1))
+    for i in range(1000):
+        await stream.append(Stdout(text=f"line {i}\n"))
+
+        # Checked on every output, not just once the execution finishes
+        assert stream.size <= 2048
+
+    await stream.finish(Error(name="ValueError", value="", traceback=""))
+
+    outputs = stream.outputs
+    # The oldest stdout is dropped, the other outputs are kept
+    assert isinstance(outputs[0], NumberOfExecutions)
+    assert outputs[1].text != "line 0\n"
+    assert outputs[-3].text == "line 999\n"
+    assert isinstance(outputs[-2], Error)
+
+    truncated = outputs[-1]
+    assert isinstance(truncated, OutputTruncated)
+    assert truncated.output == "stdout"
+    assert truncated.total_bytes == sum(
+        len(encode_line(Stdout(text=f"line {i}\n", seq=i + 2))) for i in range(1000)
+    )
+    kept = sum(len(encode_line(output)) for output in outputs[1:-2])
+    assert truncated.truncated_bytes == truncated.total_bytes - kept
+    assert stream.size == sum(len(encode_line(output)) for output in outputs)
+
+
+async def test_result_under_the_limit_is_kept_whole():
+    stream = _stream(max_result_bytes=1024 * 1024)
+    for i in range(10):
+        await stream.append(Stdout(text=f"line {i}\n"))
+    await stream.finish()
+
+    assert [output.text for output in stream.outputs] == [
+        f"line {i}\n" for i in range(10)
+    ]
@@ -0,0 +1,149 @@
+import asyncio
+from asyncio import sleep
+
+import pytest
+
+import kernel_pool
+from kernel_pool import KernelPool, parse_pool_sizes
+
+
+class _Connection:
+    def __init__(self, context_id: str, cwd: str):
+        self.context_id = context_id
+        self.cwd = cwd
+        self.connected = True
+        self.closed = False
+
+    async def connect(self):
+        pass
+
+    async def change_current_directory(self, path: str, language: str):
+        self.cwd = path
+
+    async def close(self):
+        self.closed = True
+
+
+class _Kernels:
+    def __init__(self, failures: int = 0):
+        self.started = []
+        self.shut_down = []
+        self.failures = failures
+
+    async def start(self, kernel_name: str):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("Failed to start kernel")
+
+        self.started.append(kernel_name)
+        return f"kernel-{len(self.started)}", "session"
+
+    def connection(self, context_id, session_id, language, cwd):
+        return _Connection(context_id, cwd)
+
+    async def shutdown(self, context_id: str):
+        self.shut_down.append(context_id)
+        return True
+
+
+async def _settle(pool: KernelPool):
+    """Wait for the refills and the discards of kernels they left behind."""
+    await asyncio.gather(*pool._refill_tasks.values())
+    for _ in range(3):
+        await sleep(0)
+
+
+@pytest.fixture
+def retry_delays(monkeypatch):
+    delays = []
+
+    async def record(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(kernel_pool.asyncio, "sleep", record)
+    return delays
+
+
+def test_parse_pool_sizes():
+    assert parse_pool_sizes("") == {}
+    assert parse_pool_sizes("Python=2, javascript=-1,r=x") == {
+        "python": 2,
+        "javascript": 0,
+    }
+
+
+async def test_refill_to_size():
+    kernels = _Kernels()
+    pool = KernelPool(kernels, {"python": 2})
+    await _settle(pool)
+
+    assert pool.stats()["python"]["idle"] == 2
+    assert kernels.started == ["python", "python"]
+
+
+async def test_acquire_hands_out_and_refills():
+    kernels = _Kernels()
+    pool = KernelPool(kernels, {"python": 1})
+    await _settle(pool)
+
+    ws = pool.acquire("python")
+    await _settle(pool)
+
+    assert ws.context_id == "kernel-1"
+    assert pool.stats()["python"] == {"size": 1, "idle": 1, "hits": 1, "misses": 0}
+
+
+async def test_acquire_miss():
+    pool = KernelPool(_Kernels(), {"python": 0})
+
+    assert pool.acquire("python") is None
+    assert pool.acquire("r") is None
+    assert pool.stats()["python"]["misses"] == 1
+
+
+async def test_acquire_skips_disconnected_kernels():
+    kernels = _Kernels()
+    pool = KernelPool(kernels, {"python": 2})
+    await _settle(pool)
+    pool._idle["python"][0].connected = False
+
+    ws = pool.acquire("python")
+    await _settle(pool)
+
+    assert ws.context_id == "kernel-2"
+    assert kernels.shut_down == ["kernel-1"]
+
+
+async def test_refill_retries_with_backoff(retry_delays):
+    kernels = _Kernels(failures=3)
+    pool = KernelPool(kernels, {"python": 1})
+    await _settle(pool)
+
+    assert retry_delays == [1, 2, 4]
+    assert pool.stats()["python"]["idle"] == 1
+
+
+async def test_resize():
+    kernels = _Kernels()
+    pool = KernelPool(kernels, {"python": 1})
+    await _settle(pool)
+
+    pool.set_size("python", 3)
+    await _settle(pool)
+    assert pool.stats()["python"]["idle"] == 3
+
+    pool.set_size("python", 1)
+    await _settle(pool)
+    assert pool.stats()["python"]["idle"] == 1
+    assert len(kernels.shut_down) == 2
+
+
+async def test_close_discards_idle_kernels():
+    kernels = _Kernels()
+    pool = KernelPool(kernels, {"python": 2})
+    await _settle(pool)
+
+    await pool.close()
+
+    assert sorted(kernels.shut_down) == ["kernel-1", "kernel-2"]
+    assert pool.acquire("python") is None
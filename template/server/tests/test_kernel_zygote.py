@@ -0,0 +1,191 @@
+import gc
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import kernel_zygote
+
+ZYGOTE_PATH = Path(kernel_zygote.__file__)
+
+# The zygote with a fake kernel, which writes what it was started with to the file
+# in its first argument and exits with the code in the second one, or waits for
+# SIGTERM with "wait"
+ZYGOTE_CODE = """
+import json
+import os
+import signal
+import sys
+import time
+
+from ipykernel import kernelapp
+
+import kernel_zygote
+
+
+def blas_threads():
+    if "numpy" not in sys.modules:
+        return None
+
+    from threadpoolctl import threadpool_info
+
+    return [pool["num_threads"] for pool in threadpool_info()]
+
+
+def fake_kernel():
+    out, code = sys.argv[1:]
+    with open(out, "w") as f:
+        json.dump(
+            {
+                "pid": os.getpid(),
+                "cwd": os.getcwd(),
+                "variable": os.environ.get("E2B_TEST_VARIABLE"),
+                "blas_threads": blas_threads(),
+            },
+            f,
+        )
+
+    if code == "wait":
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(3))
+        while True:
+            time.sleep(1)
+    sys.exit(int(code))
+
+
+kernelapp.launch_new_instance = fake_kernel
+kernel_zygote.serve()
+"""
+
+
+def _wait_for(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.05)
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.fixture
+def zygote(request, tmp_path):
+    socket_path = tmp_path / "zygote.sock"
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ZYGOTE_PATH.parent),
+        "E2B_KERNEL_ZYGOTE_SOCKET": str(socket_path),
+        # Nothing by default to keep the tests fast
+        "E2B_KERNEL_ZYGOTE_PRELOAD": getattr(request, "param", ""),
+    }
+    process = subprocess.Popen([sys.executable, "-c", ZYGOTE_CODE], env=env)
+    try:
+        _wait_for(socket_path.exists)
+        yield socket_path
+    finally:
+        process.kill()
+        process.wait()
+
+
+def _launch(socket_path: Path, out: Path, code: str, env=None, **kwargs):
+    env = {
+        **os.environ,
+        "E2B_KERNEL_ZYGOTE_SOCKET": str(socket_path),
+        "E2B_TEST_VARIABLE": "launcher",
+        **(env or {}),
+    }
+    return subprocess.Popen(
+        [sys.executable, str(ZYGOTE_PATH), "launch", str(out), code],
+        env=env,
+        **kwargs,
+    )
+
+
+def test_launch_runs_kernel_in_zygote(zygote, tmp_path):
+    out = tmp_path / "kernel.json"
+
+    launcher = _launch(zygote, out, "7", cwd=tmp_path)
+
+    # The kernel's exit code is the launcher's
+    assert launcher.wait(timeout=10) == 7
+    kernel = json.loads(out.read_text())
+    assert kernel["pid"] != launcher.pid
+    # With the launcher's environment and working directory
+    assert kernel["variable"] == "launcher"
+    assert kernel["cwd"] == str(tmp_path)
+
+
+def test_launch_forwards_signals(zygote, tmp_path):
+    out = tmp_path / "kernel.json"
+    launcher = _launch(zygote, out, "wait")
+    _wait_for(out.exists)
+
+    launcher.send_signal(signal.SIGTERM)
+
+    assert launcher.wait(timeout=10) == 3
+
+
+def test_kernel_exits_with_launcher(zygote, tmp_path):
+    out = tmp_path / "kernel.json"
+    launcher = _launch(zygote, out, "wait")
+    _wait_for(out.exists)
+    pid = json.loads(out.read_text())["pid"]
+
+    launcher.kill()
+    launcher.wait()
+
+    _wait_for(lambda: not _is_running(pid))
+
+
+def test_launch_falls_back_without_zygote(monkeypatch, tmp_path):
+    calls = []
+
+    def execv(path, argv):
+        calls.append(argv)
+        raise SystemExit
+
+    monkeypatch.setattr(kernel_zygote, "SOCKET_PATH", str(tmp_path / "missing.sock"))
+    monkeypatch.setattr(kernel_zygote.os, "execv", execv)
+
+    with pytest.raises(SystemExit):
+        kernel_zygote.launch(["-f", "kernel.json"])
+
+    assert calls == [[sys.executable, "-m", "ipykernel_launcher", "-f", "kernel.json"]]
+
+
+def test_preload_limits_thread_pools(monkeypatch):
+    for name in kernel_zygote.THREAD_LIMIT_VARIABLES:
+        monkeypatch.setenv(name, "8")
+    monkeypatch.setenv("MPLBACKEND", "agg")
+    monkeypatch.setattr(kernel_zygote, "PRELOAD_MODULES", "")
+
+    try:
+        kernel_zygote._preload()
+    finally:
+        gc.unfreeze()
+
+    for name in kernel_zygote.THREAD_LIMIT_VARIABLES:
+        assert os.environ[name] == "1"
+
+
+@pytest.mark.parametrize("zygote", ["numpy"], indirect=True)
+def test_kernel_thread_pools_sized_after_fork(zygote, tmp_path):
+    pytest.importorskip("threadpoolctl")
+    out = tmp_path / "kernel.json"
+
+    launcher = _launch(zygote, out, "0", env={"OPENBLAS_NUM_THREADS": "2"})
+
+    assert launcher.wait(timeout=30) == 0
+    # The zygote imported numpy with a single thread, the kernel gets what its
+    # environment asks for
+    assert set(json.loads(out.read_text())["blas_threads"]) == {2}
@@ -0,0 +1,36 @@
+import json
+
+import msgspec
+
+from api.models.error import Error
+from api.models.logs import Stdout
+from api.models.result import Result
+from stream import encode_line, encode_record
+
+
+def test_plain_result_has_no_null_keys():
+    result = Result.from_data(is_main_result=True, data={"text/plain": "1"})
+
+    assert json.loads(encode_line(result)) == {
+        "type": "result",
+        "text": "1",
+        "extra": {},
+        "is_main_result": True,
+    }
+
+
+def test_outputs_have_no_null_keys():
+    for output in (Stdout(text="1\n"), Error(name="ValueError", value="")):
+        assert None not in json.loads(encode_line(output)).values()
+
+
+def test_msgpack_record_has_no_null_keys():
+    result = Result.from_data(is_main_result=False, data={"image/png": "iVBORw0KGgo="})
+
+    record = msgspec.msgpack.decode(encode_record(result)[4:])
+    assert record == {
+        "type": "result",
+        "png": b"\x89PNG\r\n\x1a\n",
+        "extra": {},
+        "is_main_result": False,
+    }
@@ -0,0 +1,147 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+
+import msgspec
+
+from api.models.result import FORMAT_MIME_TYPES, BlobReference, Result
+from envs import BLOB_DIR, BLOB_STORE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Result formats that can be stored as blobs, by how they're stored: the decoded
+# bytes of the base64 ones, the UTF-8 of the text ones and the JSON of the others
+BASE64_FORMATS = ("png", "jpeg", "webp", "pdf", "arrow")
+TEXT_FORMATS = ("text", "html", "markdown", "svg", "latex", "javascript")
+JSON_FORMATS = ("json", "data", "dataframe", "image_saves")
+
+BLOB_FORMATS = (*BASE64_FORMATS, *TEXT_FORMATS, *JSON_FORMATS)
+
+BLOB_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+BYTE_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def encode_format(key: str, value) -> bytes:
+    if key in BASE64_FORMATS:
+        return base64.b64decode(value)
+    if key in TEXT_FORMATS:
+        return value.encode()
+    return json.dumps(value).encode()
+
+
+def parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    The `start` and `stop` of a single `Range: bytes=...` header, `None` if it
+    can't be satisfied. Raises `ValueError` for ranges that aren't supported, like
+    several at once.
+    """
+    match = BYTE_RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        raise ValueError(f"Unsupported range: {header}")
+
+    first, last = match.groups()
+    if first == "":
+        # The last bytes
+        start, stop = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+
+    if start >= size or start >= stop:
+        return None
+    return start, stop
+
+
+class BlobStore:
+    """
+    Content-addressed store of large result payloads in `directory`, one file per
+    SHA-256 of the content. Holds at most `max_bytes` of the blobs it stored, the
+    least recently stored are removed first.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._total = 0
+
+    def put(self, data: bytes, blob_hash: str | None = None) -> str:
+        """Store the content, `blob_hash` is its SHA-256 if already known."""
+        blob_hash = blob_hash or hashlib.sha256(data).hexdigest()
+        if blob_hash in self._sizes:
+            self._sizes.move_to_end(blob_hash)
+            return blob_hash
+
+        os.makedirs(self._directory, exist_ok=True)
+        path = self._path(blob_hash)
+        # Readers never see a partially written blob
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._sizes[blob_hash] = len(data)
+        self._total += len(data)
+        self._evict()
+        return blob_hash
+
+    def size(self, blob_hash: str) -> int | None:
+        if not BLOB_HASH_PATTERN.match(blob_hash):
+            return None
+        try:
+            return os.path.getsize(self._path(blob_hash))
+        except OSError:
+            return None
+
+    def read(self, blob_hash: str, start: int, stop: int) -> bytes:
+        with open(self._path(blob_hash), "rb") as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+    def offload(self, result: Result, threshold: int) -> Result:
+        """
+        The result with its formats over `threshold` bytes stored as blobs and
+        replaced by references in `blobs`.
+        """
+        blobs: dict[str, BlobReference] = {}
+        for key in BLOB_FORMATS:
+            value = getattr(result, key)
+            if value is None:
+                continue
+
+            data = encode_format(key, value)
+            if len(data) <= threshold:
+                continue
+
+            blobs[key] = BlobReference(
+                hash=self.put(data), size=len(data), mime_type=FORMAT_MIME_TYPES[key]
+            )
+
+        if not blobs:
+            return result
+
+        return msgspec.structs.replace(
+            result,
+            blobs={**(result.blobs or {}), **blobs},
+            **{key: None for key in blobs},
+        )
+
+    def _path(self, blob_hash: str) -> str:
+        return os.path.join(self._directory, blob_hash)
+
+    def _evict(self):
+        while self._total > self._max_bytes and len(self._sizes) > 1:
+            blob_hash, size = self._sizes.popitem(last=False)
+            self._total -= size
+            logger.debug(f"Evicting blob {blob_hash}")
+            try:
+                os.remove(self._path(blob_hash))
+            except OSError as e:
+                logger.warning(f"Failed to remove blob {blob_hash}: {e}")
+
+
+blob_store = BlobStore(BLOB_DIR, BLOB_STORE_MAX_BYTES)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+from typing import TextIO
+
+import msgspec
+
+from api.models.logs import Stderr, Stdout
+from api.models.output import OutputTruncated
+from api.models.result import Result
+
+logger = logging.getLogger(__name__)
+
+encoder = msgspec.json.Encoder()
+
+
+class OutputBudget:
+    """
+    Limits how much output a single execution streams to the client.
+
+    Stdout and stderr share `max_output_bytes`, results are limited by count
+    (`max_results`) and by their total encoded size (`max_result_bytes`). Output over
+    the budget isn't dropped but written to files in `directory`, `stdout.log` and
+    `stderr.log` and one `result-<n>.json` per result, and `truncations()` reports
+    what ended up there. The files are written in a thread and stay open until
+    `close()`.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_output_bytes: int | None = None,
+        max_results: int | None = None,
+        max_result_bytes: int | None = None,
+    ):
+        self._directory = directory
+        self._max_output_bytes = max_output_bytes
+        self._max_results = max_results
+        self._max_result_bytes = max_result_bytes
+
+        self._output_bytes = 0
+        self._results = 0
+        self._result_bytes = 0
+        self._spilled_results = 0
+
+        self._files: dict[str, TextIO] = {}
+        # Writes to the same file have to happen in the order of the output
+        self._write_lock = asyncio.Lock()
+        self._total: dict[str, int] = {}
+        self._truncated: dict[str, int] = {}
+
+    async def check(self, output):
+        """
+        Returns the part of the output that fits the budget, `None` if nothing does.
+        The rest is written to the spill files.
+        """
+        if isinstance(output, (Stdout, Stderr)):
+            return await self._check_stream(output)
+
+        if isinstance(output, Result):
+            return await self._check_result(output)
+
+        return output
+
+    async def _check_stream(self, output):
+        name = output.type.value
+        text = output.text or ""
+        size = len(text.encode("utf-8"))
+        self._total[name] = self._total.get(name, 0) + size
+
+        if self._max_output_bytes is None:
+            return output
+
+        remaining = self._max_output_bytes - self._output_bytes
+        if size <= remaining:
+            self._output_bytes += size
+            return output
+
+        # Cut at the byte budget without splitting a character
+        sent = text.encode("utf-8")[: max(0, remaining)].decode("utf-8", "ignore")
+        self._output_bytes += len(sent.encode("utf-8"))
+        await self._spill(name, f"{name}.log", text[len(sent) :])
+
+        if not sent:
+            return None
+        return type(output)(text=sent, timestamp=output.timestamp)
+
+    async def _check_result(self, output: Result):
+        encoded = encoder.encode(output)
+        self._total["results"] = self._total.get("results", 0) + len(encoded)
+
+        over_count = (
+            self._max_results is not None and self._results >= self._max_results
+        )
+        over_size = (
+            self._max_result_bytes is not None
+            and self._result_bytes + len(encoded) > self._max_result_bytes
+        )
+        if over_count or over_size:
+            filename = f"result-{self._spilled_results}.json"
+            await self._spill("results", filename, encoded.decode("utf-8"))
+            self._spilled_results += 1
+            return None
+
+        self._results += 1
+        self._result_bytes += len(encoded)
+        return output
+
+    async def _spill(self, name: str, filename: str, text: str):
+        self._truncated[name] = self._truncated.get(name, 0) + len(text.encode("utf-8"))
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, name, filename, text)
+
+    def _write(self, name: str, filename: str, text: str):
+        path = os.path.join(self._directory, filename)
+        try:
+            if name == "results":
+                os.makedirs(self._directory, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                return
+
+            file = self._files.get(name)
+            if file is None:
+                os.makedirs(self._directory, exist_ok=True)
+                file = self._files[name] = open(path, "a", encoding="utf-8")
+            file.write(text)
+        except OSError as e:
+            logger.error(f"Failed to write truncated {name} to {path}: {e}")
+
+    def close(self):
+        """Closes the spill files, safe to call more than once."""
+        for name, file in self._files.items():
+            try:
+                file.close()
+            except OSError as e:
+                logger.error(f"Failed to close truncated {name}: {e}")
+        self._files.clear()
+
+    async def truncations(self) -> list[OutputTruncated]:
+        """Closes the spill files and describes the output that went to them."""
+        async with self._write_lock:
+            await asyncio.to_thread(self.close)
+
+        truncations = []
+        for name in ("stdout", "stderr", "results"):
+            if name not in self._truncated:
+                continue
+
+            truncations.append(
+                OutputTruncated(
+                    output=name,
+                    path=(
+                        self._directory
+                        if name == "results"
+                        else os.path.join(self._directory, f"{name}.log")
+                    ),
+                    total_bytes=self._total[name],
+                    truncated_bytes=self._truncated[name],
+                )
+            )
+
+        return truncations
@@ -0,0 +1,122 @@
+import re
+import time
+
+# Carriage return and the ANSI "erase in line" sequences progress bars redraw with
+CONTROL = re.compile(r"(\r|\x1b\[[012]?K)")
+CLEAR_TO_END = "\x1b[K"
+
+
+class StreamCompactor:
+    """
+    Tracks the unfinished last line of a stdout/stderr stream the way a terminal would
+    and turns the chunks written to it into what the client needs to show the same.
+
+    Plain output passes through unchanged. When the line is redrawn (`\\r`, erase in
+    line), like progress bars do thousands of times, only its latest state is sent,
+    as `\\r` followed by the whole line, and at most once per `interval` seconds.
+    Finished lines are always sent right away in their final state.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._line = ""
+        self._cursor = 0
+        # Part of the unfinished line the client has
+        self._sent = ""
+        self._redrawn = False
+        self._last_redraw_sent = float("-inf")
+
+    @property
+    def pending(self) -> bool:
+        """Whether the line has a redraw the client doesn't have yet."""
+        return self._redrawn and self._line != self._sent
+
+    def due_in(self, now: float | None = None) -> float | None:
+        """Seconds until the pending redraw can be sent, `None` if there's none."""
+        if not self.pending:
+            return None
+
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._last_redraw_sent + self._interval - now)
+
+    def feed(self, text: str, now: float | None = None) -> str:
+        """Apply a chunk of the stream, returns the text to send for it (can be empty)."""
+        now = time.monotonic() if now is None else now
+
+        lines = text.split("\n")
+        out = []
+        for line in lines[:-1]:
+            self._write(line)
+            out.append(self._finish_line())
+
+        self._write(lines[-1])
+        if not self._redrawn:
+            out.append(self._append())
+        elif self.due_in(now) == 0:
+            out.append(self._redraw(now))
+
+        return "".join(out)
+
+    def flush(self, now: float | None = None) -> str:
+        """Returns the pending redraw regardless of the rate limit."""
+        if not self.pending:
+            return ""
+
+        return self._redraw(time.monotonic() if now is None else now)
+
+    def reset(self):
+        """Forget the unfinished line, e.g. after the client cleared the output."""
+        self._line = ""
+        self._cursor = 0
+        self._sent = ""
+        self._redrawn = False
+
+    def _write(self, text: str):
+        for part in CONTROL.split(text):
+            if not part:
+                continue
+
+            if part == "\r":
+                self._cursor = 0
+                self._redrawn = True
+            elif part in ("\x1b[K", "\x1b[0K"):
+                self._line = self._line[: self._cursor]
+                self._redrawn = True
+            elif part in ("\x1b[1K", "\x1b[2K"):
+                self._line = " " * self._cursor + (
+                    self._line[self._cursor :] if part == "\x1b[1K" else ""
+                )
+                self._redrawn = True
+            else:
+                end = self._cursor + len(part)
+                self._line = self._line[: self._cursor] + part + self._line[end:]
+                self._cursor = end
+
+    def _append(self) -> str:
+        # Not redrawn, so the line only grew since it was last sent
+        text = self._line[len(self._sent) :]
+        self._sent = self._line
+        return text
+
+    def _redraw(self, now: float) -> str:
+        text = "\r" + self._line
+        if len(self._line) < len(self._sent):
+            text += CLEAR_TO_END
+
+        self._sent = self._line
+        self._redrawn = False
+        self._last_redraw_sent = now
+        return text
+
+    def _finish_line(self) -> str:
+        if not self._redrawn:
+            text = self._append()
+        elif self._line == self._sent:
+            text = ""
+        elif self._sent:
+            text = self._redraw(self._last_redraw_sent)
+        else:
+            text = self._line
+
+        self.reset()
+        return text + "\n"
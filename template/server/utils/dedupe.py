@@ -0,0 +1,85 @@
+import hashlib
+from collections import OrderedDict
+
+import msgspec
+
+from api.models.result import FORMAT_MIME_TYPES, BlobReference, Result
+from envs import DEDUPE_MAX_SESSIONS, DEDUPE_MIN_BYTES, DEDUPE_SESSION_MAX_PAYLOADS
+from utils.blobs import BLOB_FORMATS, BlobStore, blob_store, encode_format
+from utils.metrics import dedupe_metrics
+
+
+class DedupeSessions:
+    """
+    Hashes of the result formats sent to each client session, so that content sent
+    again goes as a reference to it in `blobs`, resolved from the client's cache.
+    The first time, the hashes are sent in `hashes` for the client to cache the
+    content under.
+
+    Each session remembers the latest `max_payloads` hashes, the client's cache
+    should hold at least as many. References are also stored in the blob store for
+    clients that don't have the content anymore. Formats under `min_bytes` are
+    always sent, and the least recently used of `max_sessions` sessions are forgotten.
+    """
+
+    def __init__(
+        self, store: BlobStore, max_sessions: int, max_payloads: int, min_bytes: int
+    ):
+        self._store = store
+        self._max_sessions = max_sessions
+        self._max_payloads = max_payloads
+        self._min_bytes = min_bytes
+        self._sessions: OrderedDict[str, OrderedDict[str, None]] = OrderedDict()
+
+    def dedupe(self, result: Result, session_id: str) -> Result:
+        sent = self._session(session_id)
+
+        blobs: dict[str, BlobReference] = dict(result.blobs or {})
+        hashes: dict[str, str] = {}
+        for key in BLOB_FORMATS:
+            value = getattr(result, key)
+            if value is None:
+                continue
+
+            data = encode_format(key, value)
+            if len(data) < self._min_bytes:
+                continue
+
+            blob_hash = hashlib.sha256(data).hexdigest()
+            if blob_hash not in sent:
+                sent[blob_hash] = None
+                if len(sent) > self._max_payloads:
+                    sent.popitem(last=False)
+                hashes[key] = blob_hash
+                continue
+
+            sent.move_to_end(blob_hash)
+            self._store.put(data, blob_hash)
+            blobs[key] = BlobReference(
+                hash=blob_hash, size=len(data), mime_type=FORMAT_MIME_TYPES[key]
+            )
+            dedupe_metrics.inc("references")
+            dedupe_metrics.inc("bytes_saved", len(data))
+
+        if not hashes and len(blobs) == len(result.blobs or {}):
+            return result
+
+        deduped = {key: None for key in blobs if key not in (result.blobs or {})}
+        return msgspec.structs.replace(
+            result, blobs=blobs or None, hashes=hashes or None, **deduped
+        )
+
+    def _session(self, session_id: str) -> "OrderedDict[str, None]":
+        sent = self._sessions.pop(session_id, None)
+        if sent is None:
+            sent = OrderedDict()
+        self._sessions[session_id] = sent
+
+        while len(self._sessions) > self._max_sessions:
+            self._sessions.popitem(last=False)
+        return sent
+
+
+dedupe_sessions = DedupeSessions(
+    blob_store, DEDUPE_MAX_SESSIONS, DEDUPE_SESSION_MAX_PAYLOADS, DEDUPE_MIN_BYTES
+)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+
+from api.models.error import Error
+from api.models.output import EndOfExecution, Keepalive
+
+logger = logging.getLogger(__name__)
+
+# Outputs of all of the contexts waiting for the client, the executions pause
+# on their own queues once it's full
+FANOUT_QUEUE_SIZE = 1024
+
+
+async def fan_out(
+    executions: dict[str, AsyncIterator],
+    max_concurrency: int,
+    keepalive_interval: float,
+):
+    """
+    Run the executions, keyed by their context ID, at most `max_concurrency` at a
+    time and stream their outputs as they come, each tagged with its `context_id`.
+
+    A context that fails doesn't affect the others, its failure is streamed as an
+    `error` for it. Every context's outputs end with an `end_of_execution` of its
+    own, and a keepalive is sent after `keepalive_interval` seconds without output.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=FANOUT_QUEUE_SIZE)
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def run(context_id: str, outputs: AsyncIterator):
+        async with slots:
+            try:
+                async for output in outputs:
+                    # The merged stream sends its own keepalives
+                    if isinstance(output, Keepalive):
+                        continue
+                    output.context_id = context_id
+                    await queue.put(output)
+            except Exception as e:
+                logger.error(f"Execution in context {context_id} failed: {e}")
+                await queue.put(
+                    Error(
+                        name=type(e).__name__,
+                        value=str(e),
+                        traceback="",
+                        context_id=context_id,
+                    )
+                )
+            finally:
+                await outputs.aclose()
+
+        await queue.put(EndOfExecution(context_id=context_id))
+
+    tasks = [
+        asyncio.create_task(run(context_id, outputs), name=f"fanout-{context_id}")
+        for context_id, outputs in executions.items()
+    ]
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            try:
+                output = await asyncio.wait_for(queue.get(), timeout=keepalive_interval)
+            except TimeoutError:
+                yield Keepalive()
+                continue
+
+            if isinstance(output, EndOfExecution):
+                remaining -= 1
+            yield output
+    finally:
+        # If the client went away, interrupt whatever is still running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
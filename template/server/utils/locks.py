@@ -1,4 +1,6 @@
 import asyncio
+from collections import deque
+from typing import Deque, Optional
 
 
 class LockedMap(dict):
@@ -16,3 +18,63 @@ class LockedMap(dict):
         print(f"Lock acquired for {key}")
         self._map_lock.release()
         return lock
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueuedLock:
+    """
+    First come, first served lock that lets waiters follow their place in line and
+    turns new ones away once `max_waiting` are already waiting (0 for no limit).
+
+    `enqueue` takes a place synchronously, so a full queue is rejected before any
+    work starts, `wait_turn` waits for the place to move up and `release` gives it
+    up, whether it got to hold the lock or not.
+    """
+
+    def __init__(self, max_waiting: int = 0):
+        self._max_waiting = max_waiting
+        # The holder of the lock first, then the waiters in order
+        self._line: Deque[object] = deque()
+        self._moved = asyncio.Event()
+
+    @property
+    def waiting(self) -> int:
+        return max(0, len(self._line) - 1)
+
+    def enqueue(self) -> object:
+        """Take a place in line, returns the ticket to pass to the other methods."""
+        if self._max_waiting and self.waiting >= self._max_waiting:
+            raise QueueFullError(
+                f"{self.waiting} executions are already waiting for the context"
+            )
+
+        ticket = object()
+        self._line.append(ticket)
+        return ticket
+
+    def position(self, ticket: object) -> int:
+        """Waiters ahead of the ticket, 0 once it holds the lock."""
+        return self._line.index(ticket)
+
+    async def wait_turn(self, ticket: object, timeout: Optional[float] = None) -> int:
+        """Wait until the ticket moves up in line or `timeout`, returns its position."""
+        position = self.position(ticket)
+        if position == 0:
+            return position
+
+        moved = self._moved
+        try:
+            await asyncio.wait_for(moved.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.position(ticket)
+
+    def release(self, ticket: object):
+        self._line.remove(ticket)
+
+        # Wake everyone waiting on the current event, later waits get a new one
+        self._moved.set()
+        self._moved = asyncio.Event()
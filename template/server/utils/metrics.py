@@ -0,0 +1,34 @@
+from collections import defaultdict
+
+
+class Counters:
+    """Monotonic counters and maximums, reported by `GET /metrics`."""
+
+    def __init__(self):
+        self._values: dict[str, float] = defaultdict(float)
+
+    def inc(self, name: str, value: float = 1):
+        self._values[name] += value
+
+    def max(self, name: str, value: float):
+        """Keep the largest value seen, e.g. the worst latency."""
+        self._values[name] = max(self._values[name], value)
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(self._values)
+
+
+# How often each backpressure policy of the execution queues kicked in
+queue_metrics = Counters()
+
+# How many executions were cancelled, the interrupts it took and how long until
+# they landed
+cancel_metrics = Counters()
+
+# How many executions had to wait for a busy context and for how long, and how many
+# were rejected because too many were waiting already
+context_queue_metrics = Counters()
+
+# How many result formats were sent as references to content the client already
+# received, and the bytes that saved
+dedupe_metrics = Counters()
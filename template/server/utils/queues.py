@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import pickle
+import tempfile
+import time
+from collections import deque
+
+from api.models.execution_request import BackpressurePolicy
+from api.models.logs import Stderr, Stdout
+from api.models.output import OutputTruncated
+from utils.metrics import queue_metrics
+
+logger = logging.getLogger(__name__)
+
+# Size of the length prefix of every output in the spill file
+RECORD_LENGTH_SIZE = 4
+
+
+class OutputQueue:
+    """
+    Outputs of an execution waiting to be sent to the client, holding at most
+    `maxsize` of them in memory. When a slow client lets it fill up, `policy` decides
+    what happens to the next output:
+
+    - `pause` waits for the client to catch up, which holds back the execution's
+      next outputs (see `Execution.send`), but not the other executions of the
+      context. After `pause_timeout` seconds the output is spilled instead, so the
+      held back outputs don't pile up in memory.
+    - `drop` discards stdout/stderr chunks, reported with `dropped()` at the end, and
+      pauses for everything else.
+    - `spill` writes outputs to a temporary file and reads them back in order when
+      the client catches up.
+
+    `put_nowait` always succeeds and is meant for control messages.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: BackpressurePolicy = "pause",
+        pause_timeout: float = 10,
+        spill_dir: str | None = None,
+    ):
+        self._maxsize = maxsize
+        self._policy = policy
+        self._pause_timeout = pause_timeout
+        self._spill_dir = spill_dir
+
+        self._items: deque = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self._spill = None
+        self._spilled = 0
+        self._spill_read_offset = 0
+
+        self._stream_bytes: dict[str, int] = {}
+        self._dropped_bytes: dict[str, int] = {}
+        self._closed = False
+
+    def _full(self) -> bool:
+        return self._maxsize > 0 and len(self._items) >= self._maxsize
+
+    def empty(self) -> bool:
+        return not self._items and not self._spilled
+
+    def qsize(self) -> int:
+        return len(self._items) + self._spilled
+
+    async def put(self, item):
+        if self._closed:
+            return
+
+        if self._policy == "drop" and isinstance(item, (Stdout, Stderr)):
+            name = item.type.value
+            size = len((item.text or "").encode("utf-8"))
+            self._stream_bytes[name] = self._stream_bytes.get(name, 0) + size
+
+            if self._full() or self._spilled:
+                self._dropped_bytes[name] = self._dropped_bytes.get(name, 0) + size
+                queue_metrics.inc("drop.chunks")
+                queue_metrics.inc("drop.bytes", size)
+                return
+
+        # Once anything is spilled, everything after it goes through the spill
+        # file too, to keep the order.
+        if self._spilled or (self._full() and self._policy == "spill"):
+            self._write_spill(item)
+            return
+
+        if self._full():
+            await self._pause(item)
+            return
+
+        self._append(item)
+
+    def put_nowait(self, item):
+        if self._spilled:
+            self._write_spill(item)
+        else:
+            self._append(item)
+
+    async def get(self):
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+
+    def get_nowait(self):
+        if self._items:
+            item = self._items.popleft()
+        elif self._spilled:
+            item = self._read_spill()
+        else:
+            raise asyncio.QueueEmpty
+
+        if not self._full():
+            self._not_full.set()
+        return item
+
+    def dropped(self) -> list[OutputTruncated]:
+        """Stream output discarded by the `drop` policy."""
+        return [
+            OutputTruncated(
+                output=name,
+                path=None,
+                total_bytes=self._stream_bytes[name],
+                truncated_bytes=dropped,
+            )
+            for name, dropped in self._dropped_bytes.items()
+        ]
+
+    def close(self):
+        """Discard what's left and release any producer still waiting for space."""
+        self._closed = True
+        self._items.clear()
+        self._not_full.set()
+
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self._spilled = 0
+
+    def _append(self, item):
+        self._items.append(item)
+        self._not_empty.set()
+
+    async def _pause(self, item):
+        queue_metrics.inc("pause.waits")
+        start = time.monotonic()
+        deadline = start + self._pause_timeout
+
+        while self._full() and not self._closed:
+            self._not_full.clear()
+            try:
+                await asyncio.wait_for(
+                    self._not_full.wait(), timeout=max(0.0, deadline - time.monotonic())
+                )
+            except TimeoutError:
+                break
+
+        queue_metrics.inc("pause.seconds", time.monotonic() - start)
+        if self._closed:
+            return
+
+        if self._full() or self._spilled:
+            queue_metrics.inc("pause.timeouts")
+            self._write_spill(item)
+        else:
+            self._append(item)
+
+    def _write_spill(self, item):
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(dir=self._spill_dir)
+            self._spill_read_offset = 0
+
+        record = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spill.seek(0, 2)
+        self._spill.write(len(record).to_bytes(RECORD_LENGTH_SIZE, "big"))
+        self._spill.write(record)
+        self._spilled += 1
+
+        queue_metrics.inc("spill.outputs")
+        queue_metrics.inc("spill.bytes", len(record))
+        self._not_empty.set()
+
+    def _read_spill(self):
+        self._spill.seek(self._spill_read_offset)
+        size = int.from_bytes(self._spill.read(RECORD_LENGTH_SIZE), "big")
+        item = pickle.loads(self._spill.read(size))
+        self._spill_read_offset += RECORD_LENGTH_SIZE + size
+        self._spilled -= 1
+
+        # Start over with an empty file once everything was read back
+        if not self._spilled:
+            self._spill.seek(0)
+            self._spill.truncate()
+            self._spill_read_offset = 0
+
+        return item
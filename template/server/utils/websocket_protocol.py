@@ -0,0 +1,48 @@
+"""
+Jupyter's `v1.kernel.websocket.jupyter.org` binary websocket framing.
+
+A message is an 8-byte little-endian count of offsets, followed by the offsets (also
+8-byte little-endian) and then the channel name and the message parts they point to:
+header, parent header, metadata, content and any binary buffers, each part still
+JSON-encoded exactly as the kernel sent it. That lets the receiver decode the header
+first and skip the rest of messages it's not interested in.
+
+https://jupyter-server.readthedocs.io/en/latest/developers/websocket-protocols.html
+"""
+
+V1_SUBPROTOCOL = "v1.kernel.websocket.jupyter.org"
+
+OFFSET_SIZE = 8
+
+
+def serialize_v1(parts: list[bytes], channel: str) -> bytes:
+    channel_bytes = channel.encode("utf-8")
+
+    # Offsets of the channel, every part and the end of the message
+    offsets = [OFFSET_SIZE * (len(parts) + 3)]
+    offsets.append(offsets[-1] + len(channel_bytes))
+    for part in parts:
+        offsets.append(offsets[-1] + len(part))
+
+    return b"".join(
+        [
+            len(offsets).to_bytes(OFFSET_SIZE, "little"),
+            *(offset.to_bytes(OFFSET_SIZE, "little") for offset in offsets),
+            channel_bytes,
+            *parts,
+        ]
+    )
+
+
+def deserialize_v1(message: bytes) -> tuple[str, list[memoryview]]:
+    view = memoryview(message)
+    count = int.from_bytes(view[:OFFSET_SIZE], "little")
+    offsets = [
+        int.from_bytes(view[OFFSET_SIZE * (i + 1) : OFFSET_SIZE * (i + 2)], "little")
+        for i in range(count)
+    ]
+
+    channel = str(view[offsets[0] : offsets[1]], "utf-8")
+    parts = [view[offsets[i] : offsets[i + 1]] for i in range(1, count - 1)]
+
+    return channel, parts
@@ -7,10 +7,22 @@ function start_code_interpreter() {
 		exit 1
 	fi
 
+	start_server
+}
+
+function start_server() {
 	cd /root/.server/
 	.venv/bin/uvicorn main:app --host 0.0.0.0 --port 49999 --workers 1 --no-access-log --no-use-colors --timeout-keep-alive 640
 }
 
 echo "Starting Code Interpreter server..."
+MATPLOTLIBRC=/root/.config/matplotlib/.matplotlibrc python /root/.jupyter/kernel_zygote.py serve >/dev/null 2>&1 &
+
+if [ "$E2B_KERNEL_MANAGER" = "in-process" ]; then
+	# The server starts and manages the kernels itself, no jupyter-server
+	MATPLOTLIBRC=/root/.config/matplotlib/.matplotlibrc start_server
+	exit $?
+fi
+
 start_code_interpreter &
 MATPLOTLIBRC=/root/.config/matplotlib/.matplotlibrc jupyter server --IdentityProvider.token="" >/dev/null 2>&1
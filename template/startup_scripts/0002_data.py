@@ -1,9 +1,86 @@
+import base64
+import json
 import sys
+import uuid
+from collections import OrderedDict
 
 import IPython
-from IPython.core.formatters import BaseFormatter, JSONFormatter
+from IPython.core.formatters import BaseFormatter, JSONFormatter, PlainTextFormatter
+from IPython.display import display
 from traitlets.traitlets import Unicode, ObjectName
 
+# Rows of a summarized DataFrame sent in its head and tail preview
+DATAFRAME_PREVIEW_ROWS = 5
+# Summarized DataFrames kept for fetching their rows later, the oldest are
+# released first
+DATAFRAME_KEEP = 16
+
+
+class E2BDisplayOptions:
+    """
+    Display options of the current execution, set by the server with
+    `_e2b_set_display_options` in a silent execution before the cell and reset
+    after every cell.
+    """
+
+    def __init__(self):
+        # `active_types` of the display formatter to restore after the cell
+        self.default_active_types = None
+        self.reset()
+
+    def reset(self, *args):
+        # "full" sends whole DataFrames, "summary" only their `e2b/dataframe`
+        # summary
+        self.dataframe_mode = "full"
+        # Size, DPI and format of displayed images, and the context's policy for
+        # displaying saved images, see `0003_images.py`
+        self.image_policy = None
+        self.image_saves = None
+
+        if self.default_active_types is not None:
+            display_formatter = IPython.get_ipython().display_formatter
+            display_formatter.active_types = self.default_active_types
+            self.default_active_types = None
+
+    def set_active_types(self, mime_types):
+        """Compute only these MIME types for the objects displayed in the cell."""
+        display_formatter = IPython.get_ipython().display_formatter
+        if self.default_active_types is None:
+            self.default_active_types = list(display_formatter.active_types)
+        display_formatter.active_types = list(mime_types)
+
+
+_e2b_display_options = E2BDisplayOptions()
+
+
+def _e2b_set_display_options(
+    dataframe_mode=None, formats=None, image_policy=None, image_saves=None
+):
+    if dataframe_mode is not None:
+        _e2b_display_options.dataframe_mode = dataframe_mode
+    if image_policy is not None:
+        _e2b_display_options.image_policy = image_policy
+    if image_saves is not None:
+        _e2b_display_options.image_saves = image_saves
+    if formats is not None:
+        _e2b_display_options.set_active_types(formats)
+
+
+def _is_summarized_dataframe(obj) -> bool:
+    pandas = sys.modules.get("pandas")
+    return (
+        pandas is not None
+        and isinstance(obj, pandas.DataFrame)
+        and _e2b_display_options.dataframe_mode == "summary"
+    )
+
+
+def _split(frame) -> dict:
+    """The frame as JSON-compatible columns, index and rows."""
+    return json.loads(
+        frame.to_json(orient="split", date_format="iso", default_handler=str)
+    )
+
 
 class E2BDataFormatter(BaseFormatter):
     format_type = Unicode("e2b/data")
@@ -12,6 +89,10 @@ class E2BDataFormatter(BaseFormatter):
     _return_type = (dict, str)
 
     def __call__(self, obj):
+        # Left out of `active_types`
+        if not self.enabled:
+            return None
+
         # IPython invokes every registered formatter for every displayed
         # object. Gate on sys.modules so a non-DataFrame output (e.g. an
         # int from `1 + 1`) doesn't pay the pandas import cost — a
@@ -20,16 +101,169 @@ class E2BDataFormatter(BaseFormatter):
         pandas = sys.modules.get("pandas")
         if pandas is None or not isinstance(obj, pandas.DataFrame):
             return super().__call__(obj)
+        if _is_summarized_dataframe(obj):
+            return None
 
         result = obj.to_dict(orient="list")
-        for key, value in result.items():
-            # Check each column's values
+        for key, dtype in obj.dtypes.items():
+            # Only datetime and object columns can hold Timestamps, skip the
+            # per-value loop for the rest
+            if not (
+                pandas.api.types.is_object_dtype(dtype)
+                or pandas.api.types.is_datetime64_any_dtype(dtype)
+            ):
+                continue
             result[key] = [
-                v.isoformat() if isinstance(v, pandas.Timestamp) else v for v in value
+                v.isoformat() if isinstance(v, pandas.Timestamp) else v
+                for v in result[key]
             ]
         return result
 
 
+class E2BArrowFormatter(BaseFormatter):
+    format_type = Unicode("e2b/arrow")
+
+    print_method = ObjectName("_repr_e2b_arrow_")
+    _return_type = (str,)
+
+    def __call__(self, obj):
+        if not self.enabled:
+            return None
+
+        # Same sys.modules gate as E2BDataFormatter
+        pandas = sys.modules.get("pandas")
+        if pandas is None or not isinstance(obj, pandas.DataFrame):
+            return super().__call__(obj)
+
+        if _is_summarized_dataframe(obj):
+            return None
+
+        try:
+            import pyarrow
+        except ImportError:
+            return None
+
+        # Arrow IPC stream of the whole frame, converted column by column,
+        # base64 like the other binary formats in the kernel messages
+        try:
+            table = pyarrow.Table.from_pandas(obj)
+            sink = pyarrow.BufferOutputStream()
+            with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            # E.g. object columns with mixed types
+            return None
+
+        return base64.b64encode(sink.getvalue()).decode("ascii")
+
+
+class E2BDataFrameSummaryFormatter(BaseFormatter):
+    """
+    Schema, head and tail preview and statistics of a DataFrame in the "summary"
+    mode. The DataFrame is kept under the summary's `id` so its rows can be fetched
+    with `_e2b_dataframe_rows` later.
+    """
+
+    format_type = Unicode("e2b/dataframe")
+
+    print_method = ObjectName("_repr_e2b_dataframe_")
+    _return_type = (dict,)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frames = OrderedDict()
+
+    def __call__(self, obj):
+        if not self.enabled:
+            return None
+        if not _is_summarized_dataframe(obj):
+            return super().__call__(obj)
+
+        dataframe_id = str(uuid.uuid4())
+        self.frames[dataframe_id] = obj
+        while len(self.frames) > DATAFRAME_KEEP:
+            self.frames.popitem(last=False)
+
+        rows = len(obj)
+        if rows > 2 * DATAFRAME_PREVIEW_ROWS:
+            head = _split(obj.head(DATAFRAME_PREVIEW_ROWS))
+            tail = _split(obj.tail(DATAFRAME_PREVIEW_ROWS))
+        else:
+            head = _split(obj)
+            tail = None
+
+        try:
+            stats = _split(obj.describe())
+        except (TypeError, ValueError):
+            # E.g. a frame without any columns
+            stats = None
+
+        return {
+            "id": dataframe_id,
+            "shape": [rows, len(obj.columns)],
+            "columns": [
+                {"name": str(name), "dtype": str(dtype)}
+                for name, dtype in obj.dtypes.items()
+            ],
+            "head": head,
+            "tail": tail,
+            "stats": stats,
+        }
+
+
+class E2BDataFrameRows:
+    """Rows of a DataFrame fetched by the server, sent as `e2b/data`."""
+
+    def __init__(self, rows: dict):
+        self.rows = rows
+
+    def _repr_e2b_data_(self):
+        return self.rows
+
+    def __repr__(self):
+        return f"<DataFrame rows {self.rows['start']}-{self.rows['stop']}>"
+
+
+class E2BDataFrameNotFound(KeyError):
+    """No summarized DataFrame or DataFrame variable with that name."""
+
+
+def _e2b_dataframe_rows(dataframe_id, start=0, stop=None, columns=None):
+    """
+    Display rows `start` to `stop` of a summarized DataFrame, or a DataFrame
+    variable of that name, only with the `columns` if given. The server runs it
+    silently, so they're displayed instead of returned.
+    """
+    ip = IPython.get_ipython()
+    frame = ip.display_formatter.formatters["e2b/dataframe"].frames.get(dataframe_id)
+    if frame is None:
+        pandas = sys.modules.get("pandas")
+        frame = ip.user_ns.get(dataframe_id)
+        if pandas is None or not isinstance(frame, pandas.DataFrame):
+            raise E2BDataFrameNotFound(f"DataFrame {dataframe_id} not found")
+
+    if columns:
+        frame = frame[columns]
+
+    page = frame.iloc[start:stop]
+    display(
+        E2BDataFrameRows(
+            {
+                **_split(page),
+                "start": start,
+                "stop": start + len(page),
+                "total_rows": len(frame),
+            }
+        )
+    )
+
+
+def _dataframe_html(obj):
+    if _is_summarized_dataframe(obj):
+        return None
+    return obj._repr_html_()
+
+
 class E2BChartFormatter(BaseFormatter):
     format_type = Unicode("e2b/chart")
 
@@ -37,6 +271,9 @@ class E2BChartFormatter(BaseFormatter):
     _return_type = (dict, str)
 
     def __call__(self, obj):
+        if not self.enabled:
+            return None
+
         # Same sys.modules gate as E2BDataFormatter: a matplotlib Figure
         # can only exist if the user already imported matplotlib.
         if sys.modules.get("matplotlib") is None:
@@ -55,8 +292,24 @@ class E2BChartFormatter(BaseFormatter):
             return {}
 
 
+class E2BPlainTextFormatter(PlainTextFormatter):
+    """
+    IPython computes the plain text representation even if it's not in
+    `active_types`, unlike the other formats.
+    """
+
+    def __call__(self, obj):
+        if not self.enabled:
+            return None
+
+        return super().__call__(obj)
+
+
 class E2BJSONFormatter(JSONFormatter):
     def __call__(self, obj):
+        if not self.enabled:
+            return None
+
         if isinstance(obj, (list, dict)):
             try:
                 import orjson
@@ -76,6 +329,18 @@ ip = IPython.get_ipython()
 ip.display_formatter.formatters["e2b/data"] = E2BDataFormatter(
     parent=ip.display_formatter
 )
+ip.display_formatter.formatters["e2b/arrow"] = E2BArrowFormatter(
+    parent=ip.display_formatter
+)
+ip.display_formatter.formatters["e2b/dataframe"] = E2BDataFrameSummaryFormatter(
+    parent=ip.display_formatter
+)
+# Registered by name so pandas doesn't have to be imported here, pandas 3 reports
+# the public module of its classes
+for module in ("pandas.core.frame", "pandas"):
+    ip.display_formatter.formatters["text/html"].for_type_by_name(
+        module, "DataFrame", _dataframe_html
+    )
 ip.display_formatter.formatters["e2b/chart"] = E2BChartFormatter(
     parent=ip.display_formatter
 )
@@ -83,3 +348,13 @@ ip.display_formatter.formatters["e2b/chart"] = E2BChartFormatter(
 ip.display_formatter.formatters["application/json"] = E2BJSONFormatter(
     parent=ip.display_formatter
 )
+
+plain_text_formatter = ip.display_formatter.formatters["text/plain"]
+ip.display_formatter.formatters["text/plain"] = E2BPlainTextFormatter(
+    parent=ip.display_formatter,
+    singleton_printers=plain_text_formatter.singleton_printers,
+    type_printers=plain_text_formatter.type_printers,
+    deferred_printers=plain_text_formatter.deferred_printers,
+)
+
+ip.events.register("post_run_cell", _e2b_display_options.reset)
@@ -1,8 +1,39 @@
+import base64
+import io
+import math
+import os
+import sys
+from contextlib import contextmanager
 from typing import Any
 
+import IPython
 from IPython.core.display_functions import display
+from IPython.core.formatters import BaseFormatter
+from PIL import Image as PILImage
+from PIL import ImageOps
 from PIL.Image import Image
 from PIL.ImageShow import UnixViewer
+from traitlets.traitlets import ObjectName, Unicode
+
+# Formats of displayed images the image policy applies to, and the ones it can
+# encode them in
+IMAGE_MIME_TYPES = ("image/png", "image/jpeg")
+IMAGE_FORMAT_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+# Images saved to a path displayed in a cell, unless the context's policy says
+# otherwise, the rest are only summarized after the cell
+IMAGE_SAVE_MAX_DISPLAYS = 10
+# Paths of the saved images that weren't displayed listed in their summary
+IMAGE_SAVE_MAX_PATHS = 1000
+# Thumbnails in the contact sheet of the saved images that weren't displayed,
+# their size in pixels and how many are in a row
+CONTACT_SHEET_MAX_TILES = 64
+CONTACT_SHEET_TILE_SIZE = 128
+CONTACT_SHEET_COLUMNS = 8
 
 
 def show_file(self, path: str, **options: Any) -> int:
@@ -14,11 +45,222 @@ UnixViewer.show_file = show_file
 original_save = Image.save
 
 
+class E2BImageSaveSummary:
+    """Images saved in the cell that weren't displayed, sent as `e2b/image_saves`."""
+
+    def __init__(self, count, displayed, paths, tiles):
+        self.count = count
+        self.displayed = displayed
+        self.paths = paths
+        self.tiles = tiles
+
+    def _repr_e2b_image_saves_(self):
+        return {"count": self.count, "displayed": self.displayed, "paths": self.paths}
+
+    def _repr_png_(self):
+        # The contact sheet
+        if not self.tiles:
+            return None
+
+        size = CONTACT_SHEET_TILE_SIZE
+        columns = min(len(self.tiles), CONTACT_SHEET_COLUMNS)
+        rows = math.ceil(len(self.tiles) / columns)
+        sheet = PILImage.new("RGB", (columns * size, rows * size), "white")
+        for i, tile in enumerate(self.tiles):
+            row, column = divmod(i, columns)
+            position = (
+                column * size + (size - tile.width) // 2,
+                row * size + (size - tile.height) // 2,
+            )
+            sheet.paste(tile, position, tile)
+
+        buffer = io.BytesIO()
+        original_save(sheet, buffer, "PNG")
+        return buffer.getvalue()
+
+    def __repr__(self):
+        return (
+            f"{self.count - self.displayed} of {self.count} saved images not displayed"
+        )
+
+
+class E2BImageSaves:
+    """
+    Images saved to a path in the current cell. The first `max_displays` of them are
+    displayed and the rest summarized after the cell with their count and paths,
+    and with the `contact_sheet` option thumbnails of them.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.displayed = 0
+        self.paths = []
+        self.tiles = []
+
+    def add(self, image, path):
+        # The context's policy, see `0002_data.py`
+        policy = _e2b_display_options.image_saves or {}  # noqa: F821
+        if not policy.get("enabled", True):
+            return
+
+        self.count += 1
+        if self.displayed < policy.get("max_displays", IMAGE_SAVE_MAX_DISPLAYS):
+            self.displayed += 1
+            display(image)
+            return
+
+        if len(self.paths) < IMAGE_SAVE_MAX_PATHS:
+            self.paths.append(path)
+        if policy.get("contact_sheet") and len(self.tiles) < CONTACT_SHEET_MAX_TILES:
+            tile = ImageOps.contain(
+                image, (CONTACT_SHEET_TILE_SIZE, CONTACT_SHEET_TILE_SIZE)
+            )
+            self.tiles.append(tile.convert("RGBA"))
+
+    def summarize(self, *args):
+        if self.count > self.displayed:
+            display(
+                E2BImageSaveSummary(self.count, self.displayed, self.paths, self.tiles)
+            )
+        self.reset()
+
+
+class E2BImageSavesFormatter(BaseFormatter):
+    format_type = Unicode("e2b/image_saves")
+
+    print_method = ObjectName("_repr_e2b_image_saves_")
+    _return_type = (dict,)
+
+
+_e2b_image_saves = E2BImageSaves()
+
+
 def save(image, fp, format=None, **options):
-    if isinstance(fp, str):
-        display(image)
+    if isinstance(fp, (str, os.PathLike)):
+        _e2b_image_saves.add(image, os.fspath(fp))
 
     original_save(image, fp, format, **options)
 
 
 Image.save = save
+
+
+def _encode_image(image, image_format, quality):
+    """The image in the format, base64 encoded like in the kernel messages."""
+    if image_format == "jpeg" and image.mode not in ("RGB", "L"):
+        # JPEG has no alpha channel, flatten the image on white
+        rgba = image.convert("RGBA")
+        image = PILImage.new("RGB", rgba.size, "white")
+        image.paste(rgba, mask=rgba.getchannel("A"))
+
+    options = {}
+    if quality is not None and image_format != "png":
+        options["quality"] = quality
+
+    buffer = io.BytesIO()
+    original_save(image, buffer, image_format.upper(), **options)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _apply_image_policy(data, metadata, policy):
+    """
+    The display data with its image scaled down to the policy's `max_size` and
+    encoded in its `format`, and the image's thumbnail if the policy has a
+    `thumbnail_size`.
+    """
+    source = next((key for key in IMAGE_MIME_TYPES if key in data), None)
+    if source is None:
+        return data, metadata, None
+
+    value = data[source]
+    image = PILImage.open(
+        io.BytesIO(base64.b64decode(value) if isinstance(value, str) else value)
+    )
+    image_format = policy.get("format") or source.split("/")[1]
+    quality = policy.get("quality")
+    mime_type = IMAGE_FORMAT_MIME_TYPES[image_format]
+
+    thumbnail = None
+    thumbnail_size = policy.get("thumbnail_size")
+    if thumbnail_size is not None and max(image.size) > thumbnail_size:
+        small = image.copy()
+        small.thumbnail((thumbnail_size, thumbnail_size))
+        thumbnail = {
+            mime_type: _encode_image(small, image_format, quality),
+            "e2b/thumbnail": True,
+        }
+
+    max_size = policy.get("max_size")
+    resized = max_size is not None and max(image.size) > max_size
+    if resized:
+        image.thumbnail((max_size, max_size))
+
+    reencoded = mime_type != source or (quality is not None and image_format != "png")
+    if resized or reencoded:
+        data = {
+            key: value for key, value in data.items() if key not in IMAGE_MIME_TYPES
+        }
+        data[mime_type] = _encode_image(image, image_format, quality)
+        # Sizes of the original image
+        metadata = {
+            key: value for key, value in metadata.items() if key not in IMAGE_MIME_TYPES
+        }
+
+    return data, metadata, thumbnail
+
+
+@contextmanager
+def _capped_dpi(obj, dpi):
+    """Render the matplotlib figure with at most `dpi`."""
+    # A matplotlib Figure can only exist if the user already imported matplotlib
+    if dpi is None or sys.modules.get("matplotlib") is None:
+        yield
+        return
+
+    from matplotlib.figure import Figure
+
+    if not isinstance(obj, Figure) or obj.dpi <= dpi:
+        yield
+        return
+
+    original_dpi = obj.dpi
+    obj.dpi = dpi
+    try:
+        yield
+    finally:
+        obj.dpi = original_dpi
+
+
+display_formatter = IPython.get_ipython().display_formatter
+original_format = display_formatter.format
+
+
+def format(obj, include=None, exclude=None):
+    policy = _e2b_display_options.image_policy  # noqa: F821, from 0002_data.py
+    if policy is None:
+        return original_format(obj, include, exclude)
+
+    with _capped_dpi(obj, policy.get("dpi")):
+        data, metadata = original_format(obj, include, exclude)
+
+    try:
+        data, metadata, thumbnail = _apply_image_policy(data, metadata, policy)
+    except Exception:
+        # E.g. an image PIL can't read, sent as it is
+        return data, metadata
+
+    if thumbnail is not None:
+        # Sent right away, before the image the caller sends
+        IPython.get_ipython().display_pub.publish(data=thumbnail)
+    return data, metadata
+
+
+display_formatter.format = format
+display_formatter.formatters["e2b/image_saves"] = E2BImageSavesFormatter(
+    parent=display_formatter
+)
+
+IPython.get_ipython().events.register("post_run_cell", _e2b_image_saves.summarize)
@@ -6,6 +6,7 @@ def make_template(
     is_docker: bool = False,
     ready: ReadyCmd | None = None,
     debug: bool = False,
+    kernel_manager: str = "jupyter-server",
 ):
     enabled_kernels = set(["python", "javascript"] + kernels)
     # Start with base template
@@ -44,7 +45,16 @@ def make_template(
     )
 
     if "python" in enabled_kernels:
-        template = template.run_cmd("ipython kernel install --name 'python3' --user")
+        # Start Python kernels through the zygote (see kernel_zygote.py)
+        kernel_spec = ".local/share/jupyter/kernels/python3/kernel.json"
+        zygote_argv = '[.argv[0], "/root/.jupyter/kernel_zygote.py", "launch", "-f", "{connection_file}"]'
+        template = template.run_cmd(
+            [
+                "ipython kernel install --name 'python3' --user",
+                f"jq '.argv = {zygote_argv}' {kernel_spec} > /tmp/kernel.json",
+                f"mv /tmp/kernel.json {kernel_spec}",
+            ]
+        )
 
     # Install R Kernel if requested
     if "r" in enabled_kernels:
@@ -100,17 +110,34 @@ def make_template(
         .copy("jupyter-healthcheck.sh", ".jupyter/jupyter-healthcheck.sh")
         .run_cmd("chmod +x .jupyter/jupyter-healthcheck.sh")
         .copy("jupyter_server_config.py", ".jupyter/")
+        .copy("kernel_zygote.py", ".jupyter/")
         .make_dir(".ipython/profile_default/startup")
         .copy("ipython_kernel_config.py", ".ipython/profile_default/")
         .copy("startup_scripts", ".ipython/profile_default/startup")
     )
 
-    if not is_docker:
+    if not is_docker and kernel_manager == "in-process":
+        # The server starts and manages the kernels itself, no jupyter-server
         template = template.copy(
-            "systemd/jupyter.service", "/etc/systemd/system/jupyter.service"
-        ).copy(
-            "systemd/code-interpreter.service",
+            "systemd/code-interpreter-in-process.service",
             "/etc/systemd/system/code-interpreter.service",
+        ).copy(
+            "systemd/kernel-zygote.service",
+            "/etc/systemd/system/kernel-zygote.service",
+        )
+    elif not is_docker:
+        template = (
+            template.copy(
+                "systemd/jupyter.service", "/etc/systemd/system/jupyter.service"
+            )
+            .copy(
+                "systemd/code-interpreter.service",
+                "/etc/systemd/system/code-interpreter.service",
+            )
+            .copy(
+                "systemd/kernel-zygote.service",
+                "/etc/systemd/system/kernel-zygote.service",
+            )
         )
         if debug:
             # Drop-in that routes Jupyter's stdout to the journal for debugging.
@@ -119,8 +146,10 @@ def make_template(
                 "/etc/systemd/system/jupyter.service.d/debug.conf",
             )
     else:
-        template = template.copy("start-up.sh", ".jupyter/start-up.sh").run_cmd(
-            "chmod +x .jupyter/start-up.sh"
+        template = (
+            template.set_envs({"E2B_KERNEL_MANAGER": kernel_manager})
+            .copy("start-up.sh", ".jupyter/start-up.sh")
+            .run_cmd("chmod +x .jupyter/start-up.sh")
         )
 
     if is_docker:
@@ -136,7 +165,9 @@ def make_template(
     template = template.set_user("user").set_workdir("/home/user")
 
     if is_docker:
-        start_cmd = "sudo --preserve-env=E2B_LOCAL /root/.jupyter/start-up.sh"
+        start_cmd = "sudo --preserve-env=E2B_LOCAL,E2B_KERNEL_MANAGER /root/.jupyter/start-up.sh"
+    elif kernel_manager == "in-process":
+        start_cmd = "sudo systemctl start code-interpreter"
     else:
         start_cmd = "sudo systemctl start jupyter"
 